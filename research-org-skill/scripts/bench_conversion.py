@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Benchmark the markdown-to-Notion conversion path
+
+Generates deterministic synthetic reports shaped like the ones the skill
+writes (see references/section_guidelines.md): H1/H2 sections, dense
+citation links, bullet and numbered lists, pipe tables and HTML tables.
+Each conversion stage is timed on reports from lite to 10x full size, and
+throughput (blocks/s, MB/s) and peak memory are reported. Results can be
+saved as a baseline and compared on later runs, so parser changes come
+with numbers attached.
+
+No network access or Notion credentials are needed.
+
+Usage:
+    python3 bench_conversion.py
+    python3 bench_conversion.py --sizes lite full 10x --save-baseline bench_baseline.json
+    python3 bench_conversion.py --baseline bench_baseline.json --max-regression 0.10
+    python3 bench_conversion.py --write-report /tmp/report-10x.md --sizes 10x
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from upload_to_notion import NotionUploader, _scan_inline, encode_block
+
+# Report sizes as multiples of a full report (~3,300 words); lite is ~1,300
+SIZES = {"lite": 0.4, "full": 1.0, "2x": 2.0, "5x": 5.0, "10x": 10.0}
+DEFAULT_SIZES = ("lite", "full", "10x")
+DEFAULT_REPEAT = 5  # timed runs per stage; the fastest one is reported
+DEFAULT_SEED = 1234
+DEFAULT_MAX_REGRESSION = 0.10  # allowed throughput drop vs baseline (fraction)
+STAGE_UNITS = {  # what each stage's item count counts
+    "chunk": "chunks",
+    "convert": "blocks",
+    "inline": "segments",  # rich text segments
+    "html_table": "blocks",
+    "pipeline": "blocks",
+}
+
+# Full-mode section outline from section_guidelines.md: (H1, [H2, ...])
+OUTLINE = [
+    ("Company Overview", ["Founding Story", "Mission and Vision", "Thesis", "Business Model"]),
+    ("Executive Team", []),
+    ("Investors, Funding Rounds, and Valuation", ["Funding Rounds", "Valuation Analysis"]),
+    ("Products and Services", []),
+    ("Notable Partnerships and Customers", []),
+    ("Market", ["Customer", "Market Size and Opportunity", "Market Dynamics and Trends",
+                "Competitive Landscape Overview", "Key Competitors", "Competitive Advantages",
+                "Traction"]),
+    ("Opportunities and Risks", ["Key Opportunities", "Key Risks", "SWOT Analysis"]),
+]
+
+WORDS = (
+    "platform enterprise customers revenue growth market analytics workflow automation "
+    "clinical voice agents pipeline integration pricing contract expansion retention "
+    "segment vertical adoption deployment infrastructure compliance security model "
+    "inference latency accuracy partners channel distribution hospitals insurers "
+    "developers teams operators annual recurring funding valuation investors round"
+).split()
+SOURCES = ("techcrunch.com", "businesswire.com", "crunchbase.com", "forbes.com",
+           "prnewswire.com", "reuters.com", "linkedin.com", "sec.gov")
+PHRASES = ("according to the company", "per its Series B announcement", "as reported by analysts",
+           "based on public filings", "in its 2024 press release")
+
+
+class ReportGenerator:
+    """Deterministic synthetic research report generator
+
+    The same seed and scale always produce the same report, so timings are
+    comparable between runs and between machines.
+    """
+
+    def __init__(self, seed: int = DEFAULT_SEED):
+        """Initialize generator
+
+        Args:
+            seed: Random seed; fixes the generated text
+        """
+        self.rng = random.Random(seed)
+        self.citation_count = 0
+
+    def _words(self, count: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(count))
+
+    def _url(self) -> str:
+        self.citation_count += 1
+        return f"https://{self.rng.choice(SOURCES)}/article/{self.citation_count}"
+
+    def _citation(self) -> str:
+        url = self._url()
+        return f"[{url.split('/')[2].split('.')[0].title()}]({url})"
+
+    def _sentence(self) -> str:
+        text = self._words(self.rng.randint(10, 22))
+        if self.rng.random() < 0.3:
+            text = f"{text} **{self._words(3)}**"
+        if self.rng.random() < 0.4:
+            text += f", {self.rng.choice(PHRASES)}"
+        return f"{text[0].upper()}{text[1:]} ({self._citation()})."
+
+    def paragraph(self) -> str:
+        """Dense prose paragraph: 2-5 sentences, one citation each"""
+        return " ".join(self._sentence() for _ in range(self.rng.randint(2, 5)))
+
+    def bullets(self, numbered: bool = False) -> str:
+        """Bullet or numbered list of bold-labelled, cited items"""
+        items = []
+        for i in range(self.rng.randint(3, 7)):
+            marker = f"{i + 1}." if numbered else "-"
+            label = self._words(2).title()
+            items.append(f"{marker} **{label}:** {self._words(self.rng.randint(6, 14))} ({self._citation()})")
+        return "\n".join(items)
+
+    def pipe_table(self) -> str:
+        """Pipe table, as models sometimes write instead of HTML"""
+        columns = self.rng.randint(3, 5)
+        lines = ["| " + " | ".join(self._words(2).title() for _ in range(columns)) + " |",
+                 "|" + "---|" * columns]
+        for _ in range(self.rng.randint(3, 8)):
+            lines.append("| " + " | ".join(self._words(self.rng.randint(1, 5)) for _ in range(columns)) + " |")
+        return "\n".join(lines)
+
+    def html_table(self, columns: int, rows: int) -> str:
+        """HTML table in the multi-line <table header-row="true"> template format"""
+        lines = ['<table header-row="true">', "<tr>"]
+        lines.extend(f"<td>{self._words(2).title()}</td>" for _ in range(columns))
+        lines.append("</tr>")
+        for _ in range(rows):
+            lines.append("<tr>")
+            for col in range(columns):
+                cell = self._words(self.rng.randint(1, 8))
+                if col == 0 and self.rng.random() < 0.5:
+                    cell = f"[{cell}]({self._url()})"
+                elif self.rng.random() < 0.2:
+                    cell = f"**{cell}**"
+                lines.append(f"<td>{cell}</td>")
+            lines.append("</tr>")
+        lines.append("</table>")
+        return "\n".join(lines)
+
+    def section_body(self) -> str:
+        """Mix of prose, lists and tables for one section"""
+        parts = [self.paragraph() for _ in range(self.rng.randint(1, 2))]
+        roll = self.rng.random()
+        if roll < 0.35:
+            parts.append(self.bullets(numbered=self.rng.random() < 0.3))
+        elif roll < 0.55:
+            parts.append(self.html_table(self.rng.randint(4, 6), self.rng.randint(3, 10)))
+        elif roll < 0.65:
+            parts.append(self.pipe_table())
+        if self.rng.random() < 0.3:
+            parts.append(f"### {self._words(3).title()}\n{self.bullets()}")
+        return "\n\n".join(parts)
+
+    def report(self, scale: float = 1.0) -> str:
+        """Generate a report of roughly scale x a full-mode report
+
+        Args:
+            scale: Size relative to a full report (0.4 is about lite mode)
+
+        Returns:
+            Markdown report
+        """
+        target_words = int(3300 * scale)
+        sections = []
+        words = 0
+        while words < target_words:
+            for title, subsections in OUTLINE:
+                body = [f"# {title}", self.section_body()]
+                for subtitle in subsections:
+                    body.append(f"## {subtitle}")
+                    body.append(self.section_body())
+                section = "\n\n".join(body)
+                sections.append(section)
+                words += len(section.split())
+                if words >= target_words:
+                    break
+        return "\n\n".join(sections) + "\n"
+
+
+def _time_best(func: Callable[[], int], repeat: int) -> Tuple[float, int]:
+    """Run func repeatedly and return (fastest seconds, its result)"""
+    best = float("inf")
+    result = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _peak_memory(func: Callable[[], int]) -> int:
+    """Peak traced allocation in bytes during one run of func"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def build_stages(uploader: NotionUploader, content: str) -> Dict[str, Tuple[Callable[[], int], int]]:
+    """Benchmark stages for one report; each returns the number of items produced
+
+    Stages that parse inline markup clear the _scan_inline cache on every
+    run, so best-of-N timings measure parsing rather than cache hits.
+
+    Args:
+        uploader: NotionUploader used only for its conversion methods
+        content: Markdown report
+
+    Returns:
+        {stage name: (callable, bytes of markdown the stage processes)};
+        inline and html_table only see part of the report, so their MB/s
+        is computed from that part
+    """
+    chunks = uploader.chunk_markdown_by_headers(content)
+    lines = [line for chunk in chunks for line in chunk["content"].split("\n")
+             if line and not line.startswith(("<", "#"))]
+    tables = [para for chunk in chunks for para in chunk["content"].split("\n\n")
+              if para.startswith("<table")]
+
+    def chunk() -> int:
+        return len(uploader.chunk_markdown_by_headers(content))
+
+    def convert() -> int:
+        _scan_inline.cache_clear()
+        return sum(len(uploader.markdown_to_notion_blocks(c)) for c in chunks)
+
+    def inline() -> int:
+        _scan_inline.cache_clear()  # measure parsing, not cache hits
+        return sum(len(uploader._parse_inline_formatting(line)) for line in lines)
+
+    def html_table() -> int:
+        _scan_inline.cache_clear()
+        return sum(len(uploader._parse_html_table(table)) for table in tables)
+
+    def pipeline() -> int:
+        _scan_inline.cache_clear()
+        return sum(1 for block in uploader.iter_notion_blocks(content) if encode_block(block))
+
+    report_bytes = len(content.encode("utf-8"))
+    return {
+        "chunk": (chunk, report_bytes),
+        "convert": (convert, report_bytes),
+        "inline": (inline, sum(len(line.encode("utf-8")) for line in lines)),
+        "html_table": (html_table, sum(len(table.encode("utf-8")) for table in tables)),
+        "pipeline": (pipeline, report_bytes),
+    }
+
+
+def run_benchmarks(sizes: List[str], repeat: int = DEFAULT_REPEAT, seed: int = DEFAULT_SEED,
+                   memory: bool = True) -> Dict[str, Dict[str, Dict]]:
+    """Time every stage on every report size
+
+    Args:
+        sizes: Keys of SIZES
+        repeat: Timed runs per stage (fastest is kept)
+        seed: Report generator seed
+        memory: Also measure peak memory (one extra traced run per stage)
+
+    Returns:
+        {size: {stage: {seconds, items, unit, items_per_s, input_bytes, mb_per_s, peak_kb}}}
+    """
+    uploader = NotionUploader("benchmark", "benchmark", verbose=False)
+    results = {}
+
+    for size in sizes:
+        content = ReportGenerator(seed).report(SIZES[size])
+        megabytes = len(content.encode("utf-8")) / 1e6
+        blocks = sum(1 for _ in uploader.iter_notion_blocks(content))
+        print(f"\n📄 {size}: {len(content.split())} words, {megabytes * 1000:.0f} KB, {blocks} blocks")
+
+        results[size] = {}
+        for stage, (func, input_bytes) in build_stages(uploader, content).items():
+            seconds, items = _time_best(func, repeat)
+            entry = {
+                "seconds": round(seconds, 6),
+                "items": items,
+                "unit": STAGE_UNITS.get(stage, "items"),
+                "items_per_s": round(items / seconds, 1) if seconds else 0.0,
+                "input_bytes": input_bytes,
+                "mb_per_s": round(input_bytes / 1e6 / seconds, 3) if seconds else 0.0,
+            }
+            if memory:
+                entry["peak_kb"] = round(_peak_memory(func) / 1024, 1)
+            results[size][stage] = entry
+            peak = f", peak {entry['peak_kb']:.0f} KB" if memory else ""
+            rate = f"{entry['items_per_s']:,.0f} {entry['unit']}/s"
+            print(f"   {stage:<11} {seconds * 1000:8.2f} ms  {rate:>18}  "
+                  f"{entry['mb_per_s']:7.2f} MB/s{peak}")
+
+    return results
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Print throughput changes vs a baseline and list regressions
+
+    Args:
+        results: Output of run_benchmarks
+        baseline: Previously saved results ("results" key of a baseline file)
+        max_regression: Allowed drop in MB/s, as a fraction
+
+    Returns:
+        "size/stage" names that regressed by more than max_regression
+    """
+    regressions = []
+    skipped = []
+    print("\n📊 Compared to baseline (MB/s):")
+    for size, stages in results.items():
+        for stage, entry in stages.items():
+            before = baseline.get(size, {}).get(stage)
+            if not before or not before.get("mb_per_s"):
+                continue
+            if before.get("input_bytes") != entry["input_bytes"]:
+                skipped.append(f"{size}/{stage}")  # different input (or an older baseline format)
+                continue
+            change = entry["mb_per_s"] / before["mb_per_s"] - 1
+            flag = ""
+            if change < -max_regression:
+                flag = "  ⚠️ regression"
+                regressions.append(f"{size}/{stage}")
+            print(f"   {size:<5} {stage:<11} {before['mb_per_s']:7.2f} → {entry['mb_per_s']:7.2f} "
+                  f"({change:+.1%}){flag}")
+    if skipped:
+        print(f"   Not compared (baseline measured different input; re-save it): {', '.join(skipped)}")
+    return regressions
+
+
+def load_baseline(path: Path) -> Optional[Dict]:
+    """Read a saved baseline file, or None if it doesn't exist"""
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(path: Path, results: Dict, seed: int) -> None:
+    """Write results plus enough context to judge whether they're comparable"""
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "results": results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark markdown-to-Notion conversion on synthetic reports"
+    )
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(DEFAULT_SIZES),
+                        help=f"Report sizes to benchmark (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed runs per stage; fastest is reported (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help=f"Report generator seed (default: {DEFAULT_SEED})")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the tracemalloc peak-memory runs")
+    parser.add_argument("--baseline", type=Path,
+                        help="Compare against a saved baseline JSON file")
+    parser.add_argument("--save-baseline", type=Path,
+                        help="Write results to this baseline JSON file")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="Exit non-zero if MB/s drops by more than this fraction vs --baseline "
+                             f"(default: {DEFAULT_MAX_REGRESSION})")
+    parser.add_argument("--write-report", type=Path,
+                        help="Write the generated report for the first --sizes entry here and exit")
+
+    args = parser.parse_args()
+
+    if args.write_report:
+        content = ReportGenerator(args.seed).report(SIZES[args.sizes[0]])
+        args.write_report.write_text(content, encoding="utf-8")
+        print(f"✅ Wrote {args.sizes[0]} report ({len(content.split())} words) to {args.write_report}")
+        return
+
+    print(f"⏱️ Benchmarking conversion (best of {args.repeat}, seed {args.seed})")
+    results = run_benchmarks(args.sizes, repeat=args.repeat, seed=args.seed,
+                             memory=not args.no_memory)
+
+    regressions = []
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        if baseline is None:
+            print(f"\n⚠️ Baseline not found: {args.baseline}")
+        else:
+            regressions = compare_to_baseline(results, baseline, args.max_regression)
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, args.seed)
+        print(f"\n💾 Baseline saved to {args.save_baseline}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} stage(s) regressed more than {args.max_regression:.0%}: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
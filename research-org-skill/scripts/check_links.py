@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+check_links.py - Check that a report's citation links resolve before upload
+
+Extracts every link URL from the converted report (markdown links and
+<a href> in HTML tables, exactly what the upload sends to Notion) and
+checks them concurrently: HEAD first, GET when a site rejects HEAD, with
+at most a few requests in flight per host. Results are cached in SQLite
+with a TTL, so sources cited across many reports (Crunchbase, TechCrunch,
+press releases) are only checked once.
+
+Usage:
+    python check_links.py /tmp/research-report-acme.md
+    python check_links.py report-a.md report-b.ndjson --per-host 2 --timeout 10
+    python check_links.py report.md --refresh --json
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from upload_to_notion import BUNDLE_SUFFIX, BlockBundle, NotionUploader, requests
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / "link_cache.sqlite"  # next to config.json
+DEFAULT_WORKERS = 16
+DEFAULT_PER_HOST = 2  # requests in flight per host
+DEFAULT_TIMEOUT = 10.0  # seconds to connect, and between bytes of the response
+DEFAULT_TTL_DAYS = 7.0
+UNVERIFIED_TTL = 3600  # seconds before blocked, rate limited or unreachable links are checked again
+BROKEN_STATUSES = (404, 410)
+USER_AGENT = "Mozilla/5.0 (compatible; research-org-skill link check)"  # some sites refuse library UAs
+
+# Link states: ok (< 400), broken (404/410 or a malformed URL) or unverified
+# (401/403/429/5xx, timeouts, connection failures: the site may be fine but
+# blocks checks or was unreachable just now, so the result is re-checked soon)
+OK, BROKEN, UNVERIFIED = "ok", "broken", "unverified"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    status INTEGER,
+    final_url TEXT,
+    error TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+def _rich_text_urls(rich_text: Iterable) -> Iterator[str]:
+    for run in rich_text:
+        if isinstance(run, dict):
+            url = (run.get("text", {}).get("link") or {}).get("url")
+        else:
+            url = run.url
+        if url:
+            yield url
+
+
+def _block_urls(block) -> Iterator[str]:
+    """Link URLs in one block model or Notion block dict, table rows included"""
+    if isinstance(block, dict):
+        body = block.get(block.get("type"), {})
+        yield from _rich_text_urls(body.get("rich_text", ()))
+        for cell in body.get("cells", ()):
+            yield from _rich_text_urls(cell)
+        for child in body.get("children", ()):
+            yield from _block_urls(child)
+    elif block.block_type == "table":
+        for row in block.rows:
+            for cell in row.cells:
+                yield from _rich_text_urls(cell)
+    else:
+        yield from _rich_text_urls(getattr(block, "rich_text", ()))
+
+
+def extract_links(content: Union[str, BlockBundle]) -> List[str]:
+    """Link URLs in a report, in order of first appearance, without duplicates
+
+    Args:
+        content: Markdown report, or a compiled block bundle
+
+    Returns:
+        List of URLs
+    """
+    if isinstance(content, str):
+        blocks = NotionUploader(None, None, verbose=False).iter_notion_blocks(content)
+    else:
+        blocks = iter(content)  # a bundle yields Notion block dicts
+    seen = {}
+    for block in blocks:
+        for url in _block_urls(block):
+            seen.setdefault(url, None)
+    return list(seen)
+
+
+def _interleave_hosts(urls: Iterable[str]) -> List[str]:
+    """Order URLs round-robin by host, so per-host limits rarely stall a worker"""
+    by_host = defaultdict(deque)
+    for url in urls:
+        by_host[urlsplit(url).hostname].append(url)
+    ordered = []
+    queues = deque(by_host.values())
+    while queues:
+        queue = queues.popleft()
+        ordered.append(queue.popleft())
+        if queue:
+            queues.append(queue)
+    return ordered
+
+
+class LinkCache:
+    """SQLite cache of link check results, keyed by URL"""
+
+    def __init__(self, path: Path):
+        """Open (and create, if needed) the cache
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def get(self, urls: List[str], ttl: float) -> Dict[str, Dict]:
+        """Cached results that are still fresh
+
+        Args:
+            urls: URLs to look up
+            ttl: Seconds an ok or broken result stays valid (unverified
+                results expire after at most UNVERIFIED_TTL)
+
+        Returns:
+            {url: result} for the URLs with a fresh result
+        """
+        now = time.time()
+        found = {}
+        for start in range(0, len(urls), 500):  # stay under SQLite's bound-parameter limit
+            chunk = urls[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT * FROM links WHERE url IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for row in rows:
+                max_age = min(ttl, UNVERIFIED_TTL) if row["state"] == UNVERIFIED else ttl
+                if now - row["checked_at"] < max_age:
+                    found[row["url"]] = dict(row, cached=True)
+        return found
+
+    def put(self, results: Iterable[Dict]) -> None:
+        """Store (or replace) check results"""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO links (url, state, status, final_url, error, checked_at) "
+                "VALUES (:url, :state, :status, :final_url, :error, :checked_at)",
+                list(results)
+            )
+
+
+class LinkChecker:
+    """Concurrent HTTP link checker with a per-host request limit"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """Initialize checker (one pooled session shared by all workers)
+
+        Args:
+            workers: Links checked at the same time
+            per_host: Links checked at the same time on any one host
+            timeout: Seconds to connect, and to wait between bytes of a response
+        """
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max(workers, 10), pool_maxsize=per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _slot(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _request(self, method: str, url: str) -> Tuple[Optional["requests.Response"], Optional[str], str]:
+        """Send one request without reading the body
+
+        Returns:
+            (response or None, error message or None, state if it failed)
+
+        Raises:
+            requests.Timeout if the server doesn't answer in time
+        """
+        try:
+            response = self.session.request(method, url, allow_redirects=True, timeout=self.timeout,
+                                            stream=True)
+            response.close()
+            return response, None, ""
+        except requests.Timeout:
+            raise
+        except (requests.exceptions.InvalidURL, requests.exceptions.InvalidSchema,
+                requests.exceptions.MissingSchema) as e:
+            return None, f"invalid URL: {str(e)}", BROKEN
+        except requests.ConnectionError as e:  # DNS failure, refused or reset connection, TLS error
+            return None, f"connection failed: {type(e).__name__}", UNVERIFIED
+        except requests.TooManyRedirects:
+            return None, "redirect loop", UNVERIFIED
+        except requests.RequestException as e:
+            return None, f"{type(e).__name__}: {str(e)}", UNVERIFIED
+
+    def check(self, url: str) -> Dict:
+        """Check one URL: HEAD, then GET if HEAD fails or is refused
+
+        Returns:
+            {url, state, status, final_url, error, checked_at} dict
+        """
+        result = {"url": url, "state": BROKEN, "status": None, "final_url": None, "error": None,
+                  "checked_at": time.time()}
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            result["error"] = "not an http(s) URL"
+            return result
+
+        with self._slot(parts.hostname):
+            try:
+                response, error, state = self._request("HEAD", url)
+                # Many servers answer HEAD with 403/404/405 (or drop it) but serve GET fine
+                if response is None or response.status_code >= 400:
+                    response, error, state = self._request("GET", url)
+            except requests.Timeout:  # a server too slow for HEAD is rarely faster with GET
+                response, error, state = None, f"timed out after {self.timeout:g}s", UNVERIFIED
+
+        result["checked_at"] = time.time()
+        if response is None:
+            result.update(state=state, error=error)
+            return result
+        status = response.status_code
+        result["status"] = status
+        result["final_url"] = response.url if response.url != url else None
+        if status < 400:
+            result["state"] = OK
+        elif status in BROKEN_STATUSES:
+            result["state"] = BROKEN
+        else:
+            result["state"] = UNVERIFIED
+        return result
+
+
+def check_links(urls: List[str], checker: LinkChecker, cache: Optional[LinkCache] = None,
+                ttl: float = DEFAULT_TTL_DAYS * 86400, refresh: bool = False) -> Tuple[Dict[str, Dict], Dict]:
+    """Check URLs, using cached results that are still fresh
+
+    mailto: links are skipped. Fresh results are written to the cache as
+    they arrive, so an interrupted run keeps what it checked.
+
+    Args:
+        urls: URLs to check (duplicates are checked once)
+        checker: Link checker
+        cache: Result cache (default: none)
+        ttl: Seconds a cached ok or broken result stays valid
+        refresh: Ignore cached results (new results are still cached)
+
+    Returns:
+        ({url: result}, stats dict with checked, cached, skipped and seconds)
+    """
+    start = time.monotonic()
+    urls = list(dict.fromkeys(urls))
+    to_check = [url for url in urls if not url.lower().startswith("mailto:")]
+    stats = {"checked": 0, "cached": 0, "skipped": len(urls) - len(to_check), "seconds": 0.0}
+
+    results = {} if cache is None or refresh else cache.get(to_check, ttl)
+    stats["cached"] = len(results)
+    pending = _interleave_hosts(url for url in to_check if url not in results)
+    if pending:
+        with ThreadPoolExecutor(max_workers=checker.workers) as pool:
+            futures = [pool.submit(checker.check, url) for url in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result["url"]] = dict(result, cached=False)
+                if cache is not None:
+                    cache.put([result])
+        stats["checked"] = len(pending)
+    stats["seconds"] = time.monotonic() - start
+    return results, stats
+
+
+def _describe(result: Dict) -> str:
+    detail = str(result["status"]) if result["status"] else result["error"]
+    if result["status"] and result["error"]:
+        detail += f", {result['error']}"
+    return f"{detail}: {result['url']}"
+
+
+def check_reports(reports: Dict[str, Union[str, BlockBundle]], cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+                  workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                  timeout: float = DEFAULT_TIMEOUT, ttl: float = DEFAULT_TTL_DAYS * 86400,
+                  refresh: bool = False, log=print) -> Dict[str, List[Dict]]:
+    """Check the links of several reports in one pass and print what's wrong
+
+    Links shared between reports are checked once.
+
+    Args:
+        reports: {name: markdown content or bundle}
+        cache_path: Result cache file (None: no cache)
+        workers: Links checked at the same time
+        per_host: Links checked at the same time on any one host
+        timeout: Request timeout in seconds
+        ttl: Seconds a cached result stays valid
+        refresh: Ignore cached results
+        log: Progress output function
+
+    Returns:
+        {name: list of result dicts} of each report's broken and unverified links
+    """
+    links = {name: extract_links(content) for name, content in reports.items()}
+    all_urls = [url for urls in links.values() for url in urls]
+
+    cache = LinkCache(cache_path) if cache_path else None
+    checker = LinkChecker(workers, per_host, timeout)
+    try:
+        results, stats = check_links(all_urls, checker, cache, ttl=ttl, refresh=refresh)
+    finally:
+        checker.close()
+        if cache is not None:
+            cache.close()
+
+    log(f"\n🔗 {len(results)} unique links in {len(reports)} report(s): {stats['cached']} cached, "
+        f"{stats['checked']} checked in {stats['seconds']:.1f}s"
+        + (f", {stats['skipped']} mailto skipped" if stats["skipped"] else ""))
+    problems = {}
+    for name, urls in links.items():
+        bad = [results[url] for url in urls if url in results and results[url]["state"] != OK]
+        problems[name] = bad
+        if not bad:
+            continue
+        log(f"  {name}:")
+        for result in bad:
+            log(f"    {'✗' if result['state'] == BROKEN else '⚠️'} {_describe(result)}")
+
+    states = defaultdict(int)
+    for result in results.values():
+        states[result["state"]] += 1
+    log(f"📊 {states[OK]} ok, {states[BROKEN]} broken, {states[UNVERIFIED]} unverified "
+        f"(blocked, rate limited or unreachable; check by hand)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that a report's citation links resolve",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exit status is 1 if any link is broken (404/410 or a malformed URL). Unverified
+links (401/403/429/5xx, timeouts, connection failures) are listed but don't
+fail the check, and are checked again after an hour.
+
+Examples:
+  python check_links.py /tmp/research-report-acme.md
+  python check_links.py reports/*.md --workers 32 --per-host 2
+  python check_links.py report.ndjson --refresh
+  python check_links.py report.md --json
+        """
+    )
+    parser.add_argument("content", nargs="+", help=f"Markdown reports or compiled {BUNDLE_SUFFIX} bundles")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Links checked at the same time (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help=f"Links checked at the same time per host (default: {DEFAULT_PER_HOST})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Seconds to connect and between response bytes (default: {DEFAULT_TIMEOUT:g})")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_PATH),
+                        help=f"Result cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the result cache")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL_DAYS,
+                        help=f"Days a cached result stays valid (default: {DEFAULT_TTL_DAYS:g})")
+    parser.add_argument("--refresh", action="store_true", help="Check every link again, ignoring the cache")
+    parser.add_argument("--json", action="store_true", help="Print each report's problem links as JSON")
+
+    args = parser.parse_args()
+    if args.workers < 1 or args.per_host < 1:
+        parser.error("--workers and --per-host must be at least 1")
+    if args.timeout <= 0 or args.ttl < 0:
+        parser.error("--timeout must be positive and --ttl not negative")
+
+    reports = {}
+    for name in args.content:
+        path = Path(name)
+        try:
+            reports[name] = BlockBundle(path) if path.suffix == BUNDLE_SUFFIX else path.read_text(encoding="utf-8")
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Could not read {name}: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
+    problems = check_reports(reports, cache_path=None if args.no_cache else Path(args.cache),
+                             workers=args.workers, per_host=args.per_host, timeout=args.timeout,
+                             ttl=args.ttl * 86400, refresh=args.refresh,
+                             log=(lambda *a, **k: None) if args.json else print)
+    if args.json:
+        print(json.dumps(problems, indent=2))
+    broken = any(result["state"] == BROKEN for bad in problems.values() for result in bad)
+    sys.exit(1 if broken else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,863 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Notion API endpoints used by upload_to_notion.py
+
+Keeps pages and blocks in memory and enforces the request limits the
+real API applies (100 children per append, 1000 block elements, 500 KB
+bodies, 2000-character text segments), so uploads, clears, syncs and
+retries can be exercised end to end without touching api.notion.com.
+Latency, 429 rate limiting and random server errors can be injected to
+load-test the retry and concurrency logic.
+
+Endpoints:
+    GET    /v1/blocks/{id}/children   (paginated, page_size <= 100)
+    PATCH  /v1/blocks/{id}/children   (append, optional "after")
+    PATCH  /v1/blocks/{id}            (update block content)
+    DELETE /v1/blocks/{id}            (archive block)
+    POST   /v1/pages                  (child page of a page; adds a child_page block)
+    PATCH  /v1/pages/{id}             (icon, properties, archived)
+    POST   /v1/databases/{id}/query   (paginated; last_edited_time filter and sort)
+
+Link targets for check_links.py (no auth; faults apply too):
+    GET/HEAD /links/{status}          (answers with that status; ?head={status}
+                                       overrides it for HEAD, ?to={path} sets
+                                       the Location of a 3xx)
+
+Pages are created on first use, so any page ID works. Database entries
+are seeded with serve --database/--database-entries or add_database_page().
+
+Usage:
+    # Run a server and point the uploader at it
+    python3 notion_mock_server.py serve --port 8765 --latency 0.05 --rate-limit 3
+    python3 upload_to_notion.py --api-url http://127.0.0.1:8765/v1 --page-id test --content report.md ...
+
+    # Upload generated reports through an in-process server and report timings
+    python3 notion_mock_server.py load --reports 20 --size full --workers 4 --error-rate 0.02
+"""
+
+import argparse
+import json
+import random
+import re
+import signal
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_CHILDREN = 100  # children per append request, and rows per nested table
+MAX_ELEMENTS = 1000  # blocks per request, nested children included
+MAX_BODY_BYTES = 500_000  # request body limit
+MAX_TEXT_LENGTH = 2000  # text.content per rich text segment
+MAX_RICH_TEXT = 100  # rich text segments per block
+MAX_PAGE_SIZE = 100
+INJECTED_ERRORS = (  # (status, code) drawn from by --error-rate
+    (409, "conflict_error"),
+    (500, "internal_server_error"),
+    (502, "bad_gateway"),
+    (503, "service_unavailable"),
+)
+ANNOTATION_DEFAULTS = {
+    "bold": False, "italic": False, "strikethrough": False,
+    "underline": False, "code": False, "color": "default"
+}
+
+CHILDREN_PATH_RE = re.compile(r'^/v1/blocks/([^/]+)/children$')
+BLOCK_PATH_RE = re.compile(r'^/v1/blocks/([^/]+)$')
+PAGE_PATH_RE = re.compile(r'^/v1/pages/([^/]+)$')
+PAGES_PATH = "/v1/pages"
+QUERY_PATH_RE = re.compile(r'^/v1/databases/([^/]+)/query$')
+LINK_PATH_RE = re.compile(r'^/links/(\d{3})$')
+ID_SEGMENT_RE = re.compile(r'/(blocks|pages|databases)/[^/]+')  # collapses IDs for per-endpoint counts
+
+
+def _collapse_id(match: re.Match) -> str:
+    return f"/{match.group(1)}/{{id}}"
+
+
+class NotionError(Exception):
+    """API error response (status, Notion error code, message)"""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+    def to_json(self) -> Dict:
+        return {"object": "error", "status": self.status, "code": self.code, "message": self.message}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _expand_rich_text(segment: Dict) -> Dict:
+    """Add the fields the API returns on every rich text segment"""
+    text = dict(segment.get("text") or {})
+    text.setdefault("link", None)
+    return {
+        "type": "text",
+        "text": text,
+        "annotations": dict(ANNOTATION_DEFAULTS, **(segment.get("annotations") or {})),
+        "plain_text": text.get("content", ""),
+        "href": (text.get("link") or {}).get("url")
+    }
+
+
+def _expand_body(body: Dict) -> Dict:
+    """Expand rich text inside a block body (rich_text lists and table cells)"""
+    expanded = dict(body)
+    if "rich_text" in body:
+        expanded["rich_text"] = [_expand_rich_text(s) for s in body["rich_text"]]
+    if "cells" in body:
+        expanded["cells"] = [[_expand_rich_text(s) for s in cell] for cell in body["cells"]]
+    return expanded
+
+
+def _expand_properties(properties: Dict) -> Dict:
+    """Expand outgoing page property values into the API's response shape"""
+    expanded = {}
+    for name, value in properties.items():
+        prop_type = next(iter(value), None) if isinstance(value, dict) else None
+        if prop_type is None:
+            raise NotionError(400, "validation_error",
+                              f"body failed validation: body.properties.{name} should be an object.")
+        prop_value = value[prop_type]
+        if prop_type in ("title", "rich_text"):
+            prop_value = [_expand_rich_text(s) for s in prop_value]
+        expanded[name] = {"id": "title" if prop_type == "title" else name.lower(),
+                          "type": prop_type, prop_type: prop_value}
+    return expanded
+
+
+def _timestamp_matches(value: str, condition: Dict) -> bool:
+    """Check a timestamp filter condition (ISO 8601 strings compare in order)"""
+    value = value[:19]
+    for operator, test in (("on_or_after", lambda a, b: a >= b), ("after", lambda a, b: a > b),
+                           ("on_or_before", lambda a, b: a <= b), ("before", lambda a, b: a < b)):
+        if operator in condition and not test(value, condition[operator][:19]):
+            return False
+    return True
+
+
+def _validate_rich_text(segments: List, path: str) -> None:
+    if len(segments) > MAX_RICH_TEXT:
+        raise NotionError(400, "validation_error",
+                          f"body failed validation: {path}.length should be ≤ `{MAX_RICH_TEXT}`, "
+                          f"instead was `{len(segments)}`.")
+    for k, segment in enumerate(segments):
+        content = (segment.get("text") or {}).get("content", "")
+        if len(content) > MAX_TEXT_LENGTH:
+            raise NotionError(400, "validation_error",
+                              f"body failed validation: {path}[{k}].text.content.length should be "
+                              f"≤ `{MAX_TEXT_LENGTH}`, instead was `{len(content)}`.")
+        link = ((segment.get("text") or {}).get("link") or {}).get("url")
+        if link is not None:
+            parsed = urlparse(link)
+            if not (parsed.scheme in ("http", "https") and parsed.netloc) and parsed.scheme != "mailto":
+                raise NotionError(400, "validation_error", f"Invalid URL for link. ({path}[{k}].text.link.url)")
+
+
+def _validate_block(block: Dict, path: str) -> int:
+    """Check one outgoing block; returns its element count (nested included)"""
+    block_type = block.get("type")
+    body = block.get(block_type) if block_type else None
+    if not isinstance(body, dict):
+        raise NotionError(400, "validation_error", f"body failed validation: {path}.type is invalid.")
+    _validate_rich_text(body.get("rich_text", []), f"{path}.{block_type}.rich_text")
+    for c, cell in enumerate(body.get("cells", [])):
+        _validate_rich_text(cell, f"{path}.{block_type}.cells[{c}]")
+
+    nested = body.get("children", [])
+    if len(nested) > MAX_CHILDREN:
+        raise NotionError(400, "validation_error",
+                          f"body failed validation: {path}.{block_type}.children.length should be "
+                          f"≤ `{MAX_CHILDREN}`, instead was `{len(nested)}`.")
+    if block_type == "table":
+        width = body.get("table_width", 0)
+        for r, row in enumerate(nested):
+            cells = (row.get("table_row") or {}).get("cells", [])
+            if len(cells) != width:
+                raise NotionError(400, "validation_error",
+                                  f"Number of cells in table row must match the table width of the "
+                                  f"parent. ({path}.table.children[{r}])")
+    return 1 + sum(_validate_block(child, f"{path}.{block_type}.children[{i}]")
+                   for i, child in enumerate(nested))
+
+
+class MockNotion:
+    """In-memory page and block store with Notion's validation rules"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.blocks: Dict[str, Dict] = {}  # block ID -> API-shaped block (without children)
+        self.children: Dict[str, List[str]] = {}  # parent ID -> ordered child IDs
+        self.parents: Dict[str, str] = {}  # block ID -> parent ID
+        self.pages: Dict[str, Dict] = {}  # page ID -> page properties (icon)
+        self.databases: Dict[str, List[str]] = {}  # database ID -> page IDs, in creation order
+        self.reject_table_rows = False  # answer row appends to existing tables with 400
+
+    def _parent_children(self, parent_id: str) -> List[str]:
+        if parent_id not in self.children:
+            if parent_id in self.blocks:
+                raise NotionError(400, "validation_error",
+                                  f"Block {parent_id} does not support children.")
+            self.pages.setdefault(parent_id, {"id": parent_id, "object": "page", "icon": None})
+            self.children[parent_id] = []
+        return self.children[parent_id]
+
+    def _store(self, block: Dict, parent_id: str) -> Dict:
+        """Store a validated outgoing block (and its nested children)"""
+        block_type = block["type"]
+        body = dict(block[block_type])
+        nested = body.pop("children", [])
+        block_id = str(uuid.uuid4())
+        stored = {
+            "object": "block",
+            "id": block_id,
+            "parent": {"type": "block_id", "block_id": parent_id},
+            "created_time": _now(),
+            "last_edited_time": _now(),
+            "has_children": bool(nested),
+            "archived": False,
+            "type": block_type,
+            block_type: _expand_body(body)
+        }
+        self.blocks[block_id] = stored
+        self.parents[block_id] = parent_id
+        if nested or block_type in ("table", "toggle", "column_list"):
+            self.children[block_id] = [self._store(child, block_id)["id"] for child in nested]
+        return stored
+
+    def list_children(self, parent_id: str, start_cursor: Optional[str] = None,
+                      page_size: int = MAX_PAGE_SIZE) -> Dict:
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise NotionError(400, "validation_error",
+                              f"body failed validation: page_size should be ≤ `{MAX_PAGE_SIZE}`.")
+        with self._lock:
+            child_ids = self._parent_children(parent_id)
+            start = 0
+            if start_cursor:
+                try:
+                    start = child_ids.index(start_cursor)
+                except ValueError:
+                    raise NotionError(400, "validation_error", "start_cursor is invalid.")
+            page_ids = child_ids[start:start + page_size]
+            has_more = start + page_size < len(child_ids)
+            return {
+                "object": "list",
+                "results": [self.blocks[block_id] for block_id in page_ids],
+                "next_cursor": child_ids[start + page_size] if has_more else None,
+                "has_more": has_more,
+                "type": "block",
+                "block": {}
+            }
+
+    def append_children(self, parent_id: str, body: Dict) -> Dict:
+        children = body.get("children")
+        if not isinstance(children, list):
+            raise NotionError(400, "validation_error", "body failed validation: body.children should be an array.")
+        if len(children) > MAX_CHILDREN:
+            raise NotionError(400, "validation_error",
+                              f"body failed validation: body.children.length should be ≤ `{MAX_CHILDREN}`, "
+                              f"instead was `{len(children)}`.")
+        elements = sum(_validate_block(child, f"body.children[{i}]") for i, child in enumerate(children))
+        if elements > MAX_ELEMENTS:
+            raise NotionError(400, "validation_error",
+                              f"Request exceeds the limit of {MAX_ELEMENTS} block elements "
+                              f"(had {elements}).")
+
+        with self._lock:
+            if self.reject_table_rows and self.blocks.get(parent_id, {}).get("type") == "table":
+                raise NotionError(400, "validation_error", "Injected failure: table rows rejected.")
+            child_ids = self._parent_children(parent_id)
+            position = len(child_ids)
+            after = body.get("after")
+            if after:
+                if after not in child_ids:
+                    raise NotionError(400, "validation_error",
+                                      f"Block {after} is not a child of {parent_id}.")
+                position = child_ids.index(after) + 1
+            created = [self._store(child, parent_id) for child in children]
+            child_ids[position:position] = [block["id"] for block in created]
+            if parent_id in self.blocks:
+                self.blocks[parent_id]["has_children"] = bool(child_ids)
+            return {"object": "list", "results": created, "next_cursor": None, "has_more": False,
+                    "type": "block", "block": {}}
+
+    def update_block(self, block_id: str, body: Dict) -> Dict:
+        with self._lock:
+            block = self.blocks.get(block_id)
+            if block is None:
+                raise NotionError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+            if block["archived"]:
+                raise NotionError(400, "validation_error", "Can't edit block that is archived.")
+            block_type = block["type"]
+            if block_type not in body:
+                raise NotionError(400, "validation_error",
+                                  f"body failed validation: body.{block_type} should be defined.")
+            _validate_rich_text(body[block_type].get("rich_text", []), f"body.{block_type}.rich_text")
+            block[block_type].update(_expand_body(body[block_type]))
+            block["last_edited_time"] = _now()
+            return block
+
+    def delete_block(self, block_id: str) -> Dict:
+        with self._lock:
+            block = self.blocks.get(block_id)
+            if block is None:
+                raise NotionError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+            if block["archived"]:
+                raise NotionError(400, "validation_error", "Can't edit block that is archived.")
+            block["archived"] = True
+            if block_id in self.pages:  # deleting a child_page block archives the page
+                self.pages[block_id]["archived"] = True
+            siblings = self.children.get(self.parents[block_id], [])
+            if block_id in siblings:
+                siblings.remove(block_id)
+            return block
+
+    def create_page(self, body: Dict) -> Dict:
+        """Create a page under a parent page, as the last child_page block of the parent"""
+        parent_id = (body.get("parent") or {}).get("page_id")
+        if not parent_id:
+            raise NotionError(400, "validation_error",
+                              "body failed validation: body.parent.page_id should be defined "
+                              "(the mock only creates pages under pages).")
+        properties = body.get("properties") or {}
+        if set(properties) - {"title"}:
+            raise NotionError(400, "validation_error",
+                              "body failed validation: pages under a page only have a title property.")
+        title = (properties.get("title") or {}).get("title", [])
+        _validate_rich_text(title, "body.properties.title.title")
+        if "children" in body:
+            raise NotionError(400, "validation_error", "Mock doesn't support children when creating pages.")
+
+        with self._lock:
+            siblings = self._parent_children(parent_id)
+            page_id = str(uuid.uuid4())
+            page = {
+                "object": "page",
+                "id": page_id,
+                "created_time": _now(),
+                "last_edited_time": _now(),
+                "parent": {"type": "page_id", "page_id": parent_id},
+                "archived": False,
+                "icon": body.get("icon"),
+                "properties": _expand_properties(properties),
+                "url": f"https://www.notion.so/{page_id.replace('-', '')}"
+            }
+            self.pages[page_id] = page
+            self.children[page_id] = []
+            # The page also shows up in its parent's content, as a child_page block with the same ID
+            self.blocks[page_id] = {
+                "object": "block",
+                "id": page_id,
+                "parent": {"type": "page_id", "page_id": parent_id},
+                "created_time": page["created_time"],
+                "last_edited_time": page["last_edited_time"],
+                "has_children": False,
+                "archived": False,
+                "type": "child_page",
+                "child_page": {"title": "".join((s.get("text") or {}).get("content", "") for s in title)}
+            }
+            self.parents[page_id] = parent_id
+            siblings.append(page_id)
+            return page
+
+    def update_page(self, page_id: str, body: Dict) -> Dict:
+        with self._lock:
+            page = self.pages.setdefault(page_id, {"id": page_id, "object": "page", "icon": None})
+            self.children.setdefault(page_id, [])
+            if "icon" in body:
+                page["icon"] = body["icon"]
+            if "properties" in body:
+                page.setdefault("properties", {}).update(_expand_properties(body["properties"]))
+            if "archived" in body:
+                page["archived"] = bool(body["archived"])
+            page["last_edited_time"] = _now()
+            return page
+
+    def add_database_page(self, database_id: str, properties: Dict) -> Dict:
+        """Create a page (database entry) with outgoing-format properties"""
+        expanded = _expand_properties(properties)
+        with self._lock:
+            page_id = str(uuid.uuid4())
+            page = {
+                "object": "page",
+                "id": page_id,
+                "created_time": _now(),
+                "last_edited_time": _now(),
+                "parent": {"type": "database_id", "database_id": database_id},
+                "archived": False,
+                "icon": None,
+                "properties": expanded
+            }
+            self.pages[page_id] = page
+            self.children[page_id] = []
+            self.databases.setdefault(database_id, []).append(page_id)
+            return page
+
+    def query_database(self, database_id: str, body: Dict) -> Dict:
+        page_size = body.get("page_size", MAX_PAGE_SIZE)
+        if not isinstance(page_size, int) or not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise NotionError(400, "validation_error",
+                              f"body failed validation: body.page_size should be ≤ `{MAX_PAGE_SIZE}`.")
+        condition = None
+        query_filter = body.get("filter")
+        if query_filter:
+            timestamp = query_filter.get("timestamp")
+            if timestamp not in ("last_edited_time", "created_time") or timestamp not in query_filter:
+                raise NotionError(400, "validation_error",
+                                  "Mock only supports created_time/last_edited_time timestamp filters.")
+            condition = (timestamp, query_filter[timestamp])
+
+        with self._lock:
+            if database_id not in self.databases:
+                raise NotionError(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+            pages = [self.pages[page_id] for page_id in self.databases[database_id]]
+            pages = [page for page in pages if not page["archived"]]
+            if condition:
+                pages = [page for page in pages if _timestamp_matches(page[condition[0]], condition[1])]
+            for sort in reversed(body.get("sorts") or []):
+                if sort.get("timestamp") not in ("last_edited_time", "created_time"):
+                    raise NotionError(400, "validation_error", "Mock only supports timestamp sorts.")
+                pages.sort(key=lambda page: page[sort["timestamp"]],
+                           reverse=sort.get("direction") == "descending")
+
+            start = 0
+            start_cursor = body.get("start_cursor")
+            if start_cursor:
+                ids = [page["id"] for page in pages]
+                if start_cursor not in ids:
+                    raise NotionError(400, "validation_error", "start_cursor is invalid.")
+                start = ids.index(start_cursor)
+            has_more = start + page_size < len(pages)
+            return {
+                "object": "list",
+                "results": pages[start:start + page_size],
+                "next_cursor": pages[start + page_size]["id"] if has_more else None,
+                "has_more": has_more,
+                "type": "page_or_database",
+                "page_or_database": {}
+            }
+
+    def page_blocks(self, page_id: str) -> List[Dict]:
+        """Current top-level blocks of a page, in order"""
+        with self._lock:
+            return [self.blocks[block_id] for block_id in self.children.get(page_id, [])]
+
+
+class FaultInjector:
+    """Server-side latency, rate limiting and random errors"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit: float = 0.0,
+                 burst: Optional[float] = None, error_rate: float = 0.0, seed: Optional[int] = None):
+        """Initialize fault settings (all off by default)
+
+        Args:
+            latency: Seconds added to every response
+            jitter: Extra random latency, uniform in [0, jitter] seconds
+            rate_limit: Requests/second before answering 429 (0 = unlimited)
+            burst: Token bucket size for rate_limit (default: rate_limit)
+            error_rate: Fraction of requests answered with a random 409/5xx
+            seed: Random seed for jitter and error injection
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.capacity = burst or max(rate_limit, 1.0)
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.throttled = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def check(self) -> Optional[Tuple[NotionError, Dict[str, str]]]:
+        """Apply latency and decide whether to fail this request
+
+        Returns:
+            (error, extra headers) to send instead of handling the request, or None
+        """
+        with self._lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            inject_error = self.error_rate and self.rng.random() < self.error_rate
+            status, code = self.rng.choice(INJECTED_ERRORS)
+        if delay:
+            time.sleep(delay)
+
+        if self.rate_limit:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_limit)
+                self.updated = now
+                if self.tokens < 1:
+                    self.throttled += 1
+                    wait = (1 - self.tokens) / self.rate_limit
+                    return (NotionError(429, "rate_limited", "You have been rate limited. Please try again later."),
+                            {"Retry-After": f"{wait:.3f}"})
+                self.tokens -= 1
+
+        if inject_error:
+            with self._lock:
+                self.errors += 1
+            return NotionError(status, code, "Injected failure"), {}
+        return None
+
+
+class MockNotionServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the mock state, faults and request counts"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 faults: Optional[FaultInjector] = None, verbose: bool = False):
+        """Bind the server (call serve_forever() or start() to run it)
+
+        Args:
+            host: Interface to bind
+            port: TCP port (0 picks a free one)
+            faults: Fault injection settings (default: none)
+            verbose: Log every request to stderr
+        """
+        super().__init__((host, port), MockRequestHandler)
+        self.state = MockNotion()
+        self.faults = faults or FaultInjector()
+        self.verbose = verbose
+        self.request_counts: Dict[str, int] = {}
+        self.status_counts: Dict[int, int] = {}
+        self.bytes_received = 0
+        self._stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def record(self, endpoint: str, status: int, body_bytes: int) -> None:
+        with self._stats_lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            self.bytes_received += body_bytes
+
+    def start(self) -> threading.Thread:
+        """Serve on a background daemon thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to MockNotion and serializes responses"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    server: MockNotionServer
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _route(self, method: str, path: str, query: Dict, raw: bytes) -> Dict:
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            raise NotionError(401, "unauthorized", "API token is invalid.")
+        if not self.headers.get("Notion-Version"):
+            raise NotionError(400, "missing_version", "Notion-Version header failed validation.")
+        if len(raw) > MAX_BODY_BYTES:
+            raise NotionError(413, "validation_error",
+                              f"Request body too large ({len(raw)} bytes; limit {MAX_BODY_BYTES}).")
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            raise NotionError(400, "invalid_json", "Error parsing JSON body.")
+
+        state = self.server.state
+        match = CHILDREN_PATH_RE.match(path)
+        if match and method == "GET":
+            page_size = int(query.get("page_size", [MAX_PAGE_SIZE])[0])
+            return state.list_children(match.group(1), query.get("start_cursor", [None])[0], page_size)
+        if match and method == "PATCH":
+            return state.append_children(match.group(1), body)
+        match = BLOCK_PATH_RE.match(path)
+        if match and method == "PATCH":
+            return state.update_block(match.group(1), body)
+        if match and method == "DELETE":
+            return state.delete_block(match.group(1))
+        if path == PAGES_PATH and method == "POST":
+            return state.create_page(body)
+        match = PAGE_PATH_RE.match(path)
+        if match and method == "PATCH":
+            return state.update_page(match.group(1), body)
+        match = QUERY_PATH_RE.match(path)
+        if match and method == "POST":
+            return state.query_database(match.group(1), body)
+        raise NotionError(400, "invalid_request_url", f"Invalid request URL: {method} {path}")
+
+    def _send_link_target(self, method: str, status: int, query: Dict) -> None:
+        """Answer a /links/{status} request, as a web page would a link check"""
+        body = b"" if method == "HEAD" else f"<html><body>{status}</body></html>".encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        if 300 <= status < 400:
+            self.send_header("Location", query.get("to", ["/links/200"])[0])
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str) -> None:
+        url = urlparse(self.path)
+        raw = self._read_body()
+        link = LINK_PATH_RE.match(url.path)
+        if link:
+            query = parse_qs(url.query)
+            status = int(query["head"][0] if method == "HEAD" and "head" in query else link.group(1))
+            injected = self.server.faults.check()
+            if injected:
+                status = injected[0].status
+            self.server.record(f"{method} {url.path}", status, len(raw))
+            if injected:
+                self._send(status, injected[0].to_json(), injected[1])
+            else:
+                self._send_link_target(method, status, query)
+            return
+        endpoint = f"{method} {ID_SEGMENT_RE.sub(_collapse_id, url.path)}"
+
+        injected = self.server.faults.check()
+        if injected:
+            error, headers = injected
+            self.server.record(endpoint, error.status, len(raw))
+            self._send(error.status, error.to_json(), headers)
+            return
+
+        try:
+            payload = self._route(method, url.path, parse_qs(url.query), raw)
+            status = 200
+        except NotionError as e:
+            payload, status = e.to_json(), e.status
+        self.server.record(endpoint, status, len(raw))
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_HEAD(self):
+        self._handle("HEAD")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+def _faults_from_args(args: argparse.Namespace) -> FaultInjector:
+    return FaultInjector(latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit,
+                         burst=args.burst, error_rate=args.error_rate, seed=args.seed)
+
+
+def print_server_stats(server: MockNotionServer, elapsed: float) -> None:
+    """Print request counts per endpoint and injected faults"""
+    total = sum(server.request_counts.values())
+    print(f"\n📊 Server: {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s), "
+          f"{server.bytes_received / 1e6:.2f} MB received")
+    for endpoint, count in sorted(server.request_counts.items()):
+        print(f"   {endpoint:<32} {count:>6}")
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(server.status_counts.items()))
+    print(f"   Responses by status: {statuses}")
+    print(f"   Injected: {server.faults.throttled} × 429, {server.faults.errors} errors")
+
+
+def run_serve(args: argparse.Namespace) -> None:
+    server = MockNotionServer(args.host, args.port, _faults_from_args(args), verbose=args.verbose)
+    if args.database:
+        for i in range(args.database_entries):
+            server.state.add_database_page(args.database, {
+                "Organization": {"title": [{"text": {"content": f"Company {i}"}}]},
+                "URL": {"url": f"https://www.company-{i}.example.com/"}
+            })
+    print(f"🧪 Mock Notion API listening on {server.base_url}")
+    print(f"   Use: python3 upload_to_notion.py --api-url {server.base_url} ...")
+    start = time.monotonic()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # print stats on kill, too
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print_server_stats(server, max(time.monotonic() - start, 1e-9))
+
+
+def _content_types(state: MockNotion, page_id: str) -> List[str]:
+    """Block types of a page in reading order, with child pages read as H1 sections
+
+    Tables include their row count ("table/12"), so missing rows show up.
+    """
+    types = []
+    for block in state.page_blocks(page_id):
+        if block["type"] == "child_page":
+            types.append("heading_1")
+            types.extend(_content_types(state, block["id"]))
+        elif block["type"] == "table":
+            types.append(f"table/{len(state.page_blocks(block['id']))}")
+        else:
+            types.append(block["type"])
+    return types
+
+
+def run_load(args: argparse.Namespace) -> bool:
+    """Upload reports through the mock and report wall time and request counts
+
+    Returns:
+        True if every upload succeeded and every page holds the expected blocks
+    """
+    # Only the load driver needs the uploader (and requests)
+    from bench_conversion import SIZES, ReportGenerator
+    from upload_to_notion import ConversionCache, NotionTransport, NotionUploader, run_batch
+
+    server = MockNotionServer(args.host, 0, _faults_from_args(args))
+    server.start()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="notion-mock-load-"))
+    if args.content:
+        reports = [Path(path) for path in args.content]
+    else:
+        reports = []
+        for i in range(args.reports):
+            path = work_dir / f"report-{i:04d}.md"
+            path.write_text(ReportGenerator(args.seed + i).report(SIZES[args.size]), encoding="utf-8")
+            reports.append(path)
+
+    jobs = [{"page_id": f"load-{i:04d}", "content": path, "company_url": "https://example.com/",
+             "clear": False, "sync": False, "resume": False, "split_pages": args.split_pages}
+            for i, path in enumerate(reports)]
+    transport = NotionTransport("mock", base_url=server.base_url, pool_size=args.pool_size)
+    cache = ConversionCache(Path(args.cache_dir)) if args.cache_dir else None
+
+    print(f"🧪 Load test against {server.base_url}: latency {args.latency * 1000:.0f} ms, "
+          f"rate limit {args.rate_limit or 'off'}, error rate {args.error_rate:.1%}")
+    ok = True
+    start = time.monotonic()
+    for run in range(args.passes):
+        mode = "upload" if run == 0 else args.mode
+        for job in jobs:
+            for flag in ("clear", "sync", "resume"):
+                job[flag] = mode == flag
+        server.state.reject_table_rows = args.fail_table_rows and run == 0
+        print(f"\n▶️ Pass {run + 1}/{args.passes} ({mode})"
+              + (", table row appends rejected" if server.state.reject_table_rows else ""))
+        ok = run_batch(jobs, "mock", workers=args.workers, rate_limit=args.client_rate_limit,
+                       journal_dir=work_dir / "journal", transport=transport,
+                       defer_table_rows=args.defer_table_rows, cache=cache) and ok
+    elapsed = time.monotonic() - start
+
+    print_server_stats(server, elapsed)
+
+    # Each page should now hold exactly the converted report, in order
+    converter = NotionUploader("mock", "check", verbose=False)
+    mismatched = []
+    for job in jobs:
+        expected = [f"table/{len(block.rows)}" if block.block_type == "table" else block.block_type
+                    for block in converter.iter_notion_blocks(Path(job["content"]).read_text(encoding="utf-8"))]
+        actual = _content_types(server.state, job["page_id"])
+        if actual != expected:
+            mismatched.append(job["page_id"])
+    if mismatched:
+        print(f"\n❌ {len(mismatched)}/{len(jobs)} pages don't match their report: {', '.join(mismatched[:10])}")
+    else:
+        print(f"\n✅ All {len(jobs)} pages match their reports")
+
+    server.shutdown()
+    transport.close()
+    return ok and not mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local mock of the Notion API for load and fault-injection testing"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    faults = argparse.ArgumentParser(add_help=False)
+    faults.add_argument("--host", default=DEFAULT_HOST, help=f"Interface to bind (default: {DEFAULT_HOST})")
+    faults.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every response (default: 0)")
+    faults.add_argument("--jitter", type=float, default=0.0,
+                        help="Extra random latency, up to this many seconds (default: 0)")
+    faults.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Requests/second before answering 429 with Retry-After (default: 0, off)")
+    faults.add_argument("--burst", type=float,
+                        help="Requests allowed in a burst under --rate-limit (default: the rate)")
+    faults.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with a random 409/500/502/503 (default: 0)")
+    faults.add_argument("--seed", type=int, default=1234, help="Random seed (default: 1234)")
+
+    serve = subparsers.add_parser("serve", parents=[faults], help="Run the mock API server")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    serve.add_argument("--verbose", action="store_true", help="Log every request")
+    serve.add_argument("--database", help="Database ID to create and seed with entries")
+    serve.add_argument("--database-entries", type=int, default=100,
+                       help="Entries seeded into --database (default: 100)")
+
+    load = subparsers.add_parser("load", parents=[faults],
+                                 help="Upload reports through an in-process mock and report timings")
+    load.add_argument("--content", nargs="+", help="Markdown reports to upload (default: generated)")
+    load.add_argument("--reports", type=int, default=10, help="Reports to generate (default: 10)")
+    load.add_argument("--size", default="full", choices=["lite", "full", "2x", "5x", "10x"],
+                      help="Generated report size (default: full)")
+    load.add_argument("--workers", type=int, default=4, help="Concurrent upload workers (default: 4)")
+    load.add_argument("--client-rate-limit", type=float, default=1000.0,
+                      help="Uploader's own requests/second limit (default: 1000, effectively off)")
+    load.add_argument("--pool-size", type=int, default=32, help="Keep-alive connections (default: 32)")
+    load.add_argument("--passes", type=int, default=1,
+                      help="Upload passes; passes after the first use --mode (default: 1)")
+    load.add_argument("--mode", choices=["clear", "sync", "resume"], default="sync",
+                      help="Re-upload mode for passes after the first (default: sync)")
+    load.add_argument("--fail-table-rows", action="store_true",
+                      help="Reject row appends to existing tables during the first pass "
+                           "(with --defer-table-rows and --mode resume, checks that resume completes them)")
+    load.add_argument("--defer-table-rows", action="store_true",
+                      help="Append table rows after their tables are created")
+    load.add_argument("--cache-dir", help="Conversion cache shared by all passes (default: none)")
+    load.add_argument("--split-pages", action="store_true",
+                      help="Upload each H1 section of a report to its own child page")
+
+    args = parser.parse_args()
+    if args.command == "load" and args.split_pages and args.passes > 1 and args.mode != "clear":
+        parser.error("--split-pages re-upload passes need --mode clear")
+
+    if args.command == "serve":
+        run_serve(args)
+    elif not run_load(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+notion_url_index.py - Local URL → page index of the research database
+
+Keeps a SQLite copy of the research database's entries (normalized
+company URL, page ID, Organization, last_edited_time), so duplicate checks
+and page ID lookups don't have to query Notion every time. Syncs are
+incremental: only entries edited since the newest last_edited_time already
+in the index are fetched.
+
+Usage:
+    python notion_url_index.py sync
+    python notion_url_index.py sync --full
+    python notion_url_index.py lookup https://camunda.com
+    python notion_url_index.py lookup https://camunda.com --sync --json
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from upload_to_notion import (DEFAULT_RATE_LIMIT, NOTION_BASE_URL, NotionTransport, NotionUploader,
+                              TokenBucket, load_config)
+
+
+DEFAULT_INDEX_PATH = Path(__file__).parent.parent / "url_index.sqlite"  # next to config.json
+URL_PROPERTY = "URL"
+TITLE_PROPERTY = "Organization"
+DEFAULT_PORTS = (80, 443)
+EXIT_NOT_FOUND = 1  # lookup: no entry for the URL
+EXIT_ERROR = 2  # config or sync failure; a lookup's answer is unknown
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    page_id TEXT PRIMARY KEY,
+    database_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    normalized_url TEXT NOT NULL,
+    organization TEXT NOT NULL,
+    last_edited_time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_normalized_url ON entries (normalized_url);
+CREATE TABLE IF NOT EXISTS sync_state (
+    database_id TEXT PRIMARY KEY,
+    last_edited_time TEXT,
+    synced_at TEXT NOT NULL
+);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Reduce a company URL to a comparable key
+
+    Drops the scheme, "www.", default ports, query string, fragment and
+    trailing slashes, and lowercases the host, so "https://www.Acme.com/"
+    and "acme.com" match.
+
+    Args:
+        url: Company URL as entered
+
+    Returns:
+        Normalized key, e.g. "acme.com" or "acme.com/platform"
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    parts = urlsplit(url)
+
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in DEFAULT_PORTS:
+        host = f"{host}:{port}"
+
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    return f"{host}{path}"
+
+
+def _property_text(prop: Optional[Dict]) -> str:
+    """Plain text of a url, title or rich_text property value"""
+    if not prop:
+        return ""
+    prop_type = prop.get("type")
+    value = prop.get(prop_type)
+    if isinstance(value, list):
+        return "".join(segment.get("plain_text", "") for segment in value)
+    return value or ""
+
+
+def entry_from_page(page: Dict, url_property: str = URL_PROPERTY,
+                    title_property: str = TITLE_PROPERTY) -> Optional[Dict]:
+    """Index row for a database page, or None if it has no URL
+
+    Args:
+        page: Page object from a database query
+        url_property: Name of the company URL property
+        title_property: Name of the organization (title) property
+
+    Returns:
+        {page_id, url, normalized_url, organization, last_edited_time} dict
+    """
+    properties = page.get("properties", {})
+    url = _property_text(properties.get(url_property)).strip()
+    if not url:
+        return None
+    return {
+        "page_id": page["id"],
+        "url": url,
+        "normalized_url": normalize_url(url),
+        "organization": _property_text(properties.get(title_property)).strip(),
+        "last_edited_time": page.get("last_edited_time", "")
+    }
+
+
+class UrlIndex:
+    """SQLite index of database entries by normalized URL"""
+
+    def __init__(self, path: Path):
+        """Open (and create, if needed) the index
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = Path(path)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")  # readers don't block a running sync
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def lookup(self, url: str) -> List[Dict]:
+        """Entries whose URL matches, most recently edited first
+
+        Args:
+            url: Company URL (any form normalize_url accepts)
+
+        Returns:
+            List of entry dicts (more than one means the database already
+            holds duplicates)
+        """
+        rows = self.db.execute(
+            "SELECT page_id, database_id, url, organization, last_edited_time FROM entries "
+            "WHERE normalized_url = ? ORDER BY last_edited_time DESC",
+            (normalize_url(url),)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def page_id_for(self, url: str) -> Optional[str]:
+        """Page ID of the most recently edited entry for a URL, or None"""
+        matches = self.lookup(url)
+        return matches[0]["page_id"] if matches else None
+
+    def last_edited_time(self, database_id: str) -> Optional[str]:
+        """Newest last_edited_time seen by the previous sync, or None if never synced"""
+        row = self.db.execute("SELECT last_edited_time FROM sync_state WHERE database_id = ?",
+                              (database_id,)).fetchone()
+        return row["last_edited_time"] if row else None
+
+    def count(self, database_id: Optional[str] = None) -> int:
+        if database_id:
+            return self.db.execute("SELECT COUNT(*) FROM entries WHERE database_id = ?",
+                                   (database_id,)).fetchone()[0]
+        return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def apply_sync(self, database_id: str, pages: List[Dict], full: bool = False,
+                   url_property: str = URL_PROPERTY, title_property: str = TITLE_PROPERTY) -> Dict:
+        """Store the result of a database query in one transaction
+
+        Args:
+            database_id: Database the pages came from
+            pages: Page objects from the query
+            full: Pages are the whole database; drop entries not among them
+            url_property: Name of the company URL property
+            title_property: Name of the organization (title) property
+
+        Returns:
+            {fetched, indexed, removed, entries} counts
+        """
+        stats = {"fetched": len(pages), "indexed": 0, "removed": 0, "entries": 0}
+        newest = None if full else self.last_edited_time(database_id)
+        seen = set()
+
+        with self.db:
+            for page in pages:
+                seen.add(page["id"])
+                edited = page.get("last_edited_time")
+                if edited and (newest is None or edited > newest):
+                    newest = edited
+                entry = None
+                if not page.get("archived") and not page.get("in_trash"):
+                    entry = entry_from_page(page, url_property, title_property)
+                if entry is None:
+                    # Archived, or its URL was cleared: drop any stale row
+                    stats["removed"] += self.db.execute(
+                        "DELETE FROM entries WHERE page_id = ?", (page["id"],)).rowcount
+                    continue
+                self.db.execute(
+                    "INSERT OR REPLACE INTO entries (page_id, database_id, url, normalized_url, "
+                    "organization, last_edited_time) VALUES (?, ?, ?, ?, ?, ?)",
+                    (entry["page_id"], database_id, entry["url"], entry["normalized_url"],
+                     entry["organization"], entry["last_edited_time"])
+                )
+                stats["indexed"] += 1
+
+            if full:
+                indexed = self.db.execute("SELECT page_id FROM entries WHERE database_id = ?",
+                                          (database_id,)).fetchall()
+                stale = [(row["page_id"],) for row in indexed if row["page_id"] not in seen]
+                self.db.executemany("DELETE FROM entries WHERE page_id = ?", stale)
+                stats["removed"] += len(stale)
+            self.db.execute(
+                "INSERT OR REPLACE INTO sync_state (database_id, last_edited_time, synced_at) "
+                "VALUES (?, ?, ?)",
+                (database_id, newest, datetime.now(timezone.utc).isoformat(timespec="seconds"))
+            )
+
+        stats["entries"] = self.count(database_id)
+        return stats
+
+
+def sync_index(uploader: NotionUploader, index: UrlIndex, database_id: str, full: bool = False,
+               url_property: str = URL_PROPERTY, title_property: str = TITLE_PROPERTY) -> Optional[Dict]:
+    """Bring the index up to date with the database
+
+    Fetches only entries edited on or after the newest last_edited_time
+    already indexed (Notion rounds it to the minute, so the boundary minute
+    is fetched again and upserted). The first sync, or full=True, fetches
+    every entry and drops indexed entries that no longer exist.
+
+    Args:
+        uploader: NotionUploader used for the (retried, rate limited) queries
+        index: Index to update
+        database_id: Research database UUID
+        full: Re-fetch the whole database
+        url_property: Name of the company URL property
+        title_property: Name of the organization (title) property
+
+    Returns:
+        Counts from UrlIndex.apply_sync, or None if the query failed
+    """
+    since = None if full else index.last_edited_time(database_id)
+    query_filter = None
+    if since:
+        query_filter = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}}
+    pages = uploader.query_database(database_id, filter=query_filter,
+                                    sorts=[{"timestamp": "last_edited_time", "direction": "ascending"}])
+    if pages is None:
+        return None
+    return index.apply_sync(database_id, pages, full=since is None, url_property=url_property,
+                            title_property=title_property)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local URL → page index of the Notion research database",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python notion_url_index.py sync
+  python notion_url_index.py sync --full
+  python notion_url_index.py lookup https://camunda.com
+  python notion_url_index.py lookup camunda.com --sync --json
+
+lookup exits with status 1 when the URL is not in the database, and with
+status 2 when the config is missing or the sync fails (the answer is unknown).
+        """
+    )
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH),
+                        help=f"SQLite index file (default: {DEFAULT_INDEX_PATH})")
+    parser.add_argument("--config", help="Path to config.json (default: auto-find in skill directory)")
+    parser.add_argument("--database-id", help="Research database UUID (default: notion.databaseId in config.json)")
+    parser.add_argument("--url-property", default=URL_PROPERTY,
+                        help=f"Company URL property name (default: {URL_PROPERTY})")
+    parser.add_argument("--title-property", default=TITLE_PROPERTY,
+                        help=f"Organization property name (default: {TITLE_PROPERTY})")
+    parser.add_argument("--api-url", default=NOTION_BASE_URL,
+                        help="Notion API base URL (e.g. a local stand-in server for testing)")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT,
+                        help=f"Max Notion requests/second (default: {DEFAULT_RATE_LIMIT:g})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync = subparsers.add_parser("sync", help="Fetch entries edited since the last sync")
+    sync.add_argument("--full", action="store_true", help="Re-fetch every entry and drop deleted ones")
+
+    lookup = subparsers.add_parser("lookup", help="Find database entries for a company URL")
+    lookup.add_argument("url", help="Company URL")
+    lookup.add_argument("--sync", action="store_true", help="Sync incrementally before looking up")
+    lookup.add_argument("--json", action="store_true", help="Print matches as JSON")
+
+    args = parser.parse_args()
+
+    if args.rate_limit <= 0:
+        parser.error("--rate-limit must be positive")
+
+    index = UrlIndex(Path(args.index))
+    if args.command == "sync" or args.sync:
+        try:
+            config = load_config(Path(args.config) if args.config else None)
+        except SystemExit:  # load_config has printed the problem
+            sys.exit(EXIT_ERROR)
+        database_id = (args.database_id or config["notion"].get("databaseId", "")).strip()
+        if not database_id or database_id.startswith("<"):
+            print("ERROR: notion.databaseId not set in config.json (or pass --database-id)", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+        api_key = config["notion"]["notion_api"]
+        uploader = NotionUploader(api_key, database_id, rate_limiter=TokenBucket(args.rate_limit),
+                                  verbose=args.command == "sync",
+                                  transport=NotionTransport(api_key, base_url=args.api_url))
+
+        if args.command == "sync":
+            print(f"🔄 Syncing URL index {args.index}... ", end="", flush=True)
+        stats = sync_index(uploader, index, database_id, full=args.command == "sync" and args.full,
+                           url_property=args.url_property, title_property=args.title_property)
+        if stats is None:
+            if args.command != "sync":
+                print("ERROR: Database query failed", file=sys.stderr)
+            sys.exit(EXIT_ERROR)
+        if args.command == "sync":
+            print(f"✓ ({stats['fetched']} fetched, {stats['indexed']} indexed, "
+                  f"{stats['removed']} removed, {stats['entries']} entries)")
+            sys.exit(0)
+
+    matches = index.lookup(args.url)
+    if args.json:
+        print(json.dumps(matches, indent=2))
+    elif matches:
+        for match in matches:
+            print(f"✓ {match['organization'] or '(untitled)'}: {match['url']} → {match['page_id']} "
+                  f"(edited {match['last_edited_time']})")
+    else:
+        print(f"No entry for {normalize_url(args.url)}")
+    sys.exit(0 if matches else EXIT_NOT_FOUND)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+upload_daemon.py - Durable upload queue with a long-running worker
+
+Reports are queued in SQLite (with status, attempts and timings) instead
+of being uploaded by one upload_to_notion.py process each. A single
+daemon works through the queue with one warm connection pool, one shared
+rate limiter and one AIMD concurrency controller, so bursts of reports
+are uploaded at a steady full rate. Queued reports are copied next to the
+queue, so the originals can be deleted right away, and jobs left running
+by a crashed daemon are picked up again (resuming from their upload
+checkpoint) on the next start.
+
+Usage:
+    python upload_daemon.py enqueue --page-id <id> --content <file> --company-url <url>
+    python upload_daemon.py run --workers 4
+    python upload_daemon.py run --spool /tmp/research-upload-spool
+    python upload_daemon.py status
+    python upload_daemon.py retry --failed
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from upload_to_notion import (BUNDLE_SUFFIX, DEFAULT_BATCH_BYTES, DEFAULT_CONCURRENCY, DEFAULT_POOL_SIZE,
+                              DEFAULT_RATE_LIMIT, DEFAULT_WORKERS, NOTION_BASE_URL, AdaptiveConcurrency,
+                              BlockBundle, ConversionCache, Metrics, NotionTransport, TokenBucket,
+                              load_config, run_batch_job)
+
+
+DEFAULT_QUEUE_PATH = Path(__file__).parent.parent / "upload_queue.sqlite"  # next to config.json
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 30  # seconds before a failed job's second attempt; doubles per attempt
+MAX_RETRY_BACKOFF = 600
+POLL_INTERVAL = 1.0  # seconds between queue/spool checks while idle
+MODES = ("upload", "clear", "sync")
+STATUSES = ("queued", "running", "done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    page_id TEXT NOT NULL,
+    company_url TEXT NOT NULL,
+    source TEXT NOT NULL,
+    content TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    split_pages INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    enqueued_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker TEXT,
+    blocks INTEGER,
+    failed_blocks INTEGER,
+    requests INTEGER,
+    seconds REAL,
+    error TEXT,
+    spool_key TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, next_attempt_at);
+"""
+
+
+def _format_time(timestamp: Optional[float]) -> str:
+    if timestamp is None:
+        return "-"
+    return datetime.fromtimestamp(timestamp).isoformat(sep=" ", timespec="seconds")
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before retrying a job that has failed `attempts` times"""
+    return min(RETRY_BACKOFF * 2 ** (attempts - 1), MAX_RETRY_BACKOFF)
+
+
+class JobQueue:
+    """SQLite-backed queue of report uploads
+
+    Safe to use from several threads (one connection behind a lock) and
+    from several processes (WAL mode; claims run in IMMEDIATE
+    transactions, so two workers never claim the same job).
+    """
+
+    def __init__(self, path: Path):
+        """Open (and create, if needed) the queue
+
+        Args:
+            path: SQLite database file; queued report copies and upload
+                checkpoints live in a "<name>-files" directory beside it
+        """
+        self.path = Path(path)
+        self.files_dir = self.path.parent / f"{self.path.stem}-files"
+        self.journal_dir = self.files_dir / "journal"
+        self.db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                  isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")  # enqueue and status don't block the daemon
+        self.db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def enqueue(self, page_id: str, content_path: Path, company_url: str, mode: str = "upload",
+                split_pages: bool = False, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                spool_key: Optional[str] = None) -> Optional[int]:
+        """Copy a report into the queue's files and add a job for it
+
+        Args:
+            page_id: Notion page UUID
+            content_path: Markdown report, or a compiled .ndjson bundle
+            company_url: Company website URL (for favicon)
+            mode: "upload", "clear" or "sync"
+            split_pages: Upload each H1 section to a child page
+            max_attempts: Attempts before the job is marked failed
+            spool_key: Identity of the spool file the job came from, so a
+                file seen twice (e.g. after a crash) is only queued once
+
+        Returns:
+            Job ID, or None if spool_key was already queued
+
+        Raises:
+            ValueError if the mode is unknown or the content is empty or
+            not a valid bundle
+            OSError if the content can't be read or copied
+        """
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r} (expected one of: {', '.join(MODES)})")
+        if split_pages and mode == "sync":
+            raise ValueError("split_pages can't be combined with sync")
+        content_path = Path(content_path)
+        if content_path.suffix == BUNDLE_SUFFIX:
+            BlockBundle(content_path).verify()
+        elif not content_path.read_text(encoding="utf-8").strip():
+            raise ValueError(f"{content_path.name} is empty")
+        if spool_key and self.db.execute("SELECT 1 FROM jobs WHERE spool_key = ?", (spool_key,)).fetchone():
+            return None
+
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        copy = self.files_dir / f"{uuid.uuid4().hex[:12]}-{content_path.name}"
+        shutil.copyfile(content_path, copy)
+        now = time.time()
+        try:
+            with self._lock:
+                cursor = self.db.execute(
+                    "INSERT OR IGNORE INTO jobs (page_id, company_url, source, content, mode, split_pages, "
+                    "status, max_attempts, enqueued_at, next_attempt_at, spool_key) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                    (page_id, company_url, str(content_path), str(copy), mode, int(split_pages),
+                     max_attempts, now, now, spool_key)
+                )
+        except sqlite3.Error:
+            copy.unlink()
+            raise
+        if not cursor.rowcount:  # another process queued the same spool file first
+            copy.unlink()
+            return None
+        return cursor.lastrowid
+
+    def recover(self) -> int:
+        """Re-queue jobs left running by a daemon that died
+
+        Returns:
+            Number of jobs re-queued
+        """
+        with self._lock:
+            return self.db.execute(
+                "UPDATE jobs SET status = 'queued', next_attempt_at = ?, worker = NULL "
+                "WHERE status = 'running'", (time.time(),)
+            ).rowcount
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Atomically take the oldest due job and mark it running
+
+        Args:
+            worker: Name recorded on the job (host:pid)
+
+        Returns:
+            Job row as a dict (attempts already counts this attempt), or
+            None if no job is due
+        """
+        now = time.time()
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.db.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at, id LIMIT 1", (now,)
+                ).fetchone()
+                if row is None:
+                    self.db.execute("COMMIT")
+                    return None
+                self.db.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, "
+                    "finished_at = NULL, worker = ? WHERE id = ?", (now, worker, row["id"])
+                )
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        job = dict(row)
+        job.update(status="running", attempts=row["attempts"] + 1, started_at=now, worker=worker)
+        return job
+
+    def finish(self, job: Dict, result: Dict) -> str:
+        """Record an attempt's outcome and decide what happens next
+
+        A successful job is marked done and its report copy deleted. A
+        failed one is re-queued with exponential backoff until it has used
+        max_attempts, then marked failed (its copy is kept for a retry).
+
+        Args:
+            job: Row returned by claim()
+            result: Summary dict from upload_to_notion.run_batch_job
+
+        Returns:
+            The job's new status
+        """
+        success = result["success"] and not result["error"]
+        if success:
+            status = "done"
+        elif job["attempts"] >= job["max_attempts"]:
+            status = "failed"
+        else:
+            status = "queued"
+        now = time.time()
+        error = result["error"] or ("" if success else f"{result['failed']} blocks failed")
+        with self._lock:
+            self.db.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, next_attempt_at = ?, worker = NULL, "
+                "blocks = ?, failed_blocks = ?, requests = ?, seconds = ?, error = ? WHERE id = ?",
+                (status, now, now + retry_delay(job["attempts"]) if status == "queued" else now,
+                 result["blocks"], result["failed"], result["requests"], result["seconds"], error, job["id"])
+            )
+        if status == "done":
+            try:
+                os.unlink(job["content"])
+            except FileNotFoundError:
+                pass
+        return status
+
+    def retry(self, job_ids: Optional[List[int]] = None) -> int:
+        """Re-queue failed jobs with a fresh set of attempts
+
+        Args:
+            job_ids: Jobs to retry (default: every failed job)
+
+        Returns:
+            Number of jobs re-queued
+        """
+        query = "UPDATE jobs SET status = 'queued', attempts = 0, next_attempt_at = ? WHERE status = 'failed'"
+        params = [time.time()]
+        if job_ids:
+            query += f" AND id IN ({', '.join('?' * len(job_ids))})"
+            params.extend(job_ids)
+        with self._lock:
+            return self.db.execute(query, params).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        counts = dict.fromkeys(STATUSES, 0)
+        for row in self.db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def jobs(self, status: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Most recently queued jobs first
+
+        Args:
+            status: Only jobs with this status (default: all)
+            limit: Maximum number of jobs returned
+        """
+        if status:
+            rows = self.db.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?",
+                                   (status, limit))
+        else:
+            rows = self.db.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows]
+
+
+def scan_spool(queue: JobQueue, spool_dir: Path, log=print) -> int:
+    """Queue every job file in a spool directory
+
+    Job files are *.json objects with page_id, content (relative paths
+    resolve against the spool directory), company_url and optional
+    clear/sync/split_pages flags, the same fields as an upload manifest
+    line. Write them under another name and rename them into place, so a
+    half-written file is never read. Queued files are deleted; invalid
+    ones are moved to a "rejected" subdirectory.
+
+    Args:
+        queue: Queue to add jobs to
+        spool_dir: Directory to scan
+        log: Progress output function
+
+    Returns:
+        Number of jobs queued
+    """
+    queued = 0
+    for path in sorted(spool_dir.glob("*.json")):
+        try:
+            stat = path.stat()
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            missing = [key for key in ("page_id", "content", "company_url") if not entry.get(key)]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+            if entry.get("clear") and entry.get("sync"):
+                raise ValueError("clear and sync are mutually exclusive")
+            content = Path(entry["content"])
+            if not content.is_absolute():
+                content = spool_dir / content
+            mode = "clear" if entry.get("clear") else "sync" if entry.get("sync") else "upload"
+            job_id = queue.enqueue(entry["page_id"], content, entry["company_url"], mode=mode,
+                                   split_pages=bool(entry.get("split_pages")),
+                                   spool_key=f"{path.name}:{stat.st_mtime_ns}")
+        except (OSError, ValueError) as e:
+            if isinstance(e, FileNotFoundError) and not path.exists():
+                continue  # picked up by another daemon
+            log(f"  ✗ Spool file {path.name} rejected: {str(e)}")
+            rejected = spool_dir / "rejected"
+            rejected.mkdir(exist_ok=True)
+            try:
+                os.replace(path, rejected / path.name)
+            except FileNotFoundError:
+                pass  # picked up by another daemon meanwhile
+            continue
+        path.unlink()
+        if job_id is not None:
+            queued += 1
+            log(f"  📥 Job {job_id} queued from spool: {content.name} → {entry['page_id']}")
+    return queued
+
+
+def run_job(job: Dict, api_key: str, uploader_options: Dict, journal_dir: Path) -> Dict:
+    """Upload one queued report (runs on a daemon worker thread)
+
+    Retries of a plain upload resume after the last acknowledged block.
+    Split-page uploads can't resume, so their retries clear the page first.
+
+    Args:
+        job: Row returned by JobQueue.claim()
+        api_key: Notion integration token
+        uploader_options: NotionUploader keyword arguments shared by all workers
+        journal_dir: Directory for upload checkpoints
+
+    Returns:
+        Summary dict from upload_to_notion.run_batch_job
+    """
+    retrying = job["attempts"] > 1
+    split_pages = bool(job["split_pages"])
+    resume = job["mode"] == "upload" and retrying and not split_pages
+    batch_job = {
+        "page_id": job["page_id"],
+        "content": Path(job["content"]),
+        "company_url": job["company_url"],
+        "clear": job["mode"] == "clear" or (split_pages and retrying),
+        "sync": job["mode"] == "sync",
+        "resume": resume,
+        "split_pages": split_pages
+    }
+    return run_batch_job(batch_job, api_key, uploader_options, journal_dir=journal_dir)
+
+
+def run_daemon(queue: JobQueue, api_key: str, workers: int = DEFAULT_WORKERS,
+               rate_limit: float = DEFAULT_RATE_LIMIT, spool_dir: Optional[Path] = None,
+               transport: Optional[NotionTransport] = None, batch_bytes: int = DEFAULT_BATCH_BYTES,
+               defer_table_rows: bool = False, cache: Optional[ConversionCache] = None,
+               once: bool = False, stop: Optional[threading.Event] = None,
+               poll_interval: float = POLL_INTERVAL) -> Dict[str, int]:
+    """Process queued jobs until stopped
+
+    Claims due jobs whenever a worker is free, polling the queue (and the
+    spool directory) while idle. All workers share one transport, rate
+    limiter and concurrency controller, like a batch run. Jobs still
+    running when stop is set are finished first.
+
+    Args:
+        queue: Job queue
+        api_key: Notion integration token
+        workers: Reports uploaded at the same time
+        rate_limit: Combined requests/second across all workers
+        spool_dir: Directory of job files to queue (default: none)
+        transport: Shared transport (default: pooled NotionTransport)
+        batch_bytes: JSON byte budget per append request
+        defer_table_rows: Append table rows after their tables are created
+        cache: Conversion cache shared by every job (default: none)
+        once: Exit once no job is due instead of waiting for more
+        stop: Event that ends the loop (default: private, set by SIGTERM/SIGINT)
+        poll_interval: Seconds between checks while idle
+
+    Returns:
+        {done, failed, retried} counts for this run
+    """
+    stop = stop or threading.Event()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    uploader_options = {
+        "transport": transport or NotionTransport(api_key, pool_size=max(DEFAULT_POOL_SIZE, workers)),
+        "rate_limiter": TokenBucket(rate_limit),
+        "concurrency": AdaptiveConcurrency(initial=max(DEFAULT_CONCURRENCY, workers)),
+        "max_batch_bytes": batch_bytes,
+        "defer_table_rows": defer_table_rows,
+        "metrics": Metrics(),
+        "cache": cache
+    }
+    stats = {"done": 0, "failed": 0, "retried": 0}
+
+    recovered = queue.recover()
+    if recovered:
+        print(f"♻️ Re-queued {recovered} jobs left running by a previous daemon")
+    print(f"🚚 Upload daemon: {workers} workers, {rate_limit:g} req/s, queue {queue.path}"
+          + (f", spool {spool_dir}" if spool_dir else ""))
+
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            if spool_dir and not stop.is_set():
+                scan_spool(queue, spool_dir)
+            while not stop.is_set() and len(in_flight) < workers:
+                job = queue.claim(worker)
+                if job is None:
+                    break
+                in_flight[pool.submit(run_job, job, api_key, uploader_options, queue.journal_dir)] = job
+
+            if not in_flight:
+                if stop.is_set() or once:
+                    break
+                stop.wait(poll_interval)
+                continue
+
+            done, _ = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = in_flight.pop(future)
+                result = future.result()
+                status = queue.finish(job, result)
+                name = Path(job["source"]).name
+                attempt = f"attempt {job['attempts']}/{job['max_attempts']}"
+                if status == "done":
+                    stats["done"] += 1
+                    print(f"  ✓ Job {job['id']} {name} → {job['page_id']}: {result['blocks']} blocks, "
+                          f"{result['requests']} requests, {result['seconds']:.1f}s ({attempt})")
+                elif status == "queued":
+                    stats["retried"] += 1
+                    print(f"  ⚠️ Job {job['id']} {name}: {result['error'] or 'upload failed'} ({attempt}; "
+                          f"retrying in {retry_delay(job['attempts']):.0f}s)")
+                else:
+                    stats["failed"] += 1
+                    print(f"  ✗ Job {job['id']} {name}: {result['error'] or 'upload failed'} ({attempt}; "
+                          f"giving up)")
+    return stats
+
+
+def print_status(queue: JobQueue, status: Optional[str] = None, limit: int = 20) -> None:
+    """Print job counts and the most recent jobs"""
+    counts = queue.counts()
+    print(f"📬 {queue.path}: " + ", ".join(f"{counts[name]} {name}" for name in STATUSES))
+    jobs = queue.jobs(status, limit)
+    if not jobs:
+        return
+    print(f"\n{'ID':>5}  {'STATUS':<8} {'TRIES':>5}  {'QUEUED':<19}  {'WAIT':>6} {'RUN':>6} {'BLOCKS':>6}  REPORT")
+    for job in jobs:
+        wait_time = f"{job['started_at'] - job['enqueued_at']:.1f}s" if job["started_at"] else "-"
+        run_time = f"{job['seconds']:.1f}s" if job["seconds"] is not None else "-"
+        blocks = job["blocks"] if job["blocks"] is not None else "-"
+        line = (f"{job['id']:>5}  {job['status']:<8} {job['attempts']:>2}/{job['max_attempts']:<2}  "
+                f"{_format_time(job['enqueued_at']):<19}  {wait_time:>6} {run_time:>6} {blocks:>6}  "
+                f"{Path(job['source']).name} → {job['page_id']}")
+        if job["status"] == "queued" and job["attempts"]:
+            line += f" (next attempt {_format_time(job['next_attempt_at'])})"
+        if job["error"] and job["status"] != "done":
+            line += f"\n{'':>7}{job['error']}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Durable upload queue for research reports, processed by a long-running daemon",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python upload_daemon.py enqueue --page-id abc123 --content /tmp/report.md --company-url https://example.com
+  python upload_daemon.py run --workers 4 --spool /tmp/research-upload-spool
+  python upload_daemon.py run --once
+  python upload_daemon.py status --status failed
+  python upload_daemon.py retry --failed
+        """
+    )
+    parser.add_argument("--queue", default=str(DEFAULT_QUEUE_PATH),
+                        help=f"SQLite queue file (default: {DEFAULT_QUEUE_PATH})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = subparsers.add_parser("enqueue", help="Queue a report for upload")
+    enqueue.add_argument("--page-id", required=True, help="Notion page UUID")
+    enqueue.add_argument("--content", required=True,
+                         help=f"Markdown report, or a compiled {BUNDLE_SUFFIX} bundle (copied into the queue)")
+    enqueue.add_argument("--company-url", required=True, help="Company website URL (for favicon)")
+    modes = enqueue.add_mutually_exclusive_group()
+    modes.add_argument("--clear", action="store_true", help="Clear existing page content before uploading")
+    modes.add_argument("--sync", action="store_true", help="Only change blocks that differ from the page")
+    enqueue.add_argument("--split-pages", action="store_true", help="Upload each H1 section to a child page")
+    enqueue.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                         help=f"Attempts before the job is marked failed (default: {DEFAULT_MAX_ATTEMPTS})")
+
+    run = subparsers.add_parser("run", help="Process queued jobs until stopped (SIGTERM/Ctrl-C)")
+    run.add_argument("--config", help="Path to config.json (default: auto-find in skill directory)")
+    run.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                     help=f"Reports uploaded at the same time (default: {DEFAULT_WORKERS})")
+    run.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT,
+                     help=f"Max Notion requests/second across all workers (default: {DEFAULT_RATE_LIMIT:g})")
+    run.add_argument("--spool", help="Queue job files (*.json) dropped into this directory")
+    run.add_argument("--once", action="store_true", help="Exit once no job is due")
+    run.add_argument("--api-url", default=NOTION_BASE_URL,
+                     help="Notion API base URL (e.g. a local stand-in server for testing)")
+    run.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                     help=f"Keep-alive HTTP connections to the API (default: {DEFAULT_POOL_SIZE})")
+    run.add_argument("--batch-bytes", type=int, default=DEFAULT_BATCH_BYTES,
+                     help=f"JSON byte budget per upload request (default: {DEFAULT_BATCH_BYTES})")
+    run.add_argument("--defer-table-rows", action="store_true",
+                     help="Create tables with their first row, then append the rest concurrently")
+    run.add_argument("--cache-dir", help="Conversion cache shared by every job")
+
+    status = subparsers.add_parser("status", help="Show job counts and recent jobs")
+    status.add_argument("--status", choices=STATUSES, help="Only show jobs with this status")
+    status.add_argument("--limit", type=int, default=20, help="Jobs to show (default: 20)")
+    status.add_argument("--json", action="store_true", help="Print counts and jobs as JSON")
+
+    retry = subparsers.add_parser("retry", help="Re-queue failed jobs")
+    retry.add_argument("job_ids", nargs="*", type=int, help="Failed job IDs")
+    retry.add_argument("--failed", action="store_true", help="Re-queue every failed job")
+
+    args = parser.parse_args()
+    queue = JobQueue(Path(args.queue))
+
+    if args.command == "enqueue":
+        if args.max_attempts < 1:
+            parser.error("--max-attempts must be at least 1")
+        mode = "clear" if args.clear else "sync" if args.sync else "upload"
+        try:
+            job_id = queue.enqueue(args.page_id, Path(args.content), args.company_url, mode=mode,
+                                   split_pages=args.split_pages, max_attempts=args.max_attempts)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Could not queue {args.content}: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        print(f"📥 Job {job_id} queued: {Path(args.content).name} → {args.page_id}")
+        sys.exit(0)
+
+    if args.command == "status":
+        if args.json:
+            print(json.dumps({"counts": queue.counts(), "jobs": queue.jobs(args.status, args.limit)}, indent=2))
+        else:
+            print_status(queue, args.status, args.limit)
+        sys.exit(0)
+
+    if args.command == "retry":
+        if not args.job_ids and not args.failed:
+            parser.error("pass job IDs or --failed")
+        print(f"🔁 Re-queued {queue.retry(args.job_ids or None)} failed jobs")
+        sys.exit(0)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.rate_limit <= 0:
+        parser.error("--rate-limit must be positive")
+    spool_dir = Path(args.spool) if args.spool else None
+    if spool_dir:
+        spool_dir.mkdir(parents=True, exist_ok=True)
+
+    # One daemon per queue: a second one would re-queue the first one's running jobs
+    lock_file = open(f"{queue.path}.lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print(f"ERROR: Another daemon is already processing {queue.path}", file=sys.stderr)
+        sys.exit(1)
+
+    config = load_config(Path(args.config) if args.config else None)
+    api_key = config["notion"]["notion_api"]
+    transport = NotionTransport(api_key, base_url=args.api_url, pool_size=max(args.pool_size, args.workers))
+    cache = ConversionCache(Path(args.cache_dir)) if args.cache_dir else None
+
+    stop = threading.Event()
+
+    def request_stop(*_):
+        if not stop.is_set():
+            print("\n⏹️ Stopping after running jobs finish...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    stats = run_daemon(queue, api_key, workers=args.workers, rate_limit=args.rate_limit,
+                       spool_dir=spool_dir, transport=transport, batch_bytes=args.batch_bytes,
+                       defer_table_rows=args.defer_table_rows, cache=cache, once=args.once, stop=stop)
+    print(f"\n📊 {stats['done']} done, {stats['failed']} failed, {stats['retried']} retries scheduled")
+    transport.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,41 +8,1591 @@ preserving formatting and setting custom company icons.
 Usage:
     python upload_to_notion.py --page-id <id> --content <file> --company-url <url>
     python upload_to_notion.py --page-id <id> --content <file> --company-url <url> --config /path/to/config.json
+    python upload_to_notion.py --manifest jobs.jsonl --workers 4
+    python upload_to_notion.py --manifest jobs.jsonl --index url_index.sqlite
+    python upload_to_notion.py compile report.md --company-url <url>
+    python upload_to_notion.py push report.ndjson --page-id <id>
 """
 
 import argparse
+import contextlib
+import difflib
+import email.utils
+import functools
+import hashlib
+import html
+import importlib
+import io
+import itertools
 import json
+import os
+import queue
+import random
 import sys
+import tempfile
+import threading
 import time
 import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-import requests
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import orjson  # optional: faster JSON encoding of upload batches
+except ImportError:
+    orjson = None
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    Keeps requests (and the urllib3/ssl stack behind it) off the startup
+    path of offline commands such as compile.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+requests = _LazyModule("requests")
 
 
 NOTION_API_VERSION = "2022-06-28"
 NOTION_BASE_URL = "https://api.notion.com/v1"
-MAX_RETRIES = 3
-RETRY_DELAY = 1  # seconds
+MAX_RETRIES = 5  # attempts per request, including the first
+RETRY_DELAY = 1  # seconds; base for exponential backoff
+MAX_RETRY_DELAY = 30  # seconds; backoff cap
+RETRYABLE_STATUS = (409, 429, 500, 502, 503, 504)  # conflict, rate limited, server errors
+DEFAULT_CONCURRENCY = 8  # initial in-flight request limit for the AIMD controller
+DEFAULT_POOL_SIZE = 32  # keep-alive connections per host (matches the AIMD ceiling)
+DEFAULT_TIMEOUT = 30  # seconds; used when a call doesn't pass its own timeout
+DEFAULT_RATE_LIMIT = 3.0  # requests/second (Notion's average per-integration limit)
+DEFAULT_WORKERS = 4
+DELETE_WORKERS = 8  # concurrent DELETEs when clearing a page
+MAX_BATCH_BLOCKS = 100  # Notion limit on children per append request
+MAX_BATCH_ELEMENTS = 1000  # Notion limit on blocks per request, nested children included
+DEFAULT_BATCH_BYTES = 450_000  # stays under Notion's 500 KB request body limit
+TABLE_INITIAL_ROWS = 1  # rows sent with a table when the rest are deferred
+TABLE_ROW_WORKERS = 4  # tables filled concurrently (different parents need no ordering)
+STREAM_BUFFER_BLOCKS = 1000  # converted blocks held ahead of the uploader (~10 batches)
+MAX_TEXT_LENGTH = 2000  # Notion limit on text.content per rich text segment
+MAX_RICH_TEXT = 100  # Notion limit on rich text segments per block
+INLINE_CACHE_SIZE = 4096  # distinct strings memoized by the inline parser
+MODE_FLAGS = ("clear", "sync", "resume")  # per-report upload modes (mutually exclusive)
+JOURNAL_DIR = Path(tempfile.gettempdir()) / "research-org-upload-journal"
+CONVERTER_VERSION = "3"  # bump whenever conversion output changes; invalidates cached chunks
+DEFAULT_CACHE_MAX_MB = 64
+BUNDLE_FORMAT = "notion-blocks"  # header "format" of compiled block bundles
+BUNDLE_VERSION = 1  # bump when the bundle layout changes; push rejects other versions
+BUNDLE_SUFFIX = ".ndjson"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds; request histogram bounds
+# Markdown patterns, compiled once for the converter
+HEADER_RE = re.compile(r'^(#{1,2}\s+.+?)$', re.MULTILINE)  # H1/H2 section headers
+HEADING_PARA_RE = re.compile(r'#{1,6}\s+')
+BULLET_PREFIX_RE = re.compile(r'[-*]\s+')
+NUMBERED_PREFIX_RE = re.compile(r'\d+[\.\)]\s+')
+TABLE_SEPARATOR_RE = re.compile(r'^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$')  # |---|:--:| header rule
+TABLE_CELL_SPLIT_RE = re.compile(r'(`[^`]*`)|(\\\|)|\|')  # code spans, escaped pipes, cell borders
+LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+INLINE_SPECIAL_RE = re.compile(r'[*_`\[]')  # characters that may start inline markup
+BUNDLE_LINE_RE = re.compile(rb'\{"sha256":"([0-9a-f]{64})","bytes":(\d+),"block":')  # block line prefix
+HTML_INLINE_MARKUP = {"b": "**", "strong": "**", "i": "*", "em": "*", "code": "`"}  # cell tag -> markdown
+HTML_LINE_BREAK = "\x00"  # <br> placeholder, kept through whitespace collapsing
+HTML_TABLE_TOKEN_RE = re.compile(  # a whole <td>/<th> cell, or a <tr>/<table> tag
+    r'<(t[dh])\b([^>]*)>(.*?)(?:</t[dh]\s*>|(?=<t[dhr]\b|</tr\s*>|</table\s*>)|\Z)'
+    r'|<(/?)(tr|table)\b([^>]*)>', re.DOTALL | re.IGNORECASE)
+HTML_INLINE_TOKEN_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>|<!--.*?-->|([^<]+)|<', re.DOTALL)
+HTML_ATTR_RE = re.compile(r'([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+# Notion error messages that mean "request too large" (batch should shrink)
+ENDPOINT_ID_RE = re.compile(r'^/?(blocks|pages|databases)/[^/]+')  # collapses IDs in metric labels
+SIZE_ERROR_RE = re.compile(r'too large|payload|length should be|exceeds', re.IGNORECASE)
+# Block types whose content --sync can replace in place with PATCH /blocks/{id}
+SYNC_UPDATABLE_TYPES = (
+    "paragraph", "heading_1", "heading_2", "heading_3",
+    "bulleted_list_item", "numbered_list_item"
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter
+
+    A single bucket is shared by every uploader in a run so that the
+    combined request rate stays under Notion's per-integration limit.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Initialize limiter
+
+        Args:
+            rate: Tokens added per second (sustained requests/second)
+            capacity: Maximum burst size (default: one second of tokens)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until the requested number of tokens is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class NotionTransport:
+    """Pooled, keep-alive HTTP transport for the Notion API
+
+    Wraps one requests.Session so every call reuses TLS connections to
+    api.notion.com instead of opening a new one. The session is safe to
+    share between uploaders in a batch run. Alternative transports (e.g.
+    an in-process fake) only need to provide the same request() method.
+    """
+
+    def __init__(self, api_key: str, base_url: str = NOTION_BASE_URL,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        """Initialize session and connection pool
+
+        Args:
+            api_key: Notion integration token (ntn_xxx format)
+            base_url: API root (override to target a local stand-in server)
+            pool_size: Maximum keep-alive connections kept per host
+            timeout: Default per-call timeout in seconds
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                                max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Notion-Version": NOTION_API_VERSION,
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive"
+        })
+
+    def request(self, method: str, path: str, timeout: Optional[float] = None,
+                **kwargs) -> "requests.Response":
+        """Send one request over the pooled session
+
+        Args:
+            method: HTTP method
+            path: API path relative to base_url (e.g. "blocks/{id}/children")
+            timeout: Per-call timeout in seconds (default: self.timeout)
+            **kwargs: Passed through to requests.Session.request
+
+        Returns:
+            requests.Response
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        return self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        self.session.close()
+
+
+class RetryPolicy:
+    """Retry classification and backoff shared by every Notion API call
+
+    Retries 409/429/5xx responses and network errors; any other status
+    (e.g. a 400 validation error) is returned immediately since sending
+    the same payload again cannot succeed. Waits honor Retry-After on
+    429, otherwise use capped exponential backoff with full jitter.
+    """
+
+    def __init__(self, max_attempts: int = MAX_RETRIES, base_delay: float = RETRY_DELAY,
+                 max_delay: float = MAX_RETRY_DELAY):
+        """Initialize policy
+
+        Args:
+            max_attempts: Attempts per request, including the first
+            base_delay: Backoff for the first retry (seconds)
+            max_delay: Upper bound on any single wait (seconds)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def is_retryable(status_code: int) -> bool:
+        """Check whether a response status is worth retrying"""
+        return status_code in RETRYABLE_STATUS
+
+    def delay(self, attempt: int, response: Optional["requests.Response"] = None) -> float:
+        """Seconds to wait before retry number attempt + 1
+
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            response: The failed response, if one was received
+
+        Returns:
+            Wait in seconds
+        """
+        if response is not None and response.status_code == 429:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                # Small jitter so throttled workers don't all return at once
+                return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight Notion requests, shared by all workers
+
+    Each success raises the limit by 1/limit (about +1 per round of
+    requests); a 429 halves it, at most once per second, and pauses
+    every worker until the Retry-After wait has passed. Parallel
+    workers therefore back off together instead of stampeding.
+    """
+
+    def __init__(self, initial: float = DEFAULT_CONCURRENCY, minimum: float = 1,
+                 maximum: float = DEFAULT_CONCURRENCY * 4):
+        """Initialize controller
+
+        Args:
+            initial: Starting in-flight limit
+            minimum: Lowest limit after decreases
+            maximum: Highest limit after increases
+        """
+        self.limit = float(initial)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until a request slot is free and no throttle pause is active"""
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, throttled: bool = False) -> None:
+        """Free a request slot and adjust the limit
+
+        Args:
+            throttled: The request was rejected with 429
+        """
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                if now - self._last_decrease >= 1.0:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every worker for the given number of seconds"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _endpoint_label(method: str, path: str) -> str:
+    """Metric label for an API call, e.g. PATCH blocks/{id}/children"""
+    return f"{method} {ENDPOINT_ID_RE.sub(lambda m: f'{m.group(1)}/{{id}}', path)}"
+
+
+def _prometheus_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Phase timings, per-endpoint request latency and counters for one run
+
+    Thread-safe, so one instance can be shared by every worker in a batch
+    run; phase times are then summed across reports. Written as a JSON
+    summary, or as a Prometheus textfile for the node exporter.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self.phases: Dict[str, float] = {}  # phase -> seconds
+        self.counters: Dict[str, int] = {}  # e.g. blocks_uploaded, batches
+        self.endpoints: Dict[str, Dict] = {}  # endpoint -> {statuses, buckets, sum, max, retries}
+        self.bytes_sent = 0
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Time a block of work under the given phase name"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.monotonic() - started)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _endpoint(self, endpoint: str) -> Dict:
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = {"statuses": {}, "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                                        "sum": 0.0, "max": 0.0, "retries": 0}
+        return self.endpoints[endpoint]
+
+    def observe_request(self, endpoint: str, status, seconds: float, body_bytes: int = 0) -> None:
+        """Record one attempt (status is the HTTP code, or "error" for network failures)"""
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound),
+                      len(LATENCY_BUCKETS))
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats["statuses"][str(status)] = stats["statuses"].get(str(status), 0) + 1
+            stats["buckets"][bucket] += 1
+            stats["sum"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            self.bytes_sent += body_bytes
+
+    def observe_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self._endpoint(endpoint)["retries"] += 1
+
+    def summary(self, **extra) -> Dict:
+        """Everything recorded so far as a JSON-serializable dict
+
+        Args:
+            **extra: Additional top-level fields (e.g. success, reports)
+        """
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in sorted(self.endpoints.items()):
+                count = sum(stats["buckets"])
+                cumulative = 0
+                buckets = {}
+                for bound, hits in zip(LATENCY_BUCKETS + ("+Inf",), stats["buckets"]):
+                    cumulative += hits
+                    buckets[str(bound)] = cumulative
+                endpoints[endpoint] = {
+                    "count": count,
+                    "statuses": dict(stats["statuses"]),
+                    "retries": stats["retries"],
+                    "latency_seconds": {
+                        "sum": round(stats["sum"], 6),
+                        "mean": round(stats["sum"] / count, 6) if count else 0.0,
+                        "max": round(stats["max"], 6),
+                        "buckets": buckets
+                    }
+                }
+            blocks = self.counters.get("blocks_converted", 0)
+            return dict({
+                "started_at": self.started_at.isoformat(),
+                "elapsed_seconds": round(elapsed, 3),
+                "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+                "counters": dict(self.counters),
+                "blocks_per_second": round(blocks / elapsed, 1) if elapsed else 0.0,
+                "bytes_sent": self.bytes_sent,
+                "requests": sum(e["count"] for e in endpoints.values()),
+                "retries": sum(e["retries"] for e in endpoints.values()),
+                "endpoints": endpoints
+            }, **extra)
+
+    def to_prometheus(self, **extra) -> str:
+        """Render the summary in the Prometheus text exposition format"""
+        summary = self.summary(**extra)
+        prefix = "notion_upload"
+        lines = [
+            f"# HELP {prefix}_phase_seconds Time spent in each upload phase (summed across reports)",
+            f"# TYPE {prefix}_phase_seconds gauge",
+        ]
+        lines += [f'{prefix}_phase_seconds{{phase="{_prometheus_label(name)}"}} {seconds}'
+                  for name, seconds in summary["phases"].items()]
+
+        lines += [f"# HELP {prefix}_request_duration_seconds Notion API request latency per attempt",
+                  f"# TYPE {prefix}_request_duration_seconds histogram"]
+        for endpoint, stats in summary["endpoints"].items():
+            label = f'endpoint="{_prometheus_label(endpoint)}"'
+            for bound, count in stats["latency_seconds"]["buckets"].items():
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f"{prefix}_request_duration_seconds_sum{{{label}}} {stats['latency_seconds']['sum']}")
+            lines.append(f"{prefix}_request_duration_seconds_count{{{label}}} {stats['count']}")
+
+        lines += [f"# HELP {prefix}_responses_total Notion API responses by endpoint and status",
+                  f"# TYPE {prefix}_responses_total counter"]
+        for endpoint, stats in summary["endpoints"].items():
+            for status, count in stats["statuses"].items():
+                lines.append(f'{prefix}_responses_total{{endpoint="{_prometheus_label(endpoint)}",'
+                             f'status="{status}"}} {count}')
+
+        lines += [f"# HELP {prefix}_retries_total Retried Notion API requests by endpoint",
+                  f"# TYPE {prefix}_retries_total counter"]
+        lines += [f'{prefix}_retries_total{{endpoint="{_prometheus_label(endpoint)}"}} {stats["retries"]}'
+                  for endpoint, stats in summary["endpoints"].items()]
+
+        for name, count in summary["counters"].items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {count}"]
+        gauges = [("bytes_sent", summary["bytes_sent"]),
+                  ("blocks_per_second", summary["blocks_per_second"]),
+                  ("elapsed_seconds", summary["elapsed_seconds"]),
+                  ("last_run_timestamp_seconds", round(self.started_at.timestamp(), 3))]
+        if "success" in summary:
+            gauges.append(("success", int(bool(summary["success"]))))
+        for name, value in gauges:
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, **extra) -> None:
+        """Write atomically: Prometheus text for *.prom, JSON otherwise
+
+        Args:
+            path: Output file
+            **extra: Additional top-level fields (e.g. success, reports)
+        """
+        path = Path(path)
+        if path.suffix == ".prom":
+            text = self.to_prometheus(**extra)
+        else:
+            text = json.dumps(self.summary(**extra), indent=2) + "\n"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def format_phases(self) -> str:
+        """One-line human-readable phase breakdown"""
+        with self._lock:
+            return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+
+
+def _request_bytes(response) -> int:
+    """Size of the body that was sent for a response's request"""
+    body = getattr(getattr(response, "request", None), "body", None)
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    return len(body) if body else 0
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def encode_json(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(data: bytes):
+    """Parse UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class RichText:
+    """One run of text with a single link and set of annotations
+
+    Instances are immutable and shared: the inline parser caches them, so
+    a phrase repeated across table cells is stored once.
+    """
+
+    __slots__ = ("content", "url", "annotations")
+
+    def __init__(self, content: str, url: Optional[str] = None, annotations: Tuple[str, ...] = ()):
+        self.content = content
+        self.url = url
+        self.annotations = annotations
+
+    def to_json(self) -> Dict:
+        """Lower to a Notion rich text dict"""
+        segment = {
+            "type": "text",
+            "text": {"content": self.content}
+        }
+        if self.url:
+            segment["text"]["link"] = {"url": self.url}
+        if self.annotations:
+            segment["annotations"] = {flag: True for flag in self.annotations}
+        return segment
+
+
+class Block:
+    """Converted block, lowered to Notion's JSON shape only when sent
+
+    Subclasses keep just the fields the converter sets, in __slots__,
+    instead of the nested dicts the API expects. That keeps 1,000+ block
+    reports small in memory until each batch is encoded.
+    """
+
+    __slots__ = ()
+    block_type = ""
+
+    @property
+    def element_count(self) -> int:
+        """Blocks this one adds to a request, nested children included"""
+        return 1
+
+    def _body(self) -> Dict:
+        raise NotImplementedError
+
+    def to_json(self) -> Dict:
+        """Lower to a Notion block dict"""
+        block_type = self.block_type
+        return {
+            "object": "block",
+            "type": block_type,
+            block_type: self._body()
+        }
+
+
+class Paragraph(Block):
+    __slots__ = ("rich_text",)
+    block_type = "paragraph"
+
+    def __init__(self, rich_text: Tuple[RichText, ...]):
+        self.rich_text = rich_text
+
+    def _body(self) -> Dict:
+        return {"rich_text": [run.to_json() for run in self.rich_text]}
+
+
+class Heading(Block):
+    __slots__ = ("level", "rich_text")
+
+    def __init__(self, level: int, rich_text: Tuple[RichText, ...]):
+        self.level = level
+        self.rich_text = rich_text
+
+    @property
+    def block_type(self) -> str:
+        return f"heading_{self.level}"
+
+    def _body(self) -> Dict:
+        return {"rich_text": [run.to_json() for run in self.rich_text]}
+
+
+class ListItem(Block):
+    __slots__ = ("numbered", "rich_text")
+
+    def __init__(self, rich_text: Tuple[RichText, ...], numbered: bool = False):
+        self.rich_text = rich_text
+        self.numbered = numbered
+
+    @property
+    def block_type(self) -> str:
+        return "numbered_list_item" if self.numbered else "bulleted_list_item"
+
+    def _body(self) -> Dict:
+        return {"rich_text": [run.to_json() for run in self.rich_text]}
+
+
+class TableRow(Block):
+    __slots__ = ("cells",)
+    block_type = "table_row"
+
+    def __init__(self, cells: List[Tuple[RichText, ...]]):
+        self.cells = cells
+
+    def _body(self) -> Dict:
+        return {"cells": [[run.to_json() for run in cell] for cell in self.cells]}
+
+
+class Table(Block):
+    __slots__ = ("width", "has_column_header", "rows")
+    block_type = "table"
+
+    def __init__(self, width: int, has_column_header: bool, rows: List[TableRow]):
+        self.width = width
+        self.has_column_header = has_column_header
+        self.rows = rows
+
+    @property
+    def element_count(self) -> int:
+        return 1 + len(self.rows)
+
+    def with_rows(self, rows: List[TableRow]) -> "Table":
+        """Copy of this table holding only the given rows"""
+        return Table(self.width, self.has_column_header, rows)
+
+    def _body(self) -> Dict:
+        return {
+            "table_width": self.width,
+            "has_column_header": self.has_column_header,
+            "has_row_header": False,
+            "children": [row.to_json() for row in self.rows]
+        }
+
+
+def encode_block(block: Union[Block, Dict]) -> bytes:
+    """Serialize one block (model or dict) for an append request"""
+    return encode_json(block.to_json() if isinstance(block, Block) else block)
+
+
+def _children_body(encoded: List[bytes], after: Optional[str] = None) -> bytes:
+    """Assemble an append-children request body from pre-encoded blocks"""
+    body = b'{"children":[' + b",".join(encoded) + b"]"
+    if after:
+        body += b',"after":' + encode_json(after)
+    return body + b"}"
+
+
+def _opens_italic(text: str, i: int) -> bool:
+    """Check whether the * or _ at text[i] starts an italic span
+
+    The marker must be followed by a non-space character and closed later
+    by the same marker after a non-space character. Underscores only
+    count at word boundaries, so snake_case names stay literal.
+    """
+    marker = text[i]
+    if i + 1 >= len(text) or text[i + 1].isspace():
+        return False
+    if marker == '_' and i > 0 and text[i - 1].isalnum():
+        return False
+    j = text.find(marker, i + 2)
+    while j != -1:
+        if not text[j - 1].isspace() and (marker == '*' or j + 1 == len(text)
+                                          or not text[j + 1].isalnum()):
+            return True
+        j = text.find(marker, j + 1)
+    return False
+
+
+@functools.lru_cache(maxsize=INLINE_CACHE_SIZE)
+def _scan_inline(text: str) -> Tuple[RichText, ...]:
+    """Split inline markdown into RichText runs
+
+    One left-to-right pass with bold/italic state: ** toggles bold (an
+    unmatched ** still toggles, as it always has), *x* and _x_ are italic,
+    `x` is inline code taken literally, and [text](url) becomes a link
+    carrying the current annotations. Runs longer than MAX_TEXT_LENGTH
+    are split. Runs are immutable so they can be memoized; repeated
+    table cells and citation phrases are only scanned once.
+    """
+    runs = []
+    pending = []  # plain text waiting for the formatting state to change
+    bold = False
+    italic = None  # marker that opened the current italic span
+
+    def annotations(*extra: str) -> Tuple[str, ...]:
+        return (("bold",) if bold else ()) + (("italic",) if italic else ()) + extra
+
+    def emit(content: str, url: Optional[str], flags: Tuple[str, ...]) -> None:
+        for k in range(0, len(content), MAX_TEXT_LENGTH):
+            runs.append(RichText(content[k:k + MAX_TEXT_LENGTH], url, flags))
+
+    def flush() -> None:
+        if pending:
+            emit("".join(pending), None, annotations())
+            pending.clear()
+
+    i = 0
+    n = len(text)
+    while i < n:
+        match = INLINE_SPECIAL_RE.search(text, i)
+        if not match:
+            pending.append(text[i:])
+            break
+        if match.start() > i:
+            pending.append(text[i:match.start()])
+            i = match.start()
+
+        ch = text[i]
+        if text.startswith('**', i):
+            flush()
+            bold = not bold
+            i += 2
+        elif ch == italic and not text[i - 1].isspace() and (
+                ch == '*' or i + 1 == n or not text[i + 1].isalnum()):
+            flush()
+            italic = None
+            i += 1
+        elif ch in '*_' and not italic and _opens_italic(text, i):
+            flush()
+            italic = ch
+            i += 1
+        elif ch == '`' and text.find('`', i + 1) > i + 1:
+            end = text.find('`', i + 1)
+            flush()
+            emit(text[i + 1:end], None, annotations("code"))
+            i = end + 1
+        elif ch == '[' and LINK_RE.match(text, i):
+            link = LINK_RE.match(text, i)
+            flush()
+            emit(link.group(1), link.group(2), annotations())
+            i = link.end()
+        else:
+            pending.append(ch)
+            i += 1
+
+    flush()
+    return tuple(runs)
+
+
+def _html_attr(attrs: str, name: str) -> Optional[str]:
+    """Value of one attribute in a start tag's attribute text, or None"""
+    for attr, double, single, bare in HTML_ATTR_RE.findall(attrs):
+        if attr.lower() == name:
+            value = double or single or bare
+            return html.unescape(value) if '&' in value else value
+    return None
+
+
+def _html_cell_markdown(content: str) -> str:
+    """Turn a table cell's inner HTML into inline markdown
+
+    <b>/<strong>, <i>/<em>, <code> and <a href> become their markdown
+    equivalents, <br> a newline; other tags are dropped. Entities are
+    decoded and whitespace is collapsed as a browser would.
+    """
+    if '<' in content:
+        parts = []
+        links = []  # href of each open <a>
+        for match in HTML_INLINE_TOKEN_RE.finditer(content):
+            closing, tag, attrs, data = match.groups()
+            if data is not None:
+                parts.append(data)
+                continue
+            tag = (tag or "").lower()
+            if tag in HTML_INLINE_MARKUP:
+                parts.append(HTML_INLINE_MARKUP[tag])
+            elif tag == "a" and not closing:
+                links.append(_html_attr(attrs, "href"))
+                if links[-1]:
+                    parts.append("[")
+            elif tag == "a" and links:
+                href = links.pop()
+                if href:
+                    parts.append(f"]({href})")
+            elif tag == "br":
+                parts.append(HTML_LINE_BREAK)
+        content = ''.join(parts)
+    if '&' in content:
+        content = html.unescape(content)
+    if HTML_LINE_BREAK in content:
+        return '\n'.join(' '.join(line.split()) for line in content.split(HTML_LINE_BREAK)).strip()
+    return ' '.join(content.split())
+
+
+def _html_table_rows(markup: str) -> Tuple[List[List[str]], bool]:
+    """Extract the cells of an HTML table in one regex pass
+
+    Each cell (<td> or <th>) is matched whole, up to its end tag or,
+    when that is omitted, the next cell, row or table tag. colspan adds
+    empty cells so columns stay aligned.
+
+    Args:
+        markup: HTML table string
+
+    Returns:
+        (rows as lists of cell markdown strings, has_header) where
+        has_header comes from <table header-row="true"> or a first row
+        made only of <th> cells
+    """
+    rows = []
+    row = None
+    first_row_all_th = True
+    has_header = False
+
+    for match in HTML_TABLE_TOKEN_RE.finditer(markup):
+        cell_tag, cell_attrs, content, closing, tag, attrs = match.groups()
+        if cell_tag:
+            if row is None:
+                row = []
+            row.append(_html_cell_markdown(content))
+            if cell_attrs.strip():
+                span = (_html_attr(cell_attrs, "colspan") or "").strip()
+                if span.isdigit() and int(span) > 1:
+                    row.extend([""] * (int(span) - 1))
+            if not rows and cell_tag.lower() == "td":
+                first_row_all_th = False
+            continue
+
+        if row:
+            rows.append(row)
+        row = [] if tag.lower() == "tr" and not closing else None
+        if not closing and tag.lower() == "table" and (_html_attr(attrs, "header-row") or "").lower() == "true":
+            has_header = True
+
+    if row:
+        rows.append(row)
+    return rows, has_header or (bool(rows) and first_row_all_th)
+
+
+def _canonical_rich_text(rich_text: List[Dict]) -> List[List]:
+    """Reduce rich text to [content, link_url, [annotations]] runs
+
+    Accepts both outgoing segments and segments returned by the API
+    (which add plain_text, href and every annotation flag). Adjacent runs
+    with identical formatting are merged so segmentation differences
+    don't affect the result.
+    """
+    runs = []
+    for segment in rich_text:
+        text = segment.get("text") or {}
+        content = text.get("content", segment.get("plain_text", ""))
+        link = (text.get("link") or {}).get("url")
+        annotations = sorted(name for name, value in (segment.get("annotations") or {}).items()
+                             if value is True)
+        if runs and runs[-1][1] == link and runs[-1][2] == annotations:
+            runs[-1][0] += content
+        elif content:
+            runs.append([content, link, annotations])
+    return runs
+
+
+def block_fingerprint(block: Dict) -> str:
+    """Stable content hash of a Notion block
+
+    Outgoing blocks and the same blocks read back from the API produce the
+    same fingerprint. Tables include their rows (read-back tables must have
+    their rows attached under table.children). Unsupported block types hash
+    by ID, so they never match new content.
+
+    Args:
+        block: Notion block dict
+
+    Returns:
+        Hex digest string
+    """
+    block_type = block.get("type")
+    body = block.get(block_type) or {}
+
+    if block_type == "table":
+        canonical = [
+            block_type,
+            body.get("table_width"),
+            bool(body.get("has_column_header")),
+            bool(body.get("has_row_header")),
+            [[_canonical_rich_text(cell) for cell in row.get("table_row", {}).get("cells", [])]
+             for row in body.get("children", [])]
+        ]
+    elif "rich_text" in body:
+        canonical = [block_type, _canonical_rich_text(body["rich_text"])]
+    else:
+        canonical = [block_type, block.get("id")]
+
+    encoded = json.dumps(canonical, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _error_message(response: "requests.Response") -> str:
+    """Extract Notion's error message from a failed response"""
+    try:
+        return response.json().get("message") or f"HTTP {response.status_code}"
+    except ValueError:
+        return f"HTTP {response.status_code}"
+
+
+def count_block_elements(block: Union[Block, Dict]) -> int:
+    """Count a block plus all nested children (e.g. table rows)"""
+    if isinstance(block, Block):
+        return block.element_count
+    body = block.get(block.get("type")) or {}
+    return 1 + sum(count_block_elements(child) for child in body.get("children", ()))
+
+
+def _fallback_paragraph(block: Dict) -> Paragraph:
+    """Plain-text stand-in for a block Notion rejected
+
+    Keeps the block's text (table cells included) but drops links,
+    formatting and structure, which is where invalid content usually
+    hides (e.g. a link URL Notion won't accept).
+
+    Args:
+        block: Notion block dict
+
+    Returns:
+        Paragraph model, with text split to Notion's segment limits
+    """
+    texts = []
+
+    def collect(node) -> None:
+        if isinstance(node, dict):
+            if "rich_text" in node or "cells" in node:
+                for rich_text in [node.get("rich_text", [])] + list(node.get("cells", [])):
+                    texts.append("".join((run.get("text") or {}).get("content", "") for run in rich_text))
+            for key, value in node.items():
+                if key not in ("rich_text", "cells"):
+                    collect(value)
+        elif isinstance(node, list):
+            for item in node:
+                collect(item)
+
+    collect(block)
+    text = " ".join(t for t in texts if t)
+    runs = tuple(RichText(text[k:k + MAX_TEXT_LENGTH])
+                 for k in range(0, len(text), MAX_TEXT_LENGTH))[:MAX_RICH_TEXT]
+    return Paragraph(runs or (RichText(""),))
+
+
+def _is_size_error(status_code: int, message: str) -> bool:
+    """Check whether Notion rejected a request for being too large"""
+    if status_code == 413:
+        return True
+    return status_code == 400 and bool(SIZE_ERROR_RE.search(message))
+
+
+class UploadJournal:
+    """On-disk checkpoint of acknowledged upload batches
+
+    One small JSON file per page_id + content hash records how many blocks
+    have been acknowledged and the ID of the last one, so an interrupted
+    upload can continue after that block instead of starting over. It also
+    lists acknowledged tables whose deferred rows haven't all been
+    confirmed, so a resumed upload can finish them.
+    """
+
+    def __init__(self, journal_dir: Path, page_id: str, content_hash: str):
+        """Initialize journal (nothing is read until load())
+
+        Args:
+            journal_dir: Directory holding journal files
+            page_id: Notion page UUID
+            content_hash: Hash of the markdown content being uploaded
+        """
+        self.page_id = page_id
+        self.content_hash = content_hash
+        self.path = Path(journal_dir) / f"{page_id}-{content_hash[:16]}.json"
+        self.acked_blocks = 0
+        self.last_block_id = None
+        self.tables: Dict[int, str] = {}  # block index → ID of a table with rows still pending
+
+    def load(self) -> bool:
+        """Read a previous checkpoint for this page and content
+
+        Returns:
+            True if a usable checkpoint was found, False otherwise
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+
+        if data.get("page_id") != self.page_id or data.get("content_hash") != self.content_hash:
+            return False
+
+        self.acked_blocks = int(data.get("acked_blocks", 0))
+        self.last_block_id = data.get("last_block_id")
+        self.tables = {int(index): table_id for index, table_id in (data.get("tables") or {}).items()}
+        return self.acked_blocks > 0
+
+    def record(self, acked_blocks: int, last_block_id: Optional[str]) -> None:
+        """Atomically persist a new checkpoint
+
+        Args:
+            acked_blocks: Number of leading blocks confirmed on the page
+            last_block_id: ID of the last confirmed block
+        """
+        self.acked_blocks = acked_blocks
+        self.last_block_id = last_block_id
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".journal-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "page_id": self.page_id,
+                    "content_hash": self.content_hash,
+                    "acked_blocks": acked_blocks,
+                    "last_block_id": last_block_id,
+                    "tables": {str(index): table_id for index, table_id in self.tables.items()},
+                    "updated_at": time.time()
+                }, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def remove(self) -> None:
+        """Delete the checkpoint once the upload is complete"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.acked_blocks = 0
+        self.last_block_id = None
+        self.tables = {}
+
+
+class ConversionCache:
+    """Content-addressed on-disk cache of converted markdown chunks
+
+    Maps a hash of each chunk (header level, title and body) plus
+    CONVERTER_VERSION to the chunk's Notion blocks as JSON, so re-uploading
+    a mostly unchanged report skips converting the unchanged sections.
+    Files are written atomically and reads refresh their mtime; once the
+    directory grows past max_bytes the least recently used files are
+    evicted. Safe to share between threads and between processes.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        """Initialize cache (the directory is created on first write)
+
+        Args:
+            cache_dir: Directory holding cache files
+            max_bytes: Size the cache is trimmed back to after writes
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._size = None  # estimated directory size; scanned on first write
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(chunk: Dict) -> str:
+        """Cache key for a chunk from chunk_markdown_by_headers"""
+        encoded = json.dumps([CONVERTER_VERSION, chunk["header_level"], chunk["title"], chunk["content"]],
+                             ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached blocks for a key, or None on a miss
+
+        Args:
+            key: Value from key()
+
+        Returns:
+            List of Notion block dicts, or None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                blocks = decode_json(f.read())
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            return None  # unreadable entries are overwritten by the next put()
+        return blocks if isinstance(blocks, list) else None
+
+    def put(self, key: str, blocks: List[Dict]) -> None:
+        """Atomically store a chunk's blocks, evicting old entries if needed
+
+        Args:
+            key: Value from key()
+            blocks: Notion block dicts for the chunk
+        """
+        path = self._path(key)
+        data = encode_json(blocks)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".cache-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """(mtime, size, path) of every cache file"""
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # evicted by another worker
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache fits max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+
+class BlockBundle:
+    """Notion blocks compiled ahead of time, stored as NDJSON
+
+    The first line is a JSON header (format, version, converter and API
+    versions, source file and its hash, company_url, block count, total
+    bytes and a digest of every block). Each following line holds one
+    top-level block as {"sha256", "bytes", "block"}, where sha256 and
+    bytes cover the block's exact JSON encoding. Pushing a bundle only
+    reads JSON; the markdown is never parsed again, and a corrupt or
+    truncated file is caught by the hashes before anything is sent.
+    """
+
+    def __init__(self, path: Path):
+        """Open a bundle and validate its header
+
+        Args:
+            path: Bundle file written by write()
+
+        Raises:
+            OSError if the file can't be read
+            ValueError if it isn't a bundle of a supported version
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            first = f.readline()
+        try:
+            header = decode_json(first)
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"{self.path.name} is not a block bundle")
+        if header.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"{self.path.name} has bundle version {header.get('version')}; "
+                             f"this script reads version {BUNDLE_VERSION}")
+        self.header = header
+        self.block_count = header["blocks"]
+        self.digest = header["sha256"]
+
+    @staticmethod
+    def write(path: Path, blocks: Iterable[Union[Block, Dict]], **meta) -> Dict:
+        """Encode blocks and atomically write them as a bundle
+
+        Args:
+            path: Output file
+            blocks: Block models or Notion block dicts, in page order
+            **meta: Extra header fields (source, source_sha256, company_url)
+
+        Returns:
+            The header dict
+        """
+        lines = []
+        digest = hashlib.sha256()
+        total = 0
+        for block in blocks:
+            encoded = encode_block(block)
+            block_hash = hashlib.sha256(encoded).hexdigest()
+            digest.update(block_hash.encode("ascii"))
+            total += len(encoded)
+            lines.append(b'{"sha256":"%s","bytes":%d,"block":%s}\n'
+                         % (block_hash.encode("ascii"), len(encoded), encoded))
+
+        header = {
+            "format": BUNDLE_FORMAT,
+            "version": BUNDLE_VERSION,
+            "converter_version": CONVERTER_VERSION,
+            "notion_version": NOTION_API_VERSION,
+            **meta,
+            "blocks": len(lines),
+            "bytes": total,
+            "sha256": digest.hexdigest(),
+            "compiled_at": datetime.now(timezone.utc).isoformat()
+        }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".bundle-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encode_json(header) + b"\n")
+                f.writelines(lines)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return header
+
+    def _encoded_blocks(self) -> Iterator[bytes]:
+        """Each block's JSON bytes, checked against its line's hash and size
+
+        Raises:
+            ValueError on a corrupt, truncated or padded bundle
+        """
+        digest = hashlib.sha256()
+        count = 0
+        with open(self.path, 'rb') as f:
+            f.readline()  # header
+            for line_no, line in enumerate(f, 2):
+                match = BUNDLE_LINE_RE.match(line)
+                line = line.rstrip(b"\r\n")
+                if not match or not line.endswith(b"}"):
+                    raise ValueError(f"{self.path.name} line {line_no}: not a block line")
+                encoded = line[match.end():-1]
+                block_hash = hashlib.sha256(encoded).hexdigest()
+                if len(encoded) != int(match.group(2)) or block_hash != match.group(1).decode("ascii"):
+                    raise ValueError(f"{self.path.name} line {line_no}: block doesn't match its hash")
+                digest.update(block_hash.encode("ascii"))
+                count += 1
+                yield encoded
+        if count != self.block_count or digest.hexdigest() != self.digest:
+            raise ValueError(f"{self.path.name}: expected {self.block_count} blocks, found {count} "
+                             f"(truncated or edited bundle)")
+
+    def verify(self) -> None:
+        """Check every block hash without decoding the blocks
+
+        Raises:
+            ValueError if the bundle is corrupt or incomplete
+        """
+        for _ in self._encoded_blocks():
+            pass
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Stream the Notion block dicts, verifying each one"""
+        for encoded in self._encoded_blocks():
+            yield decode_json(encoded)
+
+
+class BlockStream:
+    """Run a block generator on a background thread
+
+    Conversion is CPU work and uploading is network wait, so running the
+    converter on its own thread lets the first batch go out while later
+    sections are still being parsed. At most max_buffered blocks are held
+    between the two, so memory stays flat however long the report is.
+    Exceptions raised by the generator are re-raised in the consumer.
+    """
+
+    _END = object()
+
+    def __init__(self, blocks: Iterable[Block], max_buffered: int = STREAM_BUFFER_BLOCKS):
+        """Initialize stream (the producer thread starts on start() or first iteration)
+
+        Args:
+            blocks: Block generator, e.g. NotionUploader.iter_notion_blocks()
+            max_buffered: Blocks converted ahead of the consumer
+        """
+        self.count = 0
+        self.convert_seconds = 0.0  # producer time spent converting (not waiting)
+        self._source = blocks
+        self._queue = queue.Queue(maxsize=max_buffered)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._start_lock = threading.Lock()
+
+    def _put(self, item) -> bool:
+        """Queue an item, giving up if the consumer has gone away"""
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self) -> None:
+        source = iter(self._source)
+        try:
+            while True:
+                started = time.monotonic()
+                block = next(source, self._END)
+                self.convert_seconds += time.monotonic() - started
+                if block is self._END:
+                    break
+                if not self._put(block):
+                    return
+        except BaseException as e:  # handed to the consumer thread
+            self._put(e)
+        self._put(self._END)
+
+    def start(self) -> None:
+        """Start converting ahead of the consumer (idempotent)"""
+        with self._start_lock:
+            if self._thread.ident is None:
+                self._thread.start()
+
+    def __iter__(self) -> Iterator[Block]:
+        self.start()
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            self.count += 1
+            yield item
+
+    def close(self) -> None:
+        """Stop the producer if the consumer finished early"""
+        self._stopped.set()
+
+
+class TaskGraph:
+    """Run dependent tasks concurrently, each as soon as its dependencies finish
+
+    Independent steps (e.g. converting while the page is cleared, or
+    setting the icon while content uploads) overlap, so a run takes as long
+    as its longest dependency chain instead of the sum of its steps. Tasks
+    must be added after the tasks they depend on, which keeps the graph
+    acyclic. If a task raises, nothing new is started, and the first
+    exception is re-raised once running tasks have finished.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+        self.results: Dict[str, object] = {}
+        self.timings: Dict[str, Tuple[float, float]] = {}  # name -> (start, end), time.monotonic()
+
+    def add(self, name: str, task: Callable, after: Iterable[str] = ()) -> None:
+        """Register a task
+
+        Args:
+            name: Unique task name (its result is stored under it)
+            task: Callable taking no arguments
+            after: Names of tasks that must finish first
+        """
+        after = tuple(after)
+        if name in self._tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        unknown = [dep for dep in after if dep not in self._tasks]
+        if unknown:
+            raise ValueError(f"Task {name} depends on unknown task(s): {', '.join(unknown)}")
+        self._tasks[name] = (task, after)
+
+    def _run_task(self, name: str):
+        task, _ = self._tasks[name]
+        started = time.monotonic()
+        try:
+            return task()
+        finally:
+            self.timings[name] = (started, time.monotonic())
+
+    def run(self) -> Dict[str, object]:
+        """Run every task, starting each one as its dependencies complete
+
+        Returns:
+            {task name: return value} dict
+
+        Raises:
+            The first exception raised by a task
+        """
+        pending = dict(self._tasks)
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=max(len(self._tasks), 1)) as pool:
+            while pending or running:
+                if error is None:
+                    ready = [name for name, (_, after) in pending.items()
+                             if all(dep in self.results for dep in after)]
+                    for name in ready:
+                        del pending[name]
+                        running[pool.submit(self._run_task, name)] = name
+                else:
+                    pending.clear()
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except BaseException as e:
+                        error = error or e
+
+        if error is not None:
+            raise error
+        return self.results
 
 
 class NotionUploader:
     """Handles uploading markdown content to Notion pages via API"""
 
-    def __init__(self, api_key: str, page_id: str):
+    def __init__(self, api_key: Optional[str], page_id: Optional[str],
+                 rate_limiter: Optional[TokenBucket] = None, verbose: bool = True,
+                 max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+                 concurrency: Optional[AdaptiveConcurrency] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 transport: Optional["NotionTransport"] = None,
+                 defer_table_rows: bool = False, metrics: Optional[Metrics] = None,
+                 cache: Optional[ConversionCache] = None):
         """Initialize uploader with API credentials
 
         Args:
-            api_key: Notion integration token (ntn_xxx format)
-            page_id: Notion page UUID
+            api_key: Notion integration token (ntn_xxx format), or None for
+                an offline converter that makes no API calls (see compile)
+            page_id: Notion page UUID (None when converting offline)
+            rate_limiter: Shared limiter for all API calls (default: private
+                bucket at DEFAULT_RATE_LIMIT)
+            verbose: Print progress output
+            max_batch_bytes: JSON byte budget per append request
+            concurrency: Shared AIMD in-flight limit (default: private controller)
+            retry_policy: Retry/backoff policy for every API call
+            transport: HTTP transport for every API call (default: pooled
+                NotionTransport for api_key); any object with a compatible
+                request() method can be injected, e.g. to target a local
+                stand-in server
+            defer_table_rows: Create tables with only their first row and
+                append the rest concurrently once the table exists
+            metrics: Shared Metrics for phase timings and request stats
+                (default: private instance)
+            cache: Conversion cache for markdown chunks (default: none)
         """
         self.api_key = api_key
         self.page_id = page_id
-        self.headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "Notion-Version": NOTION_API_VERSION
-        }
+        if transport is None and api_key is not None:
+            transport = NotionTransport(api_key)
+        self.transport = transport
+        self.rate_limiter = rate_limiter or TokenBucket(DEFAULT_RATE_LIMIT)
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.verbose = verbose
+        self.metrics = metrics or Metrics()
+        self.request_count = 0
+        self.retry_count = 0
+        self.clear_stats = {"deleted": 0, "failed": 0, "retried": 0}
+        self.sync_stats = {"kept": 0, "updated": 0, "inserted": 0, "deleted": 0}
+        self.split_stats = {"pages": 0, "failed_pages": 0}
+        self.cache = cache
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self.quarantine = []  # {index, error, block} for blocks replaced by plain text
+        self.last_block_id = None
+        self.max_batch_blocks = MAX_BATCH_BLOCKS
+        self.max_batch_bytes = max_batch_bytes
+        self.defer_table_rows = defer_table_rows
+        self._count_lock = threading.Lock()
+        self._log_local = threading.local()
+
+    def log(self, *args, **kwargs) -> None:
+        """Print progress output unless running quietly"""
+        if self.verbose:
+            buffer = getattr(self._log_local, "buffer", None)
+            if buffer is not None:
+                kwargs.pop("flush", None)
+                print(*args, file=buffer, **kwargs)
+            else:
+                print(*args, **kwargs)
+
+    @contextlib.contextmanager
+    def captured_log(self):
+        """Collect this thread's progress output instead of printing it
+
+        Used for tasks running alongside another task's progress lines.
+
+        Yields:
+            io.StringIO holding the captured output
+        """
+        buffer = io.StringIO()
+        self._log_local.buffer = buffer
+        try:
+            yield buffer
+        finally:
+            self._log_local.buffer = None
+
+    def _log_retry(self, attempt: int, max_attempts: int) -> None:
+        """Show an inline retry marker on the current progress line"""
+        self.log(f"(retry {attempt}/{max_attempts - 1}) ", end="", flush=True)
+
+    def _request(self, method: str, path: str, on_retry=None, **kwargs) -> "requests.Response":
+        """Send one Notion API request with the shared retry policy
+
+        Every attempt waits for the adaptive concurrency limit and the
+        rate limiter. Retryable failures (see RetryPolicy) are retried
+        with backoff; a 429 also pauses all workers sharing the
+        concurrency controller.
+
+        Args:
+            method: HTTP method
+            path: API path relative to the transport's base URL
+            on_retry: Optional callback(attempt, max_attempts) before each retry
+            **kwargs: Passed through to the transport (json, params, timeout, ...)
+
+        Returns:
+            requests.Response (the last one, if every attempt failed)
+
+        Raises:
+            requests.exceptions.RequestException if the last attempt raised
+        """
+        policy = self.retry_policy
+        endpoint = _endpoint_label(method, path)
+
+        for attempt in range(policy.max_attempts):
+            self.concurrency.acquire()
+            throttled = False
+            try:  # the slot is shared by every worker, so release it whatever is raised
+                self.rate_limiter.acquire()
+                with self._count_lock:
+                    self.request_count += 1
+
+                response = None
+                started = time.monotonic()
+                try:
+                    response = self.transport.request(method, path, **kwargs)
+                except requests.exceptions.RequestException:
+                    self.metrics.observe_request(endpoint, "error", time.monotonic() - started)
+                    if attempt == policy.max_attempts - 1:
+                        raise
+                else:
+                    self.metrics.observe_request(endpoint, response.status_code, time.monotonic() - started,
+                                                 _request_bytes(response))
+                    throttled = response.status_code == 429
+                    if not policy.is_retryable(response.status_code) or attempt == policy.max_attempts - 1:
+                        return response
+            finally:
+                self.concurrency.release(throttled=throttled)
+
+            delay = policy.delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                self.concurrency.pause(delay)
+            with self._count_lock:
+                self.retry_count += 1
+            self.metrics.observe_retry(endpoint)
+            if on_retry:
+                on_retry(attempt + 1, policy.max_attempts)
+            time.sleep(delay)
+
+        return response
 
     def chunk_markdown_by_headers(self, content: str) -> List[Dict]:
         """Split markdown into chunks by headers
@@ -51,519 +1601,1236 @@ class NotionUploader:
         2000 characters, splits at paragraph boundaries.
 
         Args:
-            content: Full markdown report content
+            content: Full markdown report content
+
+        Returns:
+            List of {header_level, title, content} dicts
+        """
+        return list(self.iter_chunks(content))
+
+    def iter_chunks(self, content: str):
+        """Lazily split markdown into chunks by headers
+
+        Single scan for H1/H2 header lines; section bodies are addressed by
+        offset and only sliced once per emitted chunk.
+
+        Args:
+            content: Full markdown report content
+
+        Yields:
+            {header_level, title, content} dicts (see chunk_markdown_by_headers)
+        """
+        headers = HEADER_RE.finditer(content)
+        header = next(headers, None)
+
+        # Handle any preamble text before the first header
+        preamble = content[:header.start() if header else len(content)].strip()
+        if preamble:
+            yield {"header_level": 1, "title": "", "content": preamble}
+
+        while header:
+            next_header = next(headers, None)
+            header_line = header.group(1)
+            body_start = header.end()
+            body_end = next_header.start() if next_header else len(content)
+
+            header_level = len(header_line) - len(header_line.lstrip('#'))
+            title = header_line.lstrip('#').strip()
+
+            # If body is too large, split at paragraph boundaries.
+            # Only the first sub-chunk gets the title; subsequent ones omit it
+            # to avoid duplicate headers in Notion.
+            if body_end - body_start > 2000:
+                first_chunk = True
+                for chunk_start, chunk_end in self._split_body(content, body_start, body_end):
+                    yield {
+                        "header_level": header_level,
+                        "title": title if first_chunk else "",
+                        "content": content[chunk_start:chunk_end].strip()
+                    }
+                    first_chunk = False
+            else:
+                yield {
+                    "header_level": header_level,
+                    "title": title,
+                    "content": content[body_start:body_end].strip()
+                }
+            header = next_header
+
+    @staticmethod
+    def _split_body(content: str, start: int, end: int):
+        """Group a section body's paragraphs into pieces of about 2000 chars
+
+        Paragraphs are the blank-line-separated runs of content[start:end].
+        Each piece is greedily filled until adding the next paragraph
+        would exceed 2000 characters (separators not counted).
+
+        Yields:
+            (piece_start, piece_end) offsets into content
+        """
+        piece_start = piece_end = start
+        piece_len = 0
+        pos = start
+
+        while pos <= end:
+            para_end = content.find('\n\n', pos, end)
+            if para_end == -1:
+                para_end = end
+            para_len = para_end - pos
+
+            if piece_len + para_len > 2000:
+                if piece_len:
+                    yield piece_start, piece_end
+                piece_start, piece_end, piece_len = pos, para_end, para_len
+            elif piece_len:
+                piece_end = para_end
+                piece_len += 2 + para_len
+            else:
+                piece_start, piece_end, piece_len = pos, para_end, para_len
+
+            pos = para_end + 2
+
+        if piece_len:
+            yield piece_start, piece_end
+
+    def markdown_to_notion_blocks(self, chunk: Dict) -> List[Dict]:
+        """Convert markdown chunk to Notion block format
+
+        Handles: headers, paragraphs, links, bold, lists, tables
+
+        Args:
+            chunk: {header_level, title, content} dict
+
+        Returns:
+            List of Notion block dicts
+        """
+        return [block if isinstance(block, dict) else block.to_json()
+                for block in self._convert_chunk(chunk)]
+
+    def iter_notion_blocks(self, content: str):
+        """Convert a full markdown report to Notion blocks in one pass
+
+        Equivalent to chunking with chunk_markdown_by_headers and
+        converting each chunk, without materializing either list.
+
+        Args:
+            content: Full markdown report content
+
+        Yields:
+            Block models (lowered to Notion dicts by to_json()), or block
+            dicts for chunks served from the conversion cache
+        """
+        for chunk in self.iter_chunks(content):
+            yield from self._convert_chunk(chunk)
+
+    def _convert_chunk(self, chunk: Dict) -> Iterable:
+        """Convert one chunk, going through the conversion cache if there is one
+
+        Args:
+            chunk: {header_level, title, content} dict
+
+        Returns:
+            Block dicts (cache hit) or Block models
+        """
+        if self.cache is None:
+            return self.iter_chunk_blocks(chunk)
+
+        key = ConversionCache.key(chunk)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache_stats["hits"] += 1
+            self.metrics.incr("cache_hits")
+            return cached
+
+        self.cache_stats["misses"] += 1
+        self.metrics.incr("cache_misses")
+        blocks = list(self.iter_chunk_blocks(chunk))
+        try:
+            self.cache.put(key, [block.to_json() for block in blocks])
+        except OSError as e:
+            self.log(f"   (conversion cache write failed: {str(e)})")
+        return blocks
+
+    def iter_chunk_blocks(self, chunk: Dict):
+        """Lazily convert one markdown chunk to Notion blocks
+
+        Walks the chunk line by line, grouping lines into paragraphs at
+        blank lines. Sub-headers (### and deeper) always form their own
+        paragraph: without this, a ### heading followed immediately by
+        bullets (no blank line) would collapse into a single paragraph and
+        the entire block would be emitted as a heading in Notion.
+
+        Args:
+            chunk: {header_level, title, content} dict
+
+        Yields:
+            Block models
+        """
+        # Add header for this section
+        if chunk["title"]:
+            yield Heading(chunk["header_level"], (RichText(chunk["title"]),))
+
+        lines = chunk["content"].split('\n')
+        para_lines = []
+        header_end = -1  # index of the last line of the current sub-header
+
+        for i, line in enumerate(lines):
+            if i > header_end and self._is_subheader_start(line, i == len(lines) - 1):
+                # The sub-header runs to the first line with content (usually
+                # this one; a bare "###" picks up the following line)
+                header_end = i
+                if not line.lstrip('#').strip():
+                    header_end = next((j for j in range(i + 1, len(lines)) if lines[j].strip()), i)
+                if para_lines:
+                    yield from self._paragraph_to_blocks(para_lines)
+                    para_lines = []
+
+            if line:
+                para_lines.append(line)
+            elif para_lines:
+                yield from self._paragraph_to_blocks(para_lines)
+                para_lines = []
+
+            if i == header_end and para_lines:
+                yield from self._paragraph_to_blocks(para_lines)
+                para_lines = []
+
+        if para_lines:
+            yield from self._paragraph_to_blocks(para_lines)
+
+    @staticmethod
+    def _is_subheader_start(line: str, is_last: bool) -> bool:
+        """Check whether a content line opens a ### (or deeper) sub-header
+
+        Args:
+            line: One line of stripped chunk content
+            is_last: Whether this is the last line of the chunk
+
+        Returns:
+            True for "###+" followed by whitespace, or a bare "###+" line
+            that is followed by more content
+        """
+        rest = line.lstrip('#')
+        if len(line) - len(rest) < 3:
+            return False
+        if not rest:
+            return not is_last
+        return rest[0].isspace()
+
+    def _paragraph_to_blocks(self, para_lines: List[str]) -> List[Block]:
+        """Convert one paragraph (consecutive non-blank lines) to blocks
+
+        Args:
+            para_lines: Lines of the paragraph, as they appear in the chunk
+
+        Returns:
+            List of Block models
+        """
+        para = '\n'.join(para_lines).strip()
+        if not para:
+            return []
+
+        # Sub-headers (### or deeper within body content)
+        if HEADING_PARA_RE.match(para):
+            level = len(para) - len(para.lstrip('#'))
+            level = min(level, 3)  # Notion only supports heading_1 through heading_3
+            heading_text = para.lstrip('#').strip()
+            return [Heading(level, (RichText(heading_text),))]
+
+        blocks = []
+
+        # Bulleted lists
+        if para.startswith('- ') or para.startswith('* '):
+            for line in para_lines:
+                line = line.strip()
+                if line.startswith(('- ', '* ')):
+                    item = line[BULLET_PREFIX_RE.match(line).end():]
+                    blocks.append(ListItem(self._parse_inline(item)))
+
+        # Numbered lists
+        elif NUMBERED_PREFIX_RE.match(para):
+            for line in para_lines:
+                line = line.strip()
+                if not line:
+                    continue
+                prefix = NUMBERED_PREFIX_RE.match(line)
+                item_text = line[prefix.end():] if prefix else line
+                blocks.append(ListItem(self._parse_inline(item_text), numbered=True))
+
+        # Markdown pipe tables — one table block with a row per line
+        elif para.startswith('|'):
+            blocks.extend(self._parse_pipe_table(para_lines))
+
+        # HTML tables — parse <table> tags and convert to Notion table blocks
+        elif para.startswith('<table'):
+            blocks.extend(self._parse_html_table(para))
+
+        # Regular paragraph
+        else:
+            blocks.append(Paragraph(self._parse_inline(para)))
+
+        return blocks
+
+    def _parse_inline(self, text: str) -> Tuple[RichText, ...]:
+        """Parse inline markdown formatting (bold, italic, code, links)
+
+        Handles nested formatting like **[link](url) more bold text**, and
+        splits segments longer than Notion's 2000-character limit.
+
+        Args:
+            text: Text with markdown formatting
+
+        Returns:
+            Tuple of RichText runs (shared; never modify them)
+        """
+        # If no runs created, return whole text as plain
+        return _scan_inline(text) or (RichText(text),)
+
+    def _parse_inline_formatting(self, text: str) -> List[Dict]:
+        """Parse inline markdown formatting into Notion rich text dicts
+
+        Args:
+            text: Text with markdown formatting
+
+        Returns:
+            List of Notion rich text dicts (segments with different formatting)
+        """
+        return [run.to_json() for run in self._parse_inline(text)]
+
+    @staticmethod
+    def _split_table_row(line: str) -> List[str]:
+        """Split a pipe table row into cell texts
+
+        Pipes inside code spans and escaped pipes (\\|) stay in the cell.
+
+        Args:
+            line: One table line, with or without outer pipes
+
+        Returns:
+            List of stripped cell texts
+        """
+        line = line.strip()
+        if line.startswith('|'):
+            line = line[1:]
+        if line.endswith('|') and not line.endswith('\\|'):
+            line = line[:-1]
+
+        cells = []
+        current = []
+        pos = 0
+        for match in TABLE_CELL_SPLIT_RE.finditer(line):
+            current.append(line[pos:match.start()])
+            if match.group(1):
+                current.append(match.group(1))
+            elif match.group(2):
+                current.append('|')
+            else:
+                cells.append(''.join(current).strip())
+                current = []
+            pos = match.end()
+        current.append(line[pos:])
+        cells.append(''.join(current).strip())
+        return cells
+
+    def _parse_pipe_table(self, para_lines: List[str]) -> List[Block]:
+        """Convert a markdown pipe table to a Notion table block
+
+        A separator row (|---|:---:|) after the first row marks that row as
+        the column header. Column alignment is dropped: Notion tables have
+        no per-column alignment.
+
+        Args:
+            para_lines: Lines of the table paragraph
+
+        Returns:
+            List of Block models (a Table with its rows)
+        """
+        lines = [line.strip() for line in para_lines if line.strip()]
+        has_header = len(lines) > 1 and bool(TABLE_SEPARATOR_RE.match(lines[1]))
+        rows = [[self._parse_inline(cell) for cell in self._split_table_row(line)]
+                for line in lines if not TABLE_SEPARATOR_RE.match(line)]
+        return [self._build_table_block(rows, has_header)] if rows else []
+
+    def _build_table_block(self, rows: List[List[Tuple[RichText, ...]]], has_header: bool) -> Table:
+        """Build a table block from parsed cells, padding short rows
+
+        Args:
+            rows: Rows of cells, each cell a tuple of RichText runs
+            has_header: Whether the first row is the column header
+
+        Returns:
+            Table model with its TableRow children
+        """
+        width = max(len(row) for row in rows)
+        empty = self._parse_inline("")
+        table_rows = [TableRow(list(row) + [empty] * (width - len(row))) for row in rows]
+        return Table(width, has_header, table_rows)
+
+    def _parse_html_table(self, html: str) -> List[Block]:
+        """Parse HTML table and convert to Notion table block
+
+        Handles <table header-row="true"> format used in skill templates,
+        <th> header rows, colspan and inline formatting in cells (see
+        _html_table_rows).
+
+        Args:
+            html: HTML table string
+
+        Returns:
+            List of Block models (a Table with its rows)
+        """
+        table_rows, has_header = _html_table_rows(html)
+
+        if not table_rows:
+            # Fallback: return as plain text if parsing fails
+            clean_text = re.sub(r'<[^>]+>', ' ', html)
+            clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+            return [Paragraph((RichText(clean_text),))]
+
+        rows = [[self._parse_inline(cell) for cell in row] for row in table_rows]
+        return [self._build_table_block(rows, has_header)]
+
+    def _list_children(self, block_id: str) -> Optional[List[Dict]]:
+        """List all direct children of a block
+
+        Follows pagination (max 100 per request) without modifying the
+        page, so cursors stay valid.
+
+        Args:
+            block_id: Parent block or page UUID
+
+        Returns:
+            List of Notion block dicts, or None if a listing request failed
+        """
+        children = []
+        start_cursor = None
+        url = f"blocks/{block_id}/children"
+
+        while True:
+            params = {"page_size": 100}
+            if start_cursor:
+                params["start_cursor"] = start_cursor
+
+            try:
+                response = self._request("GET", url, params=params, timeout=30)
+            except requests.exceptions.RequestException as e:
+                self.log(f"✗ (failed to get blocks: {str(e)})")
+                return None
+            if response.status_code != 200:
+                self.log(f"✗ (failed to get blocks: HTTP {response.status_code})")
+                return None
+
+            data = response.json()
+            children.extend(block for block in data.get("results", []) if block.get("id"))
+            start_cursor = data.get("next_cursor")
+            if not data.get("has_more") or not start_cursor:
+                return children
+
+    def query_database(self, database_id: str, filter: Optional[Dict] = None,
+                       sorts: Optional[List[Dict]] = None) -> Optional[List[Dict]]:
+        """Query all pages of a database
+
+        Follows pagination (max 100 per request).
+
+        Args:
+            database_id: Database UUID
+            filter: Notion filter object (default: all pages)
+            sorts: Notion sort objects (default: API order)
+
+        Returns:
+            List of Notion page dicts, or None if a query request failed
+        """
+        pages = []
+        body = {"page_size": 100}
+        if filter:
+            body["filter"] = filter
+        if sorts:
+            body["sorts"] = sorts
+        url = f"databases/{database_id}/query"
+
+        while True:
+            try:
+                response = self._request("POST", url, json=body, timeout=30)
+            except requests.exceptions.RequestException as e:
+                self.log(f"✗ (failed to query database: {str(e)})")
+                return None
+            if response.status_code != 200:
+                self.log(f"✗ (failed to query database: HTTP {response.status_code}: "
+                         f"{_error_message(response)})")
+                return None
+
+            data = response.json()
+            pages.extend(data.get("results", []))
+            start_cursor = data.get("next_cursor")
+            if not data.get("has_more") or not start_cursor:
+                return pages
+            body["start_cursor"] = start_cursor
+
+    def _delete_block(self, block_id: str) -> Tuple[bool, int]:
+        """Delete a single block (retried by the shared retry policy)
+
+        Args:
+            block_id: Block UUID
+
+        Returns:
+            (deleted: bool, retries: number of retry attempts made)
+        """
+        retries = []
+        try:
+            response = self._request("DELETE", f"blocks/{block_id}",
+                                     on_retry=lambda attempt, _: retries.append(attempt), timeout=10)
+        except requests.exceptions.RequestException:
+            return False, len(retries)
+
+        # 404 means the block is already gone (e.g. deleted with its parent)
+        return response.status_code in (200, 404), len(retries)
+
+    def clear_page_content(self, workers: int = DELETE_WORKERS) -> bool:
+        """Delete all existing blocks from the page
+
+        Lists every top-level block first, then deletes them concurrently
+        on a bounded worker pool (each request still goes through the rate
+        limiter). Counts are stored in self.clear_stats.
+
+        Args:
+            workers: Maximum concurrent DELETE requests
 
         Returns:
-            List of {header_level, title, content} dicts
+            True if every block was deleted, False otherwise
         """
-        chunks = []
-
-        # Split on H1 and H2 headers (capturing group)
-        # Result alternates: [preamble, header1, body1, header2, body2, ...]
-        sections = re.split(r'^(#{1,2}\s+.+?)$', content, flags=re.MULTILINE)
+        self.log("Clearing existing page content...", end=" ", flush=True)
+        self.clear_stats = {"deleted": 0, "failed": 0, "retried": 0}
 
-        # Handle any preamble text before the first header
-        if sections[0].strip():
-            chunks.append({
-                "header_level": 1,
-                "title": "",
-                "content": sections[0].strip()
-            })
-
-        # Walk header-body pairs starting at index 1, stepping by 2
-        i = 1
-        while i < len(sections):
-            header_line = sections[i]
-            body = sections[i + 1] if i + 1 < len(sections) else ""
+        try:
+            children = self._list_children(self.page_id)
+            if children is None:
+                return False
+            block_ids = [block["id"] for block in children]
 
-            header_level = len(header_line) - len(header_line.lstrip('#'))
-            title = header_line.lstrip('#').strip()
+            if not block_ids:
+                self.log("(no content to clear) ✓")
+                return True
 
-            # If body is too large, split at paragraph boundaries.
-            # Only the first sub-chunk gets the title; subsequent ones omit it
-            # to avoid duplicate headers in Notion.
-            if len(body) > 2000:
-                paragraphs = body.split('\n\n')
-                current_chunk = ""
-                first_chunk = True
-                for para in paragraphs:
-                    if len(current_chunk) + len(para) > 2000:
-                        if current_chunk:
-                            chunks.append({
-                                "header_level": header_level,
-                                "title": title if first_chunk else "",
-                                "content": current_chunk.strip()
-                            })
-                            first_chunk = False
-                        current_chunk = para
-                    else:
-                        current_chunk += "\n\n" + para if current_chunk else para
-                if current_chunk:
-                    chunks.append({
-                        "header_level": header_level,
-                        "title": title if first_chunk else "",
-                        "content": current_chunk.strip()
-                    })
-            else:
-                chunks.append({
-                    "header_level": header_level,
-                    "title": title,
-                    "content": body.strip()
-                })
-            i += 2
+            with ThreadPoolExecutor(max_workers=min(workers, len(block_ids))) as pool:
+                for deleted, retries in pool.map(self._delete_block, block_ids):
+                    self.clear_stats["deleted" if deleted else "failed"] += 1
+                    self.clear_stats["retried"] += retries
 
-        return chunks
+            stats = self.clear_stats
+            summary = f"{stats['deleted']} blocks removed"
+            if stats["failed"]:
+                summary += f", {stats['failed']} failed"
+            if stats["retried"]:
+                summary += f", {stats['retried']} retried"
+            self.log(f"({summary}) {'✗' if stats['failed'] else '✓'}")
+            return stats["failed"] == 0
 
-    def markdown_to_notion_blocks(self, chunk: Dict) -> List[Dict]:
-        """Convert markdown chunk to Notion block format
+        except Exception as e:
+            self.log(f"✗ ({str(e)})")
+            return False
 
-        Handles: headers, paragraphs, links, bold, lists, tables
+    def _pack_batch(self, sizes: List[Tuple[int, int]], start: int) -> int:
+        """Greedily choose how many blocks go into the next request
 
         Args:
-            chunk: {header_level, title, content} dict
+            sizes: (serialized bytes, block elements) per block
+            start: Index of the first block of the batch
 
         Returns:
-            List of Notion block dicts
+            End index (exclusive) of the batch; always at least start + 1
         """
-        blocks = []
+        end = start
+        batch_bytes = len(_children_body([]))
+        batch_elements = 0
 
-        # Add header for this section
-        if chunk["title"]:
-            header_level = chunk["header_level"]
-            block_type = f"heading_{header_level}"
-            blocks.append({
-                "object": "block",
-                "type": block_type,
-                block_type: {
-                    "rich_text": [
-                        {
-                            "type": "text",
-                            "text": {"content": chunk["title"]}
-                        }
-                    ]
-                }
-            })
+        while end < len(sizes) and end - start < self.max_batch_blocks:
+            block_bytes, block_elements = sizes[end]
+            if end > start and (batch_bytes + block_bytes + 2 > self.max_batch_bytes
+                                or batch_elements + block_elements > MAX_BATCH_ELEMENTS):
+                break
+            batch_bytes += block_bytes + 1  # "," separator
+            batch_elements += block_elements
+            end += 1
 
-        # Process content
-        content = chunk["content"]
+        return max(end, start + 1)
 
-        # Pre-process: ensure sub-headers (### and deeper) are their own
-        # paragraphs.  Without this, a ### heading followed immediately by
-        # bullets (no blank line) collapses into a single paragraph and the
-        # entire block is emitted as a heading in Notion.
-        content = re.sub(r'(?m)^(#{3,}\s+.+)$', r'\n\n\1\n\n', content)
-        content = re.sub(r'\n{3,}', '\n\n', content)  # collapse triple+ newlines
+    def _shrink_batch_limits(self, batch_blocks: int, batch_bytes: int, error_msg: str) -> None:
+        """Halve batch limits after Notion rejected a batch as too large
 
-        # Split into paragraphs
-        paragraphs = content.split('\n\n')
+        Args:
+            batch_blocks: Number of blocks in the rejected batch
+            batch_bytes: Serialized size of the rejected batch
+            error_msg: Notion error message (children-count errors leave
+                the byte budget alone)
+        """
+        self.max_batch_blocks = max(1, batch_blocks // 2)
+        if "length should be" not in error_msg:
+            self.max_batch_bytes = max(1, min(self.max_batch_bytes, batch_bytes // 2))
 
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
+    def _append_encoded(self, batch: List[bytes], after: Optional[str]) -> Tuple[Optional[List[Dict]], int, str]:
+        """Append encoded blocks to the page in one request
 
-            # Sub-headers (### or deeper within body content)
-            if re.match(r'^#{1,6}\s+', para):
-                level = len(para) - len(para.lstrip('#'))
-                level = min(level, 3)  # Notion only supports heading_1 through heading_3
-                heading_text = para.lstrip('#').strip()
-                block_type = f"heading_{level}"
-                blocks.append({
-                    "object": "block",
-                    "type": block_type,
-                    block_type: {
-                        "rich_text": [{"type": "text", "text": {"content": heading_text}}]
-                    }
-                })
-
-            # Bulleted lists
-            elif para.startswith('- ') or para.startswith('* '):
-                list_items = [re.sub(r'^[-*]\s+', '', line.strip()) for line in para.split('\n') if line.strip().startswith(('- ', '* '))]
-                for item in list_items:
-                    blocks.append({
-                        "object": "block",
-                        "type": "bulleted_list_item",
-                        "bulleted_list_item": {
-                            "rich_text": self._parse_inline_formatting(item)
-                        }
-                    })
-
-            # Numbered lists
-            elif re.match(r'^\d+[\.\)]\s+', para):
-                for line in para.split('\n'):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    item_text = re.sub(r'^\d+[\.\)]\s+', '', line)
-                    blocks.append({
-                        "object": "block",
-                        "type": "numbered_list_item",
-                        "numbered_list_item": {
-                            "rich_text": self._parse_inline_formatting(item_text)
-                        }
-                    })
-
-            # Markdown tables — convert rows to paragraphs (Notion table API is complex)
-            elif para.startswith('|'):
-                for line in para.split('\n'):
-                    line = line.strip()
-                    if not line or re.match(r'^\|[\s\-|:]+\|$', line):
-                        continue  # skip separator rows
-                    # Strip outer pipes and join cells with " | "
-                    cells = [c.strip() for c in line.strip('|').split('|')]
-                    row_text = ' | '.join(cells)
-                    blocks.append({
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {
-                            "rich_text": self._parse_inline_formatting(row_text)
-                        }
-                    })
-
-            # HTML tables — parse <table> tags and convert to Notion table blocks
-            elif para.strip().startswith('<table'):
-                table_blocks = self._parse_html_table(para)
-                blocks.extend(table_blocks)
-
-            # Regular paragraph
-            else:
-                rich_text = self._parse_inline_formatting(para)
-                blocks.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": rich_text
-                    }
-                })
+        Args:
+            batch: Encoded blocks
+            after: Insert after this block ID (None = end of page)
 
-        return blocks
+        Returns:
+            (created blocks or None on failure, HTTP status or 0 on a
+            network error, error message)
+        """
+        try:
+            response = self._request("PATCH", f"blocks/{self.page_id}/children",
+                                     data=_children_body(batch, after), timeout=30)
+        except requests.exceptions.RequestException as e:
+            return None, 0, str(e)
+        if response.status_code != 200:
+            return None, response.status_code, _error_message(response)
+        return response.json().get("results", []), 200, ""
+
+    def _isolate_invalid_blocks(self, batch: List[bytes], first: int, after: Optional[str],
+                                error_msg: str) -> List[Optional[Dict]]:
+        """Re-send a batch Notion rejected as invalid in halves, isolating the bad blocks
+
+        Halves that are accepted land in order (each chained after the
+        previous one when inserting mid-page); a rejected half is split
+        again, down to single blocks. A single rejected block is replaced
+        by a plain-text paragraph and kept in self.quarantine. Only
+        validation errors (400) are bisected: any other failure stops the
+        upload of this batch, so nothing lands after a gap.
 
-    def _parse_inline_formatting(self, text: str) -> List[Dict]:
-        """Parse inline markdown formatting (bold, links, etc)
+        Args:
+            batch: Encoded blocks of the rejected batch
+            first: Block index of batch[0]
+            after: Block ID the batch goes after (None = end of page)
+            error_msg: Notion's error message for the batch
+
+        Returns:
+            Created block per batch entry; None from the first entry that
+            did not land
+        """
+        if len(batch) == 1:
+            block = decode_json(batch[0])
+            created, _, fallback_error = self._append_encoded([encode_block(_fallback_paragraph(block))], after)
+            if not created:
+                return [None]
+            self.quarantine.append({"index": first, "error": error_msg, "block": block})
+            self.metrics.incr("blocks_fallback")
+            self.last_block_id = created[-1].get("id", self.last_block_id)
+            return created
+
+        results = []
+        mid = len(batch) // 2
+        for part, part_first in ((batch[:mid], first), (batch[mid:], first + mid)):
+            created, status, message = self._append_encoded(part, after)
+            if created is None and status == 400 and not _is_size_error(status, message):
+                created = self._isolate_invalid_blocks(part, part_first, after, message)
+            elif created is None:
+                created = [None] * len(part)
+            elif created:
+                self.last_block_id = created[-1].get("id", self.last_block_id)
+
+            results.extend(created)
+            if None in created:
+                results.extend([None] * (len(batch) - len(results)))
+                break
+            if after:
+                after = self.last_block_id
+        return results
+
+    def upload_content(self, blocks: Iterable[Dict], after: Optional[str] = None,
+                       journal: Optional["UploadJournal"] = None) -> Tuple[bool, List[str]]:
+        """Upload content blocks to Notion page
 
-        Handles nested formatting like **[link](url) more bold text**
+        Packs blocks greedily into batches of up to 100 children (Notion's
+        limit), max_batch_bytes of JSON and MAX_BATCH_ELEMENTS blocks
+        including nested table rows, with retry logic. If Notion rejects
+        a batch as too large, the limits are halved and the batch is
+        re-packed. If it rejects a batch as invalid (400), the batch is
+        bisected to find the offending blocks, which are replaced by
+        plain-text paragraphs (see _isolate_invalid_blocks) while the rest
+        lands in order. The ID of the last block created is kept in
+        self.last_block_id.
+
+        Blocks are pulled from the iterable only until the next batch is
+        full, so with a BlockStream the first request is sent while the
+        rest of the report is still being converted. Each block is encoded
+        to JSON once when pulled; a batch body is assembled from those
+        bytes and re-sent unchanged on every retry.
+
+        With a journal, every acknowledged batch is recorded on disk and
+        the upload stops at the first failed batch, so a later run can
+        resume exactly where this one left off. If the journal already
+        holds acknowledged blocks, those are skipped and the upload
+        continues after the last confirmed block ID. Tables whose deferred
+        rows were not all confirmed stay listed in the journal; a resumed
+        upload appends whatever rows they are still missing.
 
         Args:
-            text: Text with markdown formatting
+            blocks: Block models or Notion block dicts (a list or any iterable)
+            after: Insert after this existing block ID instead of appending
+                to the end of the page; each batch chains after the last
+                block created by the previous one
+            journal: Checkpoint journal for this page and content
 
         Returns:
-            List of Notion rich text dicts (segments with different formatting)
+            (success: bool, failed_indices: list of failed block indices)
         """
-        segments = []
+        known_total = len(blocks) if isinstance(blocks, (list, tuple)) else None
+        source = iter(blocks)
+        failed_indices = []
+        quarantine_start = len(self.quarantine)  # entries before this call use other indices
+        start = 0
+        row_futures = []
+        row_pool = None
+
+        if journal and journal.acked_blocks:
+            unfinished = []  # (block index, table ID, table block) with rows still to confirm
+            for block_idx, block in enumerate(itertools.islice(source, journal.acked_blocks)):
+                start = block_idx + 1
+                if block_idx in journal.tables:
+                    unfinished.append((block_idx, journal.tables[block_idx], block))
+            after = journal.last_block_id
+            self.log(f"Resuming after {start} acknowledged blocks (journal: {journal.path.name})")
+            if unfinished:
+                row_pool = ThreadPoolExecutor(max_workers=TABLE_ROW_WORKERS)
+                for block_idx, table_id, block in unfinished:
+                    row_futures.append(
+                        (block_idx, row_pool.submit(self._finish_table_rows, table_id, block))
+                    )
 
-        # Step 1: Split by bold markers ** to identify bold vs non-bold regions
-        # Example: "Hello **[link](url) world** bye"
-        #   -> ["Hello ", "[link](url) world", " bye"]
-        #   -> is_bold: [False, True, False]
-        parts = re.split(r'\*\*', text)
+        pending = []  # encoded blocks not yet uploaded; pending[0] is block i
+        sizes = []  # (serialized bytes, block elements) per pending block
+        pending_bytes = len(_children_body([]))
+        pending_elements = 0
+        exhausted = False
+        deferred_rows = {}
+
+        batch_num = 0
+        i = start
+        while True:
+            # Pull blocks until they overflow one batch or the source runs dry
+            while not exhausted and (len(sizes) <= self.max_batch_blocks
+                                     and pending_bytes <= self.max_batch_bytes
+                                     and pending_elements <= MAX_BATCH_ELEMENTS):
+                block = next(source, None)
+                if block is None:
+                    exhausted = True
+                    break
+                block, rows = self._split_table_rows(block)
+                if rows:
+                    deferred_rows[i + len(pending)] = rows
+                encoded = encode_block(block)
+                size = (len(encoded), count_block_elements(block))
+                pending.append(encoded)
+                sizes.append(size)
+                pending_bytes += size[0] + 1
+                pending_elements += size[1]
+
+            if not pending:
+                if batch_num == 0 and start == 0:
+                    self.log("No blocks to upload")
+                    return True, []
+                break
+
+            if batch_num == 0:
+                count = f"{known_total - start} " if known_total is not None else ""
+                self.log(f"Uploading {count}blocks in batches of up to "
+                         f"{self.max_batch_blocks} blocks / {self.max_batch_bytes // 1000} KB...")
+
+            batch_len = self._pack_batch(sizes, 0)
+            batch = pending[:batch_len]
+            batch_end = i + batch_len
+            batch_num += 1
+
+            self.log(f"  Batch {batch_num}: uploading blocks {i + 1}-{batch_end}...", end=" ", flush=True)
+
+            created = None
+            landed = 0  # blocks of this batch that made it onto the page, in order
+            resized = False
+            url = f"blocks/{self.page_id}/children"
+            body = _children_body(batch, after)
+
+            try:
+                response = self._request("PATCH", url, data=body, timeout=30,
+                                         on_retry=self._log_retry)
+
+                if response.status_code == 200:
+                    created = response.json().get("results", [])
+                    landed = batch_len
+                    self.log("✓")
+                else:
+                    error_msg = _error_message(response)
+                    if len(batch) > 1 and _is_size_error(response.status_code, error_msg):
+                        self._shrink_batch_limits(len(batch), sum(size for size, _ in sizes[:batch_len]),
+                                                  error_msg)
+                        self.log(f"(too large, re-packing at {self.max_batch_blocks} blocks / "
+                                 f"{self.max_batch_bytes // 1000} KB)")
+                        resized = True
+                    elif response.status_code == 400:
+                        # Invalid content: find the bad blocks instead of failing the whole batch
+                        self.log(f"✗ {error_msg}")
+                        self.log("    Isolating invalid blocks...", end=" ", flush=True)
+                        quarantined = len(self.quarantine)
+                        created = self._isolate_invalid_blocks(batch, i, after, error_msg)
+                        landed = created.index(None) if None in created else batch_len
+                        replaced = [entry["index"] for entry in self.quarantine[quarantined:]]
+                        summary = f"{len(replaced)} replaced with plain text: " \
+                                  f"{', '.join(str(idx + 1) for idx in replaced)}" if replaced else "none replaced"
+                        if landed == batch_len:
+                            self.log(f"✓ ({summary})")
+                        else:
+                            self.log(f"✗ ({landed} of {batch_len} landed, {summary})")
+                    else:
+                        self.log(f"✗ {error_msg}")
+
+            except requests.exceptions.RequestException as e:
+                self.log(f"✗ {str(e)}")
+
+            success = landed == batch_len
+            if landed:
+                last_created = created[min(landed, len(created)) - 1] if created else None
+                if last_created:
+                    self.last_block_id = last_created.get("id", self.last_block_id)
+                    if after:
+                        after = self.last_block_id
+                self.metrics.incr("batches")
+                self.metrics.incr("blocks_uploaded", landed)
+
+                # Tables in this batch now have IDs; fill in their remaining rows
+                replaced = {entry["index"] for entry in self.quarantine[quarantine_start:]}
+                for block_idx in range(i, i + landed):
+                    if block_idx not in deferred_rows:
+                        continue
+                    rows = deferred_rows.pop(block_idx)
+                    if len(created) != len(batch) or block_idx in replaced:
+                        failed_indices.append(block_idx)  # no table ID to add the rows to
+                        continue
+                    if row_pool is None:
+                        row_pool = ThreadPoolExecutor(max_workers=TABLE_ROW_WORKERS)
+                    table_id = created[block_idx - i]["id"]
+                    if journal:
+                        journal.tables[block_idx] = table_id  # until its rows are confirmed
+                    row_futures.append(
+                        (block_idx, row_pool.submit(self._append_table_rows, table_id, rows))
+                    )
+                if journal:
+                    journal.record(i + landed, self.last_block_id)
+            if not success and not resized:
+                failed_indices.extend(range(i + landed, batch_end))
 
-        for i, part in enumerate(parts):
-            if not part:
+            if resized:
+                batch_num -= 1
                 continue
 
-            is_bold = (i % 2 == 1)  # Odd indices are inside ** markers
-
-            # Step 2: Within each part, parse links
-            link_segments = self._parse_links_in_segment(part, is_bold)
-            segments.extend(link_segments)
+            if not success and journal:
+                # Later batches would land after the gap; leave them for --resume
+                remaining = len(pending) - batch_len + sum(1 for _ in source)
+                failed_indices.extend(range(batch_end, batch_end + remaining))
+                self.log(f"  Stopped; re-run with --resume to continue from block {i + landed + 1}")
+                break
+
+            del pending[:batch_len]
+            del sizes[:batch_len]
+            pending_bytes = len(_children_body([])) + sum(size + 1 for size, _ in sizes)
+            pending_elements = sum(elements for _, elements in sizes)
+            i = batch_end
+
+        if row_pool:
+            if row_futures:
+                self.log(f"  Appending remaining rows to {len(row_futures)} tables...", end=" ", flush=True)
+            failed_tables = [block_idx for block_idx, future in row_futures if not future.result()]
+            row_pool.shutdown()
+            if row_futures:
+                self.log(f"✗ ({len(failed_tables)} tables incomplete)" if failed_tables else "✓")
+            failed_indices.extend(failed_tables)
+            if journal:
+                # Keep only the incomplete tables, for the next --resume
+                journal.tables = {block_idx: table_id for block_idx, table_id in journal.tables.items()
+                                  if block_idx in failed_tables}
 
-        # If no segments created, return whole text as plain
-        if not segments:
-            segments.append({
-                "type": "text",
-                "text": {"content": text}
-            })
+        success = len(failed_indices) == 0
+        if success and journal:
+            journal.remove()
+        elif journal and journal.acked_blocks:
+            journal.record(journal.acked_blocks, journal.last_block_id)
+        return success, failed_indices
 
-        return segments
+    def _split_table_rows(self, block: Union[Block, Dict]) -> Tuple[Union[Block, Dict], Optional[List]]:
+        """Strip table rows that will be appended after the table exists
 
-    def _parse_links_in_segment(self, text: str, is_bold: bool) -> List[Dict]:
-        """Parse links within a text segment, applying bold if specified
+        With defer_table_rows, every table is created with only its first
+        row. Tables with more than MAX_BATCH_BLOCKS rows are always split,
+        since Notion rejects them inline.
 
         Args:
-            text: Text that may contain [link](url) patterns
-            is_bold: Whether this segment is inside ** markers
+            block: Block model or Notion block dict
 
         Returns:
-            List of Notion rich text dicts
+            (block with a trimmed table, deferred rows) or (block, None)
         """
-        segments = []
-        link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-
-        last_end = 0
-        for match in re.finditer(link_pattern, text):
-            # Add plain text before this link
-            if match.start() > last_end:
-                plain_text = text[last_end:match.start()]
-                if plain_text:
-                    segment = {
-                        "type": "text",
-                        "text": {"content": plain_text}
-                    }
-                    if is_bold:
-                        segment["annotations"] = {"bold": True}
-                    segments.append(segment)
-
-            # Add the link
-            link_text = match.group(1)
-            link_url = match.group(2)
-            segment = {
-                "type": "text",
-                "text": {
-                    "content": link_text,
-                    "link": {"url": link_url}
-                }
-            }
-            if is_bold:
-                segment["annotations"] = {"bold": True}
-            segments.append(segment)
-
-            last_end = match.end()
-
-        # Add remaining text after last link
-        if last_end < len(text):
-            remaining = text[last_end:]
-            if remaining:
-                segment = {
-                    "type": "text",
-                    "text": {"content": remaining}
-                }
-                if is_bold:
-                    segment["annotations"] = {"bold": True}
-                segments.append(segment)
-
-        # If no links found, return whole text as one segment
-        if not segments and text:
-            segment = {
-                "type": "text",
-                "text": {"content": text}
-            }
-            if is_bold:
-                segment["annotations"] = {"bold": True}
-            segments.append(segment)
-
-        return segments
-
-    def _parse_html_table(self, html: str) -> List[Dict]:
-        """Parse HTML table and convert to Notion table block
-
-        Handles <table header-row="true"> format used in skill templates.
+        keep_rows = TABLE_INITIAL_ROWS if self.defer_table_rows else MAX_BATCH_BLOCKS
+        if isinstance(block, Table):
+            if len(block.rows) <= keep_rows:
+                return block, None
+            return block.with_rows(block.rows[:keep_rows]), block.rows[keep_rows:]
+        if not isinstance(block, dict) or block.get("type") != "table":
+            return block, None
+        rows = block["table"].get("children", [])
+        if len(rows) <= keep_rows:
+            return block, None
+        return dict(block, table=dict(block["table"], children=rows[:keep_rows])), rows[keep_rows:]
+
+    def _finish_table_rows(self, table_id: str, table: Union[Block, Dict]) -> bool:
+        """Append the rows an existing table is missing after an interrupted upload
+
+        Rows are appended in order, so the table's current row count shows
+        how many of the report's rows already landed.
 
         Args:
-            html: HTML table string
+            table_id: Block ID of the table on the page
+            table: The table as converted from the report (all rows)
 
         Returns:
-            List of Notion blocks (table block with rows)
+            True if the table now holds every row, False otherwise
         """
-        blocks = []
+        rows = table.rows if isinstance(table, Table) else table["table"].get("children", [])
+        existing = self._list_children(table_id)
+        if existing is None:
+            return False
+        missing = rows[len(existing):]
+        return not missing or self._append_table_rows(table_id, missing)
 
-        # Extract rows from <tr>...</tr> tags
-        row_pattern = r'<tr[^>]*>(.*?)</tr>'
-        rows = re.findall(row_pattern, html, re.DOTALL | re.IGNORECASE)
+    def _append_table_rows(self, table_id: str, rows: List) -> bool:
+        """Append rows to an existing table, in order
 
-        if not rows:
-            # Fallback: return as plain text if parsing fails
-            clean_text = re.sub(r'<[^>]+>', ' ', html)
-            clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-            return [{
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {
-                    "rich_text": [{"type": "text", "text": {"content": clean_text}}]
-                }
-            }]
-
-        # Check if first row is header
-        has_header = 'header-row="true"' in html.lower() or 'header-row=true' in html.lower()
-
-        # Parse each row into cells
-        table_rows = []
-        for row_html in rows:
-            # Extract cells from <td>...</td> tags
-            cell_pattern = r'<td[^>]*>(.*?)</td>'
-            cells = re.findall(cell_pattern, row_html, re.DOTALL | re.IGNORECASE)
-
-            if cells:
-                # Clean up cell contents and parse inline formatting
-                row_cells = []
-                for cell in cells:
-                    # Remove any nested HTML tags, preserve text
-                    cell_text = re.sub(r'<[^>]+>', '', cell).strip()
-                    row_cells.append(cell_text)
-                table_rows.append(row_cells)
+        Args:
+            table_id: Block ID of the table
+            rows: TableRow models or table_row block dicts
 
-        if not table_rows:
-            return blocks
-
-        # Determine table width (max columns in any row)
-        table_width = max(len(row) for row in table_rows)
-
-        # Build Notion table block
-        table_children = []
-        for i, row_cells in enumerate(table_rows):
-            # Pad row to table width if needed
-            while len(row_cells) < table_width:
-                row_cells.append("")
-
-            # Build cells with rich_text
-            cells_rich_text = []
-            for cell_text in row_cells:
-                cells_rich_text.append(self._parse_inline_formatting(cell_text))
-
-            table_children.append({
-                "object": "block",
-                "type": "table_row",
-                "table_row": {
-                    "cells": cells_rich_text
-                }
-            })
+        Returns:
+            True if every row was appended, False otherwise
+        """
+        encoded = [encode_block(row) for row in rows]
+        sizes = [(len(row), 1) for row in encoded]
+        i = 0
+        while i < len(rows):
+            end = self._pack_batch(sizes, i)
+            try:
+                response = self._request("PATCH", f"blocks/{table_id}/children",
+                                         data=_children_body(encoded[i:end]), timeout=30)
+            except requests.exceptions.RequestException:
+                return False
+            if response.status_code != 200:
+                return False
+            i = end
+        return True
 
-        # Create table block with children
-        table_block = {
-            "object": "block",
-            "type": "table",
-            "table": {
-                "table_width": table_width,
-                "has_column_header": has_header,
-                "has_row_header": False,
-                "children": table_children
-            }
-        }
+    def _update_block(self, block_id: str, block: Dict, index: Optional[int] = None) -> bool:
+        """Replace the rich text of an existing block in place
 
-        blocks.append(table_block)
-        return blocks
+        If Notion rejects the new text as invalid (400), the block's plain
+        text is sent instead and the block is kept in self.quarantine.
 
-    def clear_page_content(self) -> bool:
-        """Delete all existing blocks from the page
+        Args:
+            block_id: Existing block UUID (must be the same type as block)
+            block: New Notion block dict
+            index: Position of block in the new content (for self.quarantine)
 
         Returns:
             True if successful, False otherwise
         """
-        print("Clearing existing page content...", end=" ", flush=True)
+        block_type = block["type"]
+        payload = {block_type: {"rich_text": block[block_type]["rich_text"]}}
 
         try:
-            deleted = 0
-            has_more = True
-            start_cursor = None
+            response = self._request("PATCH", f"blocks/{block_id}",
+                                     json=payload, timeout=30)
+            if response.status_code == 400:
+                error_msg = _error_message(response)
+                payload = {block_type: {"rich_text": _fallback_paragraph(block).to_json()["paragraph"]["rich_text"]}}
+                response = self._request("PATCH", f"blocks/{block_id}", json=payload, timeout=30)
+                if response.status_code == 200:
+                    self.quarantine.append({"index": index, "error": error_msg, "block": block})
+                    self.metrics.incr("blocks_fallback")
+        except requests.exceptions.RequestException:
+            return False
+        return response.status_code == 200
+
+    def sync_content(self, blocks: List[Dict]) -> Tuple[bool, List[int]]:
+        """Bring the page in line with blocks, touching only what changed
 
-            while has_more:
-                # Get block children (paginated, max 100 per request)
-                url = f"{NOTION_BASE_URL}/blocks/{self.page_id}/children"
-                params = {}
-                if start_cursor:
-                    params["start_cursor"] = start_cursor
+        Reads the page's current top-level blocks, matches them against
+        the new blocks by content fingerprint, then deletes removed blocks,
+        updates changed text blocks in place and inserts new blocks after
+        their predecessor. Falls back to clear-and-replace when new blocks
+        must go before the first kept block (the API can only insert
+        after an existing block). Counts are stored in self.sync_stats.
 
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
+        Args:
+            blocks: List of Notion block dicts (the desired page content)
 
-                if response.status_code != 200:
-                    print(f"✗ (failed to get blocks: HTTP {response.status_code})")
-                    return False
+        Returns:
+            (success: bool, failed_indices: list of failed block indices)
+        """
+        self.log("Reading current page content...", end=" ", flush=True)
+        existing = self._list_children(self.page_id)
+        if existing is None:
+            return False, list(range(len(blocks)))
+
+        # Table rows are nested children; fetch them so tables compare by content
+        for block in existing:
+            if block.get("type") == "table" and block.get("has_children"):
+                rows = self._list_children(block["id"])
+                if rows is None:
+                    return False, list(range(len(blocks)))
+                block["table"]["children"] = rows
+        self.log(f"({len(existing)} blocks) ✓")
+
+        old_hashes = [block_fingerprint(block) for block in existing]
+        new_hashes = [block_fingerprint(block) for block in blocks]
+        opcodes = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False).get_opcodes()
+
+        # Plan: old blocks to delete, then ordered insert/update steps
+        deletes = []
+        steps = []  # ("keep", old_idx) | ("update", old_idx, new_idx) | ("insert", [new_idx, ...])
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "equal":
+                steps.append(("keep", i2 - 1))
+                continue
+            old_range = list(range(i1, i2))
+            new_range = list(range(j1, j2))
+            pending = []
+            for offset in range(max(len(old_range), len(new_range))):
+                old_idx = old_range[offset] if offset < len(old_range) else None
+                new_idx = new_range[offset] if offset < len(new_range) else None
+                if (old_idx is not None and new_idx is not None
+                        and existing[old_idx].get("type") == blocks[new_idx]["type"]
+                        and blocks[new_idx]["type"] in SYNC_UPDATABLE_TYPES):
+                    if pending:
+                        steps.append(("insert", pending))
+                        pending = []
+                    steps.append(("update", old_idx, new_idx))
+                    continue
+                if old_idx is not None:
+                    deletes.append(existing[old_idx]["id"])
+                if new_idx is not None:
+                    pending.append(new_idx)
+            if pending:
+                steps.append(("insert", pending))
+
+        self.sync_stats = {
+            "kept": sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal"),
+            "updated": sum(1 for step in steps if step[0] == "update"),
+            "inserted": sum(len(step[1]) for step in steps if step[0] == "insert"),
+            "deleted": len(deletes)
+        }
 
-                data = response.json()
-                blocks = data.get("results", [])
-                has_more = data.get("has_more", False)
-                start_cursor = data.get("next_cursor")
+        first_anchor = next((i for i, step in enumerate(steps) if step[0] != "insert"), None)
+        if first_anchor is not None and first_anchor > 0:
+            self.log("New content precedes the first unchanged block; replacing page content")
+            if not self.clear_page_content():
+                return False, list(range(len(blocks)))
+            self.sync_stats = {"kept": 0, "updated": 0, "inserted": len(blocks),
+                               "deleted": self.clear_stats["deleted"]}
+            return self.upload_content(blocks)
 
-                if not blocks:
-                    break
+        stats = self.sync_stats
+        self.log(f"Syncing: {stats['kept']} unchanged, {stats['updated']} to update, "
+                 f"{stats['inserted']} to insert, {stats['deleted']} to delete")
 
-                # Delete each block
-                for block in blocks:
-                    block_id = block.get("id")
-                    if block_id:
-                        delete_url = f"{NOTION_BASE_URL}/blocks/{block_id}"
-                        del_response = requests.delete(delete_url, headers=self.headers, timeout=10)
-                        if del_response.status_code == 200:
-                            deleted += 1
-
-                # After deleting, reset cursor since block IDs are now gone
-                has_more = False
-                # Re-check if more blocks remain
-                check = requests.get(
-                    f"{NOTION_BASE_URL}/blocks/{self.page_id}/children",
-                    headers=self.headers, timeout=30
-                )
-                if check.status_code == 200:
-                    remaining = check.json().get("results", [])
-                    if remaining:
-                        has_more = True
-                        start_cursor = None
-
-            if deleted == 0:
-                print("(no content to clear) ✓")
+        failed_indices = []
+        delete_failures = 0
+        if deletes:
+            self.log(f"  Deleting {len(deletes)} blocks...", end=" ", flush=True)
+            with ThreadPoolExecutor(max_workers=min(DELETE_WORKERS, len(deletes))) as pool:
+                delete_failures = sum(1 for deleted, _ in pool.map(self._delete_block, deletes)
+                                      if not deleted)
+            self.log(f"✗ ({delete_failures} failed)" if delete_failures else "✓")
+
+        anchor = None
+        for step in steps:
+            if step[0] == "keep":
+                anchor = existing[step[1]]["id"]
+            elif step[0] == "update":
+                old_block = existing[step[1]]
+                if not self._update_block(old_block["id"], blocks[step[2]], index=step[2]):
+                    failed_indices.append(step[2])
+                anchor = old_block["id"]
             else:
-                print(f"({deleted} blocks removed) ✓")
-            return True
-
-        except Exception as e:
-            print(f"✗ ({str(e)})")
-            return False
+                new_indices = step[1]
+                self.last_block_id = None
+                quarantined = len(self.quarantine)
+                _, failed = self.upload_content([blocks[i] for i in new_indices], after=anchor)
+                failed_indices.extend(new_indices[i] for i in failed)
+                for entry in self.quarantine[quarantined:]:
+                    entry["index"] = new_indices[entry["index"]]  # upload_content counts from 0
+                if self.last_block_id:
+                    anchor = self.last_block_id
 
-    def upload_content(self, blocks: List[Dict]) -> Tuple[bool, List[str]]:
-        """Upload content blocks to Notion page
+        return not failed_indices and delete_failures == 0, failed_indices
 
-        Uploads blocks in batches of 50 with retry logic (Notion limit
-        is 100; 50 is conservative for retry safety).
+    def for_page(self, page_id: str, verbose: Optional[bool] = None) -> "NotionUploader":
+        """Uploader for another page sharing this one's transport, limits, metrics and cache
 
         Args:
-            blocks: List of Notion block dicts
+            page_id: Target page UUID
+            verbose: Print progress output (default: same as this uploader)
 
         Returns:
-            (success: bool, failed_indices: list of failed block indices)
+            NotionUploader
         """
-        if not blocks:
-            print("No blocks to upload")
-            return True, []
-
-        failed_indices = []
-        total_blocks = len(blocks)
-        batch_size = 50  # Conservative batch size
+        uploader = NotionUploader(self.api_key, page_id, rate_limiter=self.rate_limiter,
+                                  verbose=self.verbose if verbose is None else verbose,
+                                  max_batch_bytes=self.max_batch_bytes, concurrency=self.concurrency,
+                                  retry_policy=self.retry_policy, transport=self.transport,
+                                  defer_table_rows=self.defer_table_rows, metrics=self.metrics,
+                                  cache=self.cache)
+        uploader.max_batch_blocks = self.max_batch_blocks
+        return uploader
+
+    def create_child_page(self, title: str) -> Optional[str]:
+        """Create an empty page under this page
+
+        Notion lists the new page at the end of this page's content as a
+        child_page block, so pages created one after another form an
+        ordered table of contents.
 
-        print(f"Uploading {total_blocks} blocks in batches of {batch_size}...")
-
-        for batch_num, i in enumerate(range(0, total_blocks, batch_size)):
-            batch = blocks[i:i + batch_size]
-            batch_end = min(i + batch_size, total_blocks)
-
-            print(f"  Batch {batch_num + 1}: uploading blocks {i + 1}-{batch_end}...", end=" ", flush=True)
+        Args:
+            title: Page title (plain text)
 
-            success = False
-            for attempt in range(MAX_RETRIES):
-                try:
-                    url = f"{NOTION_BASE_URL}/blocks/{self.page_id}/children"
+        Returns:
+            New page ID, or None if the request failed
+        """
+        payload = {
+            "parent": {"page_id": self.page_id},
+            "properties": {"title": {"title": [{"type": "text", "text": {"content": title[:MAX_TEXT_LENGTH]}}]}}
+        }
+        try:
+            response = self._request("POST", "pages", json=payload, timeout=30)
+        except requests.exceptions.RequestException as e:
+            self.log(f"✗ (failed to create page '{title}': {str(e)})")
+            return None
+        if response.status_code != 200:
+            self.log(f"✗ (failed to create page '{title}': HTTP {response.status_code}: "
+                     f"{_error_message(response)})")
+            return None
+        return response.json().get("id")
+
+    @staticmethod
+    def split_sections(blocks: Iterable[Union[Block, Dict]]) -> Tuple[List, List[Tuple[str, List]]]:
+        """Group blocks by H1 section
+
+        Heading 1 blocks only come from # headers, so these are the H1
+        sections of chunk_markdown_by_headers (oversized sections included,
+        since only their first chunk carries the heading).
 
-                    payload = {"children": batch}
+        Args:
+            blocks: Block models or Notion block dicts for the whole report
 
-                    response = requests.patch(
-                        url,
-                        headers=self.headers,
-                        json=payload,
-                        timeout=30
-                    )
+        Returns:
+            (leading_blocks, sections): blocks before the first H1, and one
+            (title, blocks) pair per H1 with the heading block itself left
+            out, since it becomes the child page's title
+        """
+        leading = []
+        sections = []
+        for block in blocks:
+            block_type = block["type"] if isinstance(block, dict) else block.block_type
+            if block_type == "heading_1":
+                heading = block if isinstance(block, dict) else block.to_json()
+                title = "".join(segment["text"]["content"] for segment in heading["heading_1"]["rich_text"])
+                sections.append((title, []))
+            elif sections:
+                sections[-1][1].append(block)
+            else:
+                leading.append(block)
+        return leading, sections
+
+    def upload_split_pages(self, blocks: List[Union[Block, Dict]],
+                           workers: int = DEFAULT_WORKERS) -> Tuple[bool, List[int]]:
+        """Upload each H1 section to its own child page, concurrently
+
+        Appends to one parent have to be sent in order, so a single page
+        uploads one batch at a time. Here blocks before the first H1 are
+        uploaded to this page, then one child page per H1 section is
+        created in report order (their child_page blocks are the page's
+        table of contents), and the sections upload to their pages in
+        parallel on up to `workers` threads. Counts are stored in
+        self.split_stats; blocks rejected by Notion are merged into
+        self.quarantine.
 
-                    if response.status_code == 200:
-                        print("✓")
-                        success = True
-                        break
-                    else:
-                        error_msg = response.json().get("message", f"HTTP {response.status_code}")
-                        if attempt < MAX_RETRIES - 1:
-                            print(f"(retry {attempt + 1}/{MAX_RETRIES}) ", end="", flush=True)
-                            time.sleep(RETRY_DELAY * (attempt + 1))
-                        else:
-                            print(f"✗ {error_msg}")
-                            for block_idx in range(i, batch_end):
-                                failed_indices.append(block_idx)
-
-                except requests.exceptions.RequestException as e:
-                    if attempt < MAX_RETRIES - 1:
-                        print(f"(retry {attempt + 1}/{MAX_RETRIES}) ", end="", flush=True)
-                        time.sleep(RETRY_DELAY * (attempt + 1))
-                    else:
-                        print(f"✗ {str(e)}")
-                        for block_idx in range(i, batch_end):
-                            failed_indices.append(block_idx)
+        Args:
+            blocks: Block models or Notion block dicts for the whole report
+            workers: Child pages uploaded at the same time
 
-        success = len(failed_indices) == 0
+        Returns:
+            (success: bool, failed_indices: list of failed block indices,
+            counted without the H1 headings)
+        """
+        leading, sections = self.split_sections(blocks)
+        self.log(f"   → {len(sections)} H1 sections, {len(leading)} blocks before the first")
+        self.split_stats = {"pages": 0, "failed_pages": 0}
+
+        # Leading content must land before the child_page blocks, which Notion appends
+        success, failed_indices = True, []
+        if leading:
+            success, failed_indices = self.upload_content(leading)
+
+        def upload_section(page_id: str, section_blocks: List) -> Dict:
+            start = time.monotonic()
+            child = self.for_page(page_id, verbose=False)
+            ok, failed = child.upload_content(section_blocks)
+            return {"uploader": child, "success": ok, "failed": failed, "seconds": time.monotonic() - start}
+
+        # Pages are created one at a time to keep the contents in order; each
+        # section starts uploading as soon as its page exists
+        created = 0
+        results = {}
+        if sections:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                with self.captured_log() as creation_output:
+                    self.log(f"Creating {len(sections)} child pages...", end=" ", flush=True)
+                    futures = {}
+                    for k, (title, section_blocks) in enumerate(sections):
+                        page_id = self.create_child_page(title)
+                        if page_id is None:
+                            break
+                        futures[pool.submit(upload_section, page_id, section_blocks)] = k
+                    created = len(futures)
+                    if created == len(sections):
+                        self.log("✓")
+                self.log(creation_output.getvalue(), end="")
+                for future in as_completed(futures):
+                    k = futures[future]
+                    result = results[k] = future.result()
+                    child = result["uploader"]
+                    status = "✓" if result["success"] else f"⚠️ {len(result['failed'])} blocks failed"
+                    self.log(f"  [{len(results)}/{created}] {sections[k][0]}: "
+                             f"{len(sections[k][1])} blocks, {child.request_count} requests, "
+                             f"{result['seconds']:.1f}s {status}")
+        self.split_stats["pages"] = created
+
+        # Report block indices in whole-report order (headings excluded)
+        offset = len(leading)
+        for k, (title, section_blocks) in enumerate(sections):
+            result = results.get(k)
+            if result is None:  # no page was created for this section
+                failed_indices.extend(range(offset, offset + len(section_blocks)))
+                success = False
+            else:
+                child = result["uploader"]
+                with self._count_lock:
+                    self.request_count += child.request_count
+                    self.retry_count += child.retry_count
+                failed_indices.extend(offset + index for index in result["failed"])
+                self.quarantine.extend(dict(entry, index=offset + entry["index"]) for entry in child.quarantine)
+                if not result["success"]:
+                    success = False
+                    self.split_stats["failed_pages"] += 1
+            offset += len(section_blocks)
+        if created < len(sections):
+            self.log(f"⚠️ {len(sections) - created} sections were not uploaded "
+                     f"(their child pages could not be created)")
         return success, failed_indices
 
     def set_icon(self, company_url: str) -> bool:
@@ -581,9 +2848,9 @@ class NotionUploader:
         favicon_url = f"https://t0.gstatic.com/faviconV2?client=SOCIAL&type=FAVICON&fallback_opts=TYPE,SIZE,URL&url={company_url}"
 
         try:
-            print("Setting page icon...", end=" ", flush=True)
+            self.log("Setting page icon...", end=" ", flush=True)
 
-            url = f"{NOTION_BASE_URL}/pages/{self.page_id}"
+            url = f"pages/{self.page_id}"
 
             payload = {
                 "icon": {
@@ -592,22 +2859,17 @@ class NotionUploader:
                 }
             }
 
-            response = requests.patch(
-                url,
-                headers=self.headers,
-                json=payload,
-                timeout=10
-            )
+            response = self._request("PATCH", url, json=payload, timeout=10)
 
             if response.status_code == 200:
-                print("✓")
+                self.log("✓")
                 return True
             else:
-                print(f"✗ (HTTP {response.status_code})")
+                self.log(f"✗ (HTTP {response.status_code})")
                 return False
 
         except Exception as e:
-            print(f"✗ ({str(e)})")
+            self.log(f"✗ ({str(e)})")
             return False
 
 
@@ -655,89 +2917,814 @@ def load_config(config_path: Optional[Path]) -> Dict:
     return config
 
 
+def _cache_summary(uploader: NotionUploader) -> str:
+    """Progress-line suffix with the cache hit count, empty without a cache"""
+    if uploader.cache is None:
+        return ""
+    stats = uploader.cache_stats
+    return f" ({stats['hits']}/{stats['hits'] + stats['misses']} sections from cache)"
+
+
+def upload_report(uploader: NotionUploader, content: Union[str, BlockBundle], company_url: str,
+                  clear: bool = False, sync: bool = False, resume: bool = False,
+                  journal_dir: Optional[Path] = None, split_pages: bool = False,
+                  page_workers: int = DEFAULT_WORKERS) -> Tuple[bool, List[int], int]:
+    """Run the full clear/convert/upload/icon pipeline for one report
+
+    Steps run as a TaskGraph: content waits for the clear, while
+    conversion overlaps the clear and the icon is set alongside the
+    upload. Plain uploads stream: blocks are converted on a BlockStream
+    thread and uploaded as each batch fills, and are checkpointed in an
+    UploadJournal so a failed run can be continued with resume=True. Sync
+    mode converts the whole report first, since the diff needs every block,
+    and so does split_pages, which uploads each H1 section to its own
+    child page (see NotionUploader.upload_split_pages). A compiled
+    BlockBundle takes the place of conversion: its blocks are read from
+    disk and the journal is keyed by the bundle's digest.
+
+    Args:
+        uploader: Configured NotionUploader for the target page
+        content: Full markdown report content, or a compiled BlockBundle
+        company_url: Company website URL (for favicon)
+        clear: Clear existing page content before uploading
+        sync: Diff against existing page content and only apply changes
+        resume: Continue after the last block acknowledged by a previous run
+        journal_dir: Directory for checkpoint journals (default: JOURNAL_DIR)
+        split_pages: Upload each H1 section to a child page (not with sync/resume)
+        page_workers: Child pages uploaded concurrently with split_pages
+
+    Returns:
+        (success: bool, failed_indices: list, block_count: int)
+
+    Raises:
+        ValueError if split_pages is combined with sync or resume
+    """
+    if split_pages and (sync or resume):
+        raise ValueError("split_pages can't be combined with sync or resume")
+    graph = TaskGraph()
+    content_deps = ()
+
+    if clear:
+        uploader.log("\n0️⃣ Clearing existing content...")
+
+        def clear_page():
+            with uploader.metrics.phase("clear"):
+                return uploader.clear_page_content()
+
+        graph.add("clear", clear_page)
+        content_deps = ("clear",)
+
+    def cleared() -> bool:
+        # Uploading after a failed clear would mix the new report with stale blocks
+        return not clear or graph.results["clear"]
+
+    # The icon doesn't depend on page content; its output is shown after the upload's
+    def set_icon():
+        with uploader.metrics.phase("icon"), uploader.captured_log() as output:
+            uploader.set_icon(company_url)
+        return output.getvalue()
+
+    bundle = content if isinstance(content, BlockBundle) else None
+    stream = None
+    if sync or split_pages:
+        # Diffing and splitting need the whole block list up front; convert while clearing
+        def convert():
+            with uploader.captured_log() as output:
+                if bundle is not None:
+                    uploader.log(f"\n1️⃣ Reading compiled bundle {bundle.path.name}...")
+                    uploader.log(f"   → converter v{bundle.header['converter_version']}, "
+                                 f"{bundle.header['bytes'] / 1024:.1f} KB of blocks")
+                    uploader.log("\n2️⃣ Loading Notion blocks...")
+                    with uploader.metrics.phase("convert"):
+                        all_blocks = list(bundle)
+                    uploader.log(f"   → {len(all_blocks)} blocks loaded")
+                    return all_blocks, output.getvalue()
+
+                uploader.log("\n1️⃣ Chunking content by headers...")
+                with uploader.metrics.phase("chunk"):
+                    chunks = uploader.chunk_markdown_by_headers(content)
+                uploader.log(f"   → {len(chunks)} sections found")
+
+                uploader.log("\n2️⃣ Converting to Notion blocks...")
+                all_blocks = []
+                with uploader.metrics.phase("convert"):
+                    for chunk in chunks:
+                        all_blocks.extend(uploader.markdown_to_notion_blocks(chunk))
+                uploader.log(f"   → {len(all_blocks)} blocks created{_cache_summary(uploader)}")
+            return all_blocks, output.getvalue()
+
+        def apply_blocks():
+            if not cleared():
+                return None
+            all_blocks, convert_output = graph.results["convert"]
+            uploader.log(convert_output, end="")
+            if split_pages:
+                uploader.log("\n3️⃣ Uploading sections to child pages...")
+                with uploader.metrics.phase("upload"):
+                    return uploader.upload_split_pages(all_blocks, workers=page_workers)
+            uploader.log("\n3️⃣ Syncing content...")
+            with uploader.metrics.phase("sync"):
+                return uploader.sync_content(all_blocks)
+
+        graph.add("convert", convert)
+        graph.add("content", apply_blocks, after=content_deps + ("convert",))
+    else:
+        # Convert on a background thread (starting now, so it overlaps the
+        # clear) and upload batches as they fill
+        if bundle is not None:
+            content_hash = bundle.digest
+            stream = BlockStream(bundle)
+        else:
+            content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            stream = BlockStream(uploader.iter_notion_blocks(content))
+        journal = UploadJournal(journal_dir or JOURNAL_DIR, uploader.page_id, content_hash)
+        if resume:
+            if not journal.load():
+                uploader.log("No checkpoint found for this page and content; uploading from the start")
+        else:
+            journal.remove()
+        stream.start()
+
+        def upload():
+            if not cleared():
+                return None
+            if bundle is not None:
+                uploader.log(f"\n1️⃣ Uploading compiled blocks from {bundle.path.name}...")
+            else:
+                uploader.log("\n1️⃣ Converting and uploading content...")
+            with uploader.metrics.phase("upload"):
+                return uploader.upload_content(stream, journal=journal)
+
+        graph.add("content", upload, after=content_deps)
+
+    graph.add("icon", set_icon)
+
+    try:
+        results = graph.run()
+    finally:
+        if stream is not None:
+            stream.close()
+
+    if results["content"] is None:
+        uploader.log("\n⚠️ Page was not fully cleared; skipping upload (re-run with --clear)")
+        return False, [], 0
+    success, failed_indices = results["content"]
+
+    if stream is not None:
+        # Conversion overlaps the upload phase; this is the producer's busy time
+        uploader.metrics.add_phase("convert", stream.convert_seconds)
+        block_count = stream.count
+        if bundle is not None:
+            uploader.log(f"   → {block_count} blocks read")
+        else:
+            uploader.log(f"   → {block_count} blocks converted{_cache_summary(uploader)}")
+    else:
+        block_count = len(results["convert"][0])
+
+    if uploader.quarantine:
+        uploader.log(f"\n⚠️ {len(uploader.quarantine)} blocks rejected by Notion were uploaded as plain text:")
+        for entry in uploader.quarantine:
+            uploader.log(f"   block {entry['index'] + 1}: {entry['error']}")
+
+    if not success:
+        uploader.log(f"\n⚠️ Upload completed with errors ({len(failed_indices)} blocks failed)")
+        uploader.log(f"Failed block indices: {failed_indices}")
+    else:
+        uploader.log("\n✅ Content uploaded successfully!")
+
+    uploader.log(f"\n{'4️⃣' if sync or split_pages else '2️⃣'} Setting page icon...")
+    uploader.log(results["icon"], end="")
+
+    uploader.metrics.incr("blocks_converted", block_count)
+    uploader.metrics.incr("reports")
+    return success, failed_indices, block_count
+
+
+def compile_report(converter: NotionUploader, content: str, out_path: Path,
+                   source: Optional[str] = None, company_url: Optional[str] = None) -> Dict:
+    """Convert a report to Notion blocks and write them as a BlockBundle
+
+    Needs no network access or credentials; a later push uploads the
+    bundle without converting again.
+
+    Args:
+        converter: Offline NotionUploader (api_key=None), optionally with a cache
+        content: Full markdown report content
+        out_path: Bundle file to write
+        source: Source file name recorded in the header
+        company_url: Company website URL recorded for push
+
+    Returns:
+        The bundle header dict
+    """
+    meta = {"source": source, "source_sha256": hashlib.sha256(content.encode("utf-8")).hexdigest()}
+    if company_url:
+        meta["company_url"] = company_url
+    return BlockBundle.write(out_path, converter.iter_notion_blocks(content), **meta)
+
+
+def compile_file(content_path: Path, out_path: Path, company_url: Optional[str] = None,
+                 cache_dir: Optional[Path] = None,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_MB * 1024 * 1024) -> Dict:
+    """Compile one markdown file (runs in a worker process)
+
+    Args:
+        content_path: Markdown report
+        out_path: Bundle file to write
+        company_url: Company website URL recorded for push
+        cache_dir: Conversion cache directory (default: no cache)
+        cache_max_bytes: Size the conversion cache is trimmed to
+
+    Returns:
+        {content, bundle, blocks, bytes, seconds, error} dict
+    """
+    start = time.monotonic()
+    result = {"content": str(content_path), "bundle": str(out_path), "blocks": 0, "bytes": 0,
+              "seconds": 0.0, "error": ""}
+    cache = ConversionCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+    converter = NotionUploader(None, None, verbose=False, cache=cache)
+    try:
+        with open(content_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if not content.strip():
+            raise ValueError("content file is empty")
+        header = compile_report(converter, content, out_path, source=content_path.name,
+                                company_url=company_url)
+        result["blocks"] = header["blocks"]
+        result["bytes"] = header["bytes"]
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def load_manifest(manifest_path: Path, defaults: Optional[Dict] = None,
+                  resolve_page_id=None) -> List[Dict]:
+    """Load batch upload jobs from a JSONL manifest
+
+    Each non-empty line is a JSON object with page_id, content (path,
+    relative paths resolve against the manifest's directory), company_url
+    and optional clear/sync/resume flags (at most one may be set) and
+    split_pages flag (not with sync/resume). Lines starting with # are
+    ignored. A content path ending in .ndjson is
+    pushed as a compiled BlockBundle instead of converted.
+
+    Args:
+        manifest_path: Path to manifest file
+        defaults: {flag: value} for entries that omit a mode flag
+        resolve_page_id: Optional callback(company_url) -> page ID or None,
+            used for entries without a page_id
+
+    Returns:
+        List of {line, page_id, content, company_url, clear, sync, resume, split_pages} dicts
+
+    Raises:
+        SystemExit if the manifest is missing or malformed
+    """
+    if not manifest_path.exists():
+        print(f"ERROR: Manifest not found: {manifest_path}", file=sys.stderr)
+        sys.exit(1)
+
+    defaults = defaults or {}
+    jobs = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"ERROR: Invalid JSON on manifest line {line_no}: {str(e)}", file=sys.stderr)
+                sys.exit(1)
+
+            if not entry.get("page_id") and entry.get("company_url") and resolve_page_id:
+                entry["page_id"] = resolve_page_id(entry["company_url"])
+                if not entry["page_id"]:
+                    print(f"ERROR: Manifest line {line_no}: no database entry for {entry['company_url']} "
+                          f"in the URL index", file=sys.stderr)
+                    sys.exit(1)
+
+            missing = [key for key in ("page_id", "content", "company_url") if not entry.get(key)]
+            if missing:
+                print(f"ERROR: Manifest line {line_no} missing: {', '.join(missing)}", file=sys.stderr)
+                sys.exit(1)
+
+            content_path = Path(entry["content"])
+            if not content_path.is_absolute():
+                content_path = manifest_path.parent / content_path
+
+            job = {
+                "line": line_no,
+                "page_id": entry["page_id"],
+                "content": content_path,
+                "company_url": entry["company_url"]
+            }
+            for flag in MODE_FLAGS:
+                job[flag] = bool(entry.get(flag, defaults.get(flag, False)))
+            if sum(job[flag] for flag in MODE_FLAGS) > 1:
+                print(f"ERROR: Manifest line {line_no} sets more than one of: "
+                      f"{', '.join(MODE_FLAGS)}", file=sys.stderr)
+                sys.exit(1)
+            job["split_pages"] = bool(entry.get("split_pages", defaults.get("split_pages", False)))
+            if job["split_pages"] and (job["sync"] or job["resume"]):
+                print(f"ERROR: Manifest line {line_no}: split_pages can't be combined with sync or resume",
+                      file=sys.stderr)
+                sys.exit(1)
+            jobs.append(job)
+
+    return jobs
+
+
+def run_batch_job(job: Dict, api_key: str, uploader_options: Dict,
+                  journal_dir: Optional[Path] = None) -> Dict:
+    """Upload one manifest entry quietly and summarize the outcome
+
+    Args:
+        job: Manifest entry from load_manifest
+        api_key: Notion integration token
+        uploader_options: NotionUploader keyword arguments shared by all
+            workers (rate_limiter, concurrency, max_batch_bytes, ...)
+        journal_dir: Directory for checkpoint journals (default: JOURNAL_DIR)
+
+    Returns:
+        {page_id, content, success, blocks, failed, requests, seconds, error} dict
+    """
+    start = time.monotonic()
+    result = {
+        "page_id": job["page_id"],
+        "content": str(job["content"]),
+        "success": False,
+        "blocks": 0,
+        "failed": 0,
+        "requests": 0,
+        "seconds": 0.0,
+        "error": ""
+    }
+    uploader = NotionUploader(api_key, job["page_id"], verbose=False, **uploader_options)
+
+    try:
+        if Path(job["content"]).suffix == BUNDLE_SUFFIX:
+            content = BlockBundle(job["content"])
+            content.verify()
+        else:
+            with open(job["content"], 'r', encoding='utf-8') as f:
+                content = f.read()
+            if not content.strip():
+                raise ValueError("content file is empty")
+
+        success, failed_indices, block_count = upload_report(
+            uploader, content, job["company_url"], clear=job["clear"], sync=job["sync"],
+            resume=job["resume"], journal_dir=journal_dir, split_pages=job.get("split_pages", False)
+        )
+        result["success"] = success
+        result["blocks"] = block_count
+        result["failed"] = len(failed_indices)
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["requests"] = uploader.request_count
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def run_batch(jobs: List[Dict], api_key: str, workers: int = DEFAULT_WORKERS,
+              rate_limit: float = DEFAULT_RATE_LIMIT, journal_dir: Optional[Path] = None,
+              batch_bytes: int = DEFAULT_BATCH_BYTES,
+              transport: Optional[NotionTransport] = None,
+              defer_table_rows: bool = False, metrics: Optional[Metrics] = None,
+              verbose: bool = True, cache: Optional[ConversionCache] = None) -> bool:
+    """Upload many reports concurrently under one shared rate limiter
+
+    All workers also share one AdaptiveConcurrency controller, so a 429
+    on any page slows every worker down together, and one pooled
+    transport, so connections stay warm from job to job.
+
+    Args:
+        jobs: Manifest entries from load_manifest
+        api_key: Notion integration token
+        workers: Number of concurrent upload workers
+        rate_limit: Combined requests/second across all workers
+        journal_dir: Directory for checkpoint journals (default: JOURNAL_DIR)
+        batch_bytes: JSON byte budget per append request
+        transport: Shared transport (default: pooled NotionTransport)
+        defer_table_rows: Append table rows after their tables are created
+        metrics: Shared Metrics for every job (default: private instance)
+        verbose: Print per-job lines and the summary
+        cache: Conversion cache shared by every job (default: none)
+
+    Returns:
+        True if every job succeeded, False otherwise
+    """
+    uploader_options = {
+        "transport": transport or NotionTransport(api_key),
+        "rate_limiter": TokenBucket(rate_limit),
+        "concurrency": AdaptiveConcurrency(initial=max(DEFAULT_CONCURRENCY, workers)),
+        "max_batch_bytes": batch_bytes,
+        "defer_table_rows": defer_table_rows,
+        "metrics": metrics or Metrics(),
+        "cache": cache
+    }
+    log = print if verbose else (lambda *args, **kwargs: None)
+    log(f"\n📦 Batch upload: {len(jobs)} reports, {workers} workers, {rate_limit:g} req/s")
+
+    results = []
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_batch_job, job, api_key, uploader_options, journal_dir)
+                   for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["error"]:
+                status = f"✗ {result['error']}"
+            elif result["success"]:
+                status = "✓"
+            else:
+                status = f"⚠️ {result['failed']} blocks failed"
+            log(f"  [{len(results)}/{len(jobs)}] {result['page_id']}: "
+                  f"{result['blocks']} blocks, {result['requests']} requests, "
+                  f"{result['seconds']:.1f}s {status}")
+    elapsed = time.monotonic() - start
+
+    succeeded = sum(1 for r in results if r["success"] and not r["error"])
+    total_blocks = sum(r["blocks"] for r in results)
+    total_requests = sum(r["requests"] for r in results)
+    log(f"\n{'✅' if succeeded == len(jobs) else '⚠️'} {succeeded}/{len(jobs)} reports uploaded "
+        f"in {elapsed:.1f}s")
+    if elapsed > 0:
+        log(f"   → {total_blocks} blocks ({total_blocks / elapsed:.1f} blocks/s), "
+            f"{total_requests} requests ({total_requests / elapsed:.2f} req/s)")
+
+    return succeeded == len(jobs)
+
+
+def check_report_links(reports: Dict[str, Union[str, BlockBundle]], cache_path: Optional[Path] = None,
+                       metrics: Optional[Metrics] = None, verbose: bool = True) -> Dict[str, int]:
+    """Check the reports' citation links with check_links.py before uploading
+
+    Args:
+        reports: {name: markdown content or bundle}
+        cache_path: Link check cache (default: check_links.DEFAULT_CACHE_PATH)
+        metrics: Records the time taken as the "links" phase
+        verbose: Print the check summary and problem links
+
+    Returns:
+        {name: number of broken links} for each report with broken links
+    """
+    from check_links import BROKEN, DEFAULT_CACHE_PATH, check_reports  # only needed with --check-links
+    with (metrics or Metrics()).phase("links"):
+        problems = check_reports(reports, cache_path=cache_path or DEFAULT_CACHE_PATH,
+                                 log=print if verbose else (lambda *args, **kwargs: None))
+    broken = {}
+    for name, results in problems.items():
+        count = sum(1 for result in results if result["state"] == BROKEN)
+        if count:
+            broken[name] = count
+    return broken
+
+
+def write_metrics(metrics: Metrics, path: Optional[str], quiet: bool = False, **extra) -> None:
+    """Write metrics to path if one was given, reporting write errors on stderr
+
+    Args:
+        metrics: Metrics collected during the run
+        path: --metrics-out value (None to skip)
+        quiet: Don't print the confirmation line
+        **extra: Additional top-level fields (e.g. success, reports)
+    """
+    if not path:
+        return
+    try:
+        metrics.write(Path(path), **extra)
+    except OSError as e:
+        print(f"ERROR: Could not write metrics to {path}: {str(e)}", file=sys.stderr)
+        return
+    if not quiet:
+        print(f"📊 Metrics written to {path}")
+
+
+def compile_main(argv: List[str]) -> None:
+    """Entry point for the compile command (offline; never imports requests)"""
+    parser = argparse.ArgumentParser(
+        prog="upload_to_notion.py compile",
+        description="Convert markdown reports to Notion block bundles, without network access or credentials",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python upload_to_notion.py compile report.md --company-url https://example.com
+  python upload_to_notion.py compile reports/*.md --out-dir bundles/ --workers 8 --cache-dir .cache
+        """
+    )
+    parser.add_argument("content", nargs="+", help="Markdown report(s) to compile")
+    parser.add_argument("-o", "--output", help=f"Bundle path for a single report (default: <report>{BUNDLE_SUFFIX})")
+    parser.add_argument("--out-dir", help="Write bundles here instead of next to each report")
+    parser.add_argument("--company-url", help="Company website URL stored in the bundle for push (single report)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes compiling in parallel (default: 1)")
+    parser.add_argument("--cache-dir",
+                        help="Cache converted sections here so unchanged sections skip conversion on re-runs")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_CACHE_MAX_MB,
+                        help=f"Evict least recently used cache entries beyond this size "
+                             f"(default: {DEFAULT_CACHE_MAX_MB})")
+    parser.add_argument("--quiet", action="store_true", help="No progress output; errors only")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.cache_max_mb <= 0:
+        parser.error("--cache-max-mb must be positive")
+    if len(args.content) > 1 and (args.output or args.company_url):
+        parser.error("--output and --company-url need a single report")
+    if args.output and args.out_dir:
+        parser.error("--output cannot be combined with --out-dir")
+
+    outputs = []
+    for content in args.content:
+        content_path = Path(content)
+        if args.output:
+            out_path = Path(args.output)
+        elif args.out_dir:
+            out_path = Path(args.out_dir) / (content_path.stem + BUNDLE_SUFFIX)
+        else:
+            out_path = content_path.with_suffix(BUNDLE_SUFFIX)
+        outputs.append((content_path, out_path))
+    if len({out_path for _, out_path in outputs}) < len(outputs):
+        parser.error("two reports would be compiled to the same bundle; rename one or drop --out-dir")
+
+    cache_dir = Path(args.cache_dir) if args.cache_dir else None
+    cache_max_bytes = int(args.cache_max_mb * 1024 * 1024)
+    log = (lambda *a, **k: None) if args.quiet else print
+
+    results = []
+    start = time.monotonic()
+
+    def report(result: Dict) -> None:
+        results.append(result)
+        name = Path(result["content"]).name
+        if result["error"]:
+            print(f"  ✗ {name}: {result['error']}", file=sys.stderr)
+        else:
+            log(f"  ✓ {name} → {result['bundle']}: {result['blocks']} blocks, "
+                f"{result['bytes'] / 1024:.1f} KB, {result['seconds']:.2f}s")
+
+    log(f"\n🧱 Compiling {len(outputs)} report(s) to block bundles...")
+    if args.workers == 1 or len(outputs) == 1:
+        for content_path, out_path in outputs:
+            report(compile_file(content_path, out_path, args.company_url, cache_dir, cache_max_bytes))
+    else:
+        # Conversion is CPU-bound, so parallelism needs processes, not threads
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(compile_file, content_path, out_path, args.company_url,
+                                   cache_dir, cache_max_bytes)
+                       for content_path, out_path in outputs]
+            for future in as_completed(futures):
+                report(future.result())
+    elapsed = time.monotonic() - start
+
+    succeeded = sum(1 for r in results if not r["error"])
+    total_blocks = sum(r["blocks"] for r in results)
+    log(f"\n{'✅' if succeeded == len(results) else '⚠️'} {succeeded}/{len(results)} reports compiled "
+        f"in {elapsed:.2f}s ({total_blocks} blocks)")
+    sys.exit(0 if succeeded == len(results) else 1)
+
+
 def main():
     """Main entry point"""
+    argv = sys.argv[1:]
+    if argv[:1] == ["compile"]:
+        compile_main(argv[1:])
+    push = argv[:1] == ["push"]
+    if push:
+        argv = argv[1:]
+
     parser = argparse.ArgumentParser(
-        description="Upload research report to Notion page",
+        prog="upload_to_notion.py push" if push else None,
+        description="Upload a compiled block bundle to a Notion page" if push
+        else "Upload research report to Notion page",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
   python upload_to_notion.py --page-id abc123def456 --content report.md --company-url https://example.com
+  python upload_to_notion.py compile report.md --company-url https://example.com
+  python upload_to_notion.py push report.ndjson --page-id abc123def456
   python upload_to_notion.py --page-id abc123def456 --content report.md --company-url https://example.com --clear
+  python upload_to_notion.py --page-id abc123def456 --content report.md --company-url https://example.com --sync
+  python upload_to_notion.py --page-id abc123def456 --content report.md --company-url https://example.com --resume
+  python upload_to_notion.py --page-id abc123def456 --content report.md --company-url https://example.com --clear --split-pages
+  python upload_to_notion.py --page-id abc123def456 --content report.md --company-url https://example.com --check-links
   python upload_to_notion.py --page-id abc123def456 --content report.md --company-url https://example.com --config /path/to/config.json
+  python upload_to_notion.py --manifest jobs.jsonl --workers 8
+  python upload_to_notion.py --manifest jobs.jsonl --index ../url_index.sqlite
+  python upload_to_notion.py --index ../url_index.sqlite --content report.md --company-url https://example.com
+  python upload_to_notion.py --manifest jobs.jsonl --quiet --metrics-out /var/lib/node_exporter/notion_upload.prom
         """
     )
 
-    parser.add_argument("--page-id", required=True, help="Notion page UUID")
-    parser.add_argument("--content", required=True, help="Path to markdown file with report content")
-    parser.add_argument("--company-url", required=True, help="Company website URL (for favicon)")
+    if push:
+        parser.add_argument("bundle", help=f"Block bundle ({BUNDLE_SUFFIX}) written by the compile command")
+        # Nothing is converted and there's no manifest, so these options don't apply
+        parser.set_defaults(content=None, manifest=None, cache_dir=None, cache_max_mb=DEFAULT_CACHE_MAX_MB)
+    parser.add_argument("--page-id", help="Notion page UUID")
+    if not push:
+        parser.add_argument("--content", help="Path to markdown file with report content")
+        parser.set_defaults(bundle=None)
+    parser.add_argument("--company-url",
+                        help="Company website URL (for favicon; default: the URL stored in the bundle)" if push
+                        else "Company website URL (for favicon)")
     parser.add_argument("--config", help="Path to config.json (default: auto-find in skill directory)")
     parser.add_argument("--clear", action="store_true", help="Clear existing page content before uploading")
+    parser.add_argument("--sync", action="store_true",
+                        help="Only delete, insert or update blocks that differ from the existing page")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue a failed upload after the last acknowledged block")
+    parser.add_argument("--journal-dir", help=f"Directory for upload checkpoints (default: {JOURNAL_DIR})")
+    parser.add_argument("--batch-bytes", type=int, default=DEFAULT_BATCH_BYTES,
+                        help=f"JSON byte budget per upload request (default: {DEFAULT_BATCH_BYTES})")
+    parser.add_argument("--defer-table-rows", action="store_true",
+                        help="Create tables with their first row, then append the rest concurrently")
+    parser.add_argument("--api-url", default=NOTION_BASE_URL,
+                        help="Notion API base URL (e.g. a local stand-in server for testing)")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help=f"Keep-alive HTTP connections to the API (default: {DEFAULT_POOL_SIZE})")
+    if not push:
+        parser.add_argument("--manifest",
+                            help=f"JSONL manifest of reports (or {BUNDLE_SUFFIX} bundles) to upload in batch mode")
+    parser.add_argument("--index",
+                        help="URL index from notion_url_index.py; looks up page IDs by --company-url "
+                             "(or manifest company_url) when no page ID is given")
+    parser.add_argument("--split-pages", action="store_true",
+                        help="Upload each H1 section to its own child page, several at a time")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent uploads in batch mode, or child pages with --split-pages "
+                             f"(default: {DEFAULT_WORKERS})")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT,
+                        help=f"Max Notion requests/second across all workers (default: {DEFAULT_RATE_LIMIT:g})")
+    if not push:
+        parser.add_argument("--cache-dir",
+                            help="Cache converted sections here so unchanged sections skip conversion on re-runs")
+        parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_CACHE_MAX_MB,
+                            help=f"Evict least recently used cache entries beyond this size "
+                                 f"(default: {DEFAULT_CACHE_MAX_MB})")
+    parser.add_argument("--check-links", action="store_true",
+                        help="Check that citation links resolve first; reports with broken links aren't uploaded")
+    parser.add_argument("--link-cache", help="Link check result cache (default: link_cache.sqlite in the skill directory)")
+    parser.add_argument("--metrics-out",
+                        help="Write phase timings and request metrics here (JSON, or Prometheus text for *.prom)")
+    parser.add_argument("--quiet", action="store_true", help="No progress output; errors only")
+
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.rate_limit <= 0:
+        parser.error("--rate-limit must be positive")
+    if args.pool_size < 1:
+        parser.error("--pool-size must be at least 1")
+    if args.batch_bytes < 1:
+        parser.error("--batch-bytes must be positive")
+    if args.cache_max_mb <= 0:
+        parser.error("--cache-max-mb must be positive")
+    if sum((args.clear, args.sync, args.resume)) > 1:
+        parser.error("--clear, --sync and --resume are mutually exclusive")
+    if args.split_pages and (args.sync or args.resume):
+        parser.error("--split-pages can't be combined with --sync or --resume")
+    journal_dir = Path(args.journal_dir) if args.journal_dir else None
+    metrics = Metrics()
+    cache = None
+    if args.cache_dir:
+        cache = ConversionCache(Path(args.cache_dir), max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    resolve_page_id = None
+    if args.index:
+        from notion_url_index import UrlIndex  # only needed for page ID lookups
+        if not Path(args.index).exists():
+            print(f"ERROR: URL index not found: {args.index} (build it with notion_url_index.py sync)",
+                  file=sys.stderr)
+            sys.exit(1)
+        url_index = UrlIndex(Path(args.index))
+        resolve_page_id = url_index.page_id_for
+
+    if args.manifest:
+        if args.page_id or args.content or args.company_url:
+            parser.error("--manifest cannot be combined with --page-id/--content/--company-url")
+        jobs = load_manifest(Path(args.manifest),
+                             defaults={flag: getattr(args, flag) for flag in MODE_FLAGS + ("split_pages",)},
+                             resolve_page_id=resolve_page_id)
+        if not jobs:
+            print("ERROR: Manifest contains no jobs", file=sys.stderr)
+            sys.exit(1)
+        config = load_config(Path(args.config) if args.config else None)
+        api_key = config["notion"]["notion_api"]
+
+        runnable = jobs
+        if args.check_links:
+            reports = {}
+            for job in jobs:
+                try:
+                    reports[str(job["content"])] = (BlockBundle(job["content"])
+                                                    if job["content"].suffix == BUNDLE_SUFFIX
+                                                    else job["content"].read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    pass  # the job itself reports unreadable content
+            broken = check_report_links(reports, Path(args.link_cache) if args.link_cache else None,
+                                        metrics, verbose=not args.quiet)
+            for name, count in broken.items():
+                print(f"ERROR: {name} has {count} broken link(s); not uploading it", file=sys.stderr)
+            runnable = [job for job in jobs if str(job["content"]) not in broken]
+
+        transport = NotionTransport(api_key, base_url=args.api_url,
+                                    pool_size=max(args.pool_size, args.workers))
+        success = not runnable or run_batch(runnable, api_key, args.workers, args.rate_limit,
+                                            journal_dir=journal_dir, batch_bytes=args.batch_bytes,
+                                            transport=transport, defer_table_rows=args.defer_table_rows,
+                                            metrics=metrics, verbose=not args.quiet, cache=cache)
+        success = success and len(runnable) == len(jobs)
+        write_metrics(metrics, args.metrics_out, args.quiet, success=success, reports=len(jobs))
+        sys.exit(0 if success else 1)
+
+    bundle = None
+    if args.bundle:
+        try:
+            bundle = BlockBundle(Path(args.bundle))
+            bundle.verify()  # fail before touching the page, not halfway through it
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Could not read bundle: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        args.company_url = args.company_url or bundle.header.get("company_url")
+
+    if not args.page_id and args.company_url and resolve_page_id:
+        args.page_id = resolve_page_id(args.company_url)
+        if not args.page_id:
+            print(f"ERROR: No database entry for {args.company_url} in the URL index", file=sys.stderr)
+            sys.exit(1)
+
+    required = [("--page-id", args.page_id), ("--company-url", args.company_url)]
+    if not push:
+        required.insert(1, ("--content", args.content))
+    missing = [flag for flag, value in required if not value]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)}")
+
+    if bundle is not None:
+        content = bundle
+    else:
+        # Validate inputs
+        content_file = Path(args.content)
+        if not content_file.exists():
+            print(f"ERROR: Content file not found: {args.content}", file=sys.stderr)
+            sys.exit(1)
 
-    args = parser.parse_args()
-
-    # Validate inputs
-    content_file = Path(args.content)
-    if not content_file.exists():
-        print(f"ERROR: Content file not found: {args.content}", file=sys.stderr)
-        sys.exit(1)
+        # Read content
+        try:
+            with open(content_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"ERROR: Could not read content file: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
+        if not content.strip():
+            print("ERROR: Content file is empty", file=sys.stderr)
+            sys.exit(1)
+
+    if args.check_links:
+        name = args.bundle or args.content
+        broken = check_report_links({name: content}, Path(args.link_cache) if args.link_cache else None,
+                                    metrics, verbose=not args.quiet)
+        if broken:
+            print(f"ERROR: {name} has {broken[name]} broken link(s); fix them, or upload without --check-links",
+                  file=sys.stderr)
+            sys.exit(1)
 
     # Load config and get API key
     config = load_config(Path(args.config) if args.config else None)
     api_key = config["notion"]["notion_api"]
 
-    # Read content
-    try:
-        with open(content_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except Exception as e:
-        print(f"ERROR: Could not read content file: {str(e)}", file=sys.stderr)
-        sys.exit(1)
-
-    if not content.strip():
-        print("ERROR: Content file is empty", file=sys.stderr)
-        sys.exit(1)
-
     # Create uploader and process
-    print(f"\n📝 Uploading report to Notion (page: {args.page_id})")
-    print(f"📄 Content size: {len(content)} characters")
-
-    uploader = NotionUploader(api_key, args.page_id)
-
-    # Clear existing content if requested
-    if args.clear:
-        print("\n0️⃣ Clearing existing content...")
-        uploader.clear_page_content()
-
-    # Chunk the content
-    print("\n1️⃣ Chunking content by headers...")
-    chunks = uploader.chunk_markdown_by_headers(content)
-    print(f"   → {len(chunks)} sections found")
-
-    # Convert to Notion blocks
-    print("\n2️⃣ Converting to Notion blocks...")
-    all_blocks = []
-    for chunk in chunks:
-        blocks = uploader.markdown_to_notion_blocks(chunk)
-        all_blocks.extend(blocks)
-    print(f"   → {len(all_blocks)} blocks created")
-
-    # Upload blocks
-    print("\n3️⃣ Uploading content...")
-    success, failed_indices = uploader.upload_content(all_blocks)
-
-    if not success:
-        print(f"\n⚠️ Upload completed with errors ({len(failed_indices)} blocks failed)")
-        print(f"Failed block indices: {failed_indices}")
-    else:
-        print("\n✅ Content uploaded successfully!")
-
-    # Set icon
-    print("\n4️⃣ Setting page icon...")
-    uploader.set_icon(args.company_url)
+    if not args.quiet:
+        print(f"\n📝 Uploading report to Notion (page: {args.page_id})")
+        if bundle is not None:
+            print(f"📦 Bundle: {bundle.block_count} blocks, {bundle.header['bytes'] / 1024:.1f} KB "
+                  f"(compiled from {bundle.header.get('source') or 'unknown source'})")
+        else:
+            print(f"📄 Content size: {len(content)} characters")
+
+    transport = NotionTransport(api_key, base_url=args.api_url, pool_size=args.pool_size)
+    uploader = NotionUploader(api_key, args.page_id, rate_limiter=TokenBucket(args.rate_limit),
+                              verbose=not args.quiet, max_batch_bytes=args.batch_bytes,
+                              transport=transport, defer_table_rows=args.defer_table_rows,
+                              metrics=metrics, cache=cache)
+    success, _, _ = upload_report(uploader, content, args.company_url, clear=args.clear,
+                                  sync=args.sync, resume=args.resume, journal_dir=journal_dir,
+                                  split_pages=args.split_pages, page_workers=args.workers)
 
     # Final summary
-    print(f"\n{'✅' if success else '⚠️'} Done! View at: https://notion.so/{args.page_id}")
+    if not args.quiet:
+        print(f"\n⏱️ {metrics.format_phases()}")
+        print(f"\n{'✅' if success else '⚠️'} Done! View at: https://notion.so/{args.page_id}")
+    elif not success:
+        print(f"ERROR: Upload to page {args.page_id} failed", file=sys.stderr)
+    write_metrics(metrics, args.metrics_out, args.quiet, success=success, reports=1)
 
     sys.exit(0 if success else 1)
 